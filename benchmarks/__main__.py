@@ -0,0 +1,79 @@
+"""Run the benchmark suite.
+
+Usage:
+    python -m benchmarks [--json] [--compare] [--save] [--tolerance 0.25] [benchmark ...]
+
+`--compare` checks the results against the stored baseline, and exits with a non-zero
+status if a benchmark is slower than the baseline by more than the tolerance.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+from benchmarks import cases  # noqa: F401
+from benchmarks.runner import Result, names, run_benchmarks
+
+baseline_path = Path(__file__).parent / 'baseline.json'
+
+
+def print_table(results: List[Result]):
+    print(f'{"benchmark":<24} {"ns/event":>12} {"events/s":>14} {"alloc bytes":>12}')  # noqa: WPS421
+    for r in results:
+        print(f'{r.name:<24} {r.ns_per_event:>12.0f} {r.events_per_sec:>14.0f} {r.alloc_bytes:>12}')  # noqa: WPS421
+
+
+def compare(results: List[Result], baseline: Dict[str, Dict[str, float]], tolerance: float) -> List[str]:
+    regressions: List[str] = []
+
+    for r in results:
+        reference = baseline.get(r.name)
+        if not reference:
+            continue
+
+        ratio = r.ns_per_event / reference['ns_per_event']
+        if ratio > 1 + tolerance:
+            regressions.append(f'{r.name}: {r.ns_per_event:.0f}ns/event, {ratio:.2f}x the baseline')
+
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmark the logging hot paths.')
+    parser.add_argument('benchmarks', nargs='*', help=f'The benchmarks to run, defaults to all of: {", ".join(names())}')
+    parser.add_argument('--json', action='store_true', help='Output the results as JSON')
+    parser.add_argument('--compare', action='store_true', help='Compare the results with the stored baseline')
+    parser.add_argument('--save', action='store_true', help='Store the results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='Allowed slowdown when comparing, as a fraction')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of timing runs, the best one is kept')
+    args = parser.parse_args()
+
+    unknown = set(args.benchmarks) - set(names())
+    if unknown:
+        parser.error(f'Unknown benchmarks: {", ".join(sorted(unknown))}')
+
+    results = run_benchmarks(args.benchmarks, args.repeat)
+
+    if args.json:
+        print(json.dumps([r.to_dict() for r in results], indent=2))  # noqa: WPS421
+    else:
+        print_table(results)
+
+    if args.save:
+        baseline = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+        baseline.update({r.name: r.to_dict() for r in results})
+        baseline_path.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+
+    if args.compare:
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}', file=sys.stderr)  # noqa: WPS421
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Benchmarks for the logging hot paths.
+
+Each benchmark configures structlog with logkit's processors, and a logger that returns
+the rendered event instead of writing it, so we only measure logkit's own cost.
+"""
+
+import contextvars
+import logging
+import os
+from typing import Callable
+from unittest.mock import patch
+
+import structlog
+
+from benchmarks.runner import benchmark, import_benchmark, threaded_benchmark
+from outcome.logkit import context, intercept
+from outcome.logkit.bound import make_level_bound_logger
+from outcome.logkit.init import get_final_processors
+from outcome.logkit.logger import get_logger, reset_loggers
+from outcome.logkit.proxy import LoggingProxy
+
+_level = logging.INFO
+_stackdriver_feature = 'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER'
+
+
+def configure(use_stackdriver: bool):
+    with patch.dict(os.environ, {_stackdriver_feature: 'yes' if use_stackdriver else 'no'}):
+        processors = get_final_processors(_level)
+
+    structlog.configure(
+        processors=processors,
+        wrapper_class=make_level_bound_logger(_level),
+        logger_factory=structlog.ReturnLoggerFactory(),
+    )
+    reset_loggers()
+
+
+@benchmark('console_pipeline')
+def console_pipeline() -> Callable[[], object]:
+    configure(use_stackdriver=False)
+    logger = get_logger('benchmark')
+
+    return lambda: logger.info('event', user_id=1, tenant='tenant')
+
+
+@benchmark('stackdriver_pipeline')
+def stackdriver_pipeline() -> Callable[[], object]:
+    configure(use_stackdriver=True)
+    logger = get_logger('benchmark')
+
+    return lambda: logger.info('event', user_id=1, tenant='tenant')
+
+
+@benchmark('stackdriver_binary')
+def stackdriver_binary() -> Callable[[], object]:
+    with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_OUTPUT_FORMAT': 'binary'}):
+        configure(use_stackdriver=True)
+    logger = get_logger('benchmark')
+
+    return lambda: logger.info('event', user_id=1, tenant='tenant')
+
+
+@benchmark('dropped_event')
+def dropped_event() -> Callable[[], object]:
+    configure(use_stackdriver=True)
+    logger = get_logger('benchmark')
+
+    return lambda: logger.debug('event', user_id=1, tenant='tenant')
+
+
+def intercepted_logger(handler: logging.Handler) -> logging.Logger:
+    # A standalone hierarchy, so we don't touch the process' logging configuration
+    root = logging.RootLogger(_level)
+    root.handlers = [handler]
+
+    logger = intercept.InterceptLogger('benchmark')
+    logger.parent = root
+
+    return logger
+
+
+@benchmark('stdlib_intercept')
+def stdlib_intercept() -> Callable[[], object]:
+    configure(use_stackdriver=True)
+    logger = intercepted_logger(intercept.StructlogHandler(level=_level))
+
+    return lambda: logger.info('event %s', 'arg', user_id=1)  # type: ignore
+
+
+@benchmark('stdlib_bridge')
+def stdlib_bridge() -> Callable[[], object]:
+    configure(use_stackdriver=True)
+    logger = intercepted_logger(intercept.StructlogBridgeHandler(level=_level))
+
+    return lambda: logger.info('event %s', 'arg', user_id=1)  # type: ignore
+
+
+# A handler with the standard library's per-handler lock, for comparison
+class LockedBridgeHandler(intercept.StructlogBridgeHandler):
+    def createLock(self):  # noqa: N802
+        logging.Handler.createLock(self)
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        return bool(logging.Handler.handle(self, record))
+
+
+def stdlib_threads(handler: logging.Handler) -> Callable[[], object]:
+    configure(use_stackdriver=True)
+    logger = intercepted_logger(handler)
+
+    return lambda: logger.info('event %s', 'arg', user_id=1)  # type: ignore
+
+
+@threaded_benchmark('stdlib_threads_1', threads=1)
+def stdlib_threads_1() -> Callable[[], object]:
+    return stdlib_threads(intercept.StructlogBridgeHandler(level=_level))
+
+
+@threaded_benchmark('stdlib_threads_4', threads=4)
+def stdlib_threads_4() -> Callable[[], object]:
+    return stdlib_threads(intercept.StructlogBridgeHandler(level=_level))
+
+
+@threaded_benchmark('stdlib_threads_8', threads=8)
+def stdlib_threads_8() -> Callable[[], object]:
+    return stdlib_threads(intercept.StructlogBridgeHandler(level=_level))
+
+
+@threaded_benchmark('stdlib_threads_8_locked', threads=8)
+def stdlib_threads_8_locked() -> Callable[[], object]:
+    return stdlib_threads(LockedBridgeHandler(level=_level))
+
+
+class Target:
+    attribute = 1
+
+    def method(self, value: int) -> int:
+        return value
+
+
+@benchmark('proxy_call')
+def proxy_call() -> Callable[[], object]:
+    configure(use_stackdriver=True)
+    proxy = LoggingProxy(Target(), level=_level, name='target')
+
+    return lambda: proxy.method(1)
+
+
+@benchmark('proxy_attribute')
+def proxy_attribute() -> Callable[[], object]:
+    configure(use_stackdriver=True)
+    proxy = LoggingProxy(Target(), level=_level, name='target')
+
+    return lambda: proxy.attribute
+
+
+@benchmark('context_add_remove')
+def context_add_remove() -> Callable[[], object]:
+    context.use_backend('structlog')
+
+    def run():  # noqa: WPS430
+        context.add(request_id='request')
+        context.remove('request_id')
+
+    return run
+
+
+# Other libraries keep their own contextvars, which the structlog backend scans on every event
+_unrelated = [contextvars.ContextVar(f'unrelated_{i}') for i in range(50)]
+
+
+def context_merge(backend: str) -> Callable[[], object]:
+    for var in _unrelated:
+        var.set('value')
+
+    merge = context.use_backend(backend)
+    context.clear()
+    context.add(request_id='request', user_id=1)
+
+    return lambda: merge(None, 'info', {'event': 'event'})
+
+
+@benchmark('context_merge_structlog')
+def context_merge_structlog() -> Callable[[], object]:
+    return context_merge('structlog')
+
+
+@benchmark('context_merge_contextvar')
+def context_merge_contextvar() -> Callable[[], object]:
+    return context_merge('contextvar')
+
+
+# Import times, in a fresh interpreter. The ns/event column is the time of a single import
+import_benchmark('import_package', 'import outcome.logkit')
+import_benchmark('import_get_logger', 'from outcome.logkit import get_logger')
+import_benchmark('import_init_logging', 'from outcome.logkit import init_logging')
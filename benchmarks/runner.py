@@ -0,0 +1,166 @@
+"""Benchmark registry and measurements."""
+
+import gc
+import subprocess
+import sys
+import threading
+import time
+import timeit
+import tracemalloc
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+Setup = Callable[[], Callable[[], object]]
+
+_benchmarks: Dict[str, Setup] = {}
+
+# The number of threads that log concurrently in the threaded benchmarks
+_threads: Dict[str, int] = {}
+
+# Import benchmarks, with the statement they time in a fresh interpreter
+_import_benchmarks: Dict[str, str] = {}
+
+# Prints the time taken by the statement in ns, and the memory it allocated
+_import_script = """
+import sys, time, tracemalloc
+trace = sys.argv[2] == 'trace'
+if trace:
+    tracemalloc.start()
+start = time.perf_counter_ns()
+exec(sys.argv[1])
+elapsed = time.perf_counter_ns() - start
+print(elapsed, tracemalloc.get_traced_memory()[1] if trace else 0)
+"""
+
+
+@dataclass
+class Result:
+    name: str
+    ns_per_event: float
+    events_per_sec: float
+    alloc_bytes: int
+
+    def to_dict(self) -> Dict[str, object]:
+        d = asdict(self)
+        d['ns_per_event'] = round(self.ns_per_event, 1)
+        d['events_per_sec'] = round(self.events_per_sec)
+        return d
+
+
+# Register a benchmark. The decorated function prepares the state, and
+# returns the callable that logs a single event
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    def decorator(setup: Setup) -> Setup:
+        _benchmarks[name] = setup
+        return setup
+
+    return decorator
+
+
+# Register a benchmark that logs from `threads` threads at once. Its ns/event is
+# the wall time divided by the total number of events
+def threaded_benchmark(name: str, threads: int) -> Callable[[Setup], Setup]:
+    _threads[name] = threads
+    return benchmark(name)
+
+
+# Register a benchmark of the time it takes to run `statement` in a new interpreter
+def import_benchmark(name: str, statement: str):
+    _import_benchmarks[name] = statement
+
+
+def names() -> List[str]:
+    return [*_benchmarks.keys(), *_import_benchmarks.keys()]
+
+
+def measure_time(run: Callable[[], object], repeat: int) -> float:
+    timer = timeit.Timer(run)
+
+    # Find a number of iterations that takes at least 0.2 seconds
+    number, _ = timer.autorange()
+
+    gc.collect()
+    best = min(timer.repeat(repeat=repeat, number=number))
+
+    return best / number * 1e9
+
+
+def measure_threaded_time(run: Callable[[], object], threads: int, repeat: int) -> float:
+    # Each thread logs as many events as takes 0.2 seconds on a single thread
+    number, _ = timeit.Timer(run).autorange()
+    barrier = threading.Barrier(threads + 1)
+
+    def worker():  # noqa: WPS430
+        barrier.wait()
+        for _ in range(number):  # noqa: WPS122
+            run()
+
+    best = float('inf')
+    gc.collect()
+
+    for _ in range(repeat):  # noqa: WPS122
+        workers = [threading.Thread(target=worker) for _ in range(threads)]  # noqa: WPS122
+        for w in workers:
+            w.start()
+
+        barrier.wait()
+        start = time.perf_counter()
+        for w in workers:
+            w.join()
+        best = min(best, time.perf_counter() - start)
+
+    return best / (number * threads) * 1e9
+
+
+# The peak memory allocated while logging a single event
+def measure_allocations(run: Callable[[], object]) -> int:
+    run()
+
+    tracemalloc.start()
+    try:  # noqa: WPS501
+        baseline, _ = tracemalloc.get_traced_memory()
+        # Python 3.8 doesn't have it, there the peak is the one since `start()`
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak - baseline
+
+
+def run_import(statement: str, trace: bool) -> Tuple[int, int]:
+    mode = 'trace' if trace else 'time'
+    output = subprocess.run([sys.executable, '-c', _import_script, statement, mode], check=True, capture_output=True, text=True)
+    elapsed, allocated = output.stdout.split()
+    return int(elapsed), int(allocated)
+
+
+def run_import_benchmark(name: str, repeat: int) -> Result:
+    statement = _import_benchmarks[name]
+
+    # Tracing slows the imports down, so it has its own run
+    ns = min(run_import(statement, trace=False)[0] for _ in range(repeat))
+    _, alloc_bytes = run_import(statement, trace=True)
+
+    return Result(name=name, ns_per_event=ns, events_per_sec=1e9 / ns, alloc_bytes=alloc_bytes)
+
+
+def run_benchmark(name: str, repeat: int = 5) -> Result:
+    if name in _import_benchmarks:
+        return run_import_benchmark(name, repeat)
+
+    run = _benchmarks[name]()
+
+    if name in _threads:
+        ns_per_event = measure_threaded_time(run, _threads[name], repeat)
+    else:
+        ns_per_event = measure_time(run, repeat)
+    alloc_bytes = measure_allocations(run)
+
+    return Result(name=name, ns_per_event=ns_per_event, events_per_sec=1e9 / ns_per_event, alloc_bytes=alloc_bytes)
+
+
+def run_benchmarks(selected: Optional[List[str]] = None, repeat: int = 5) -> List[Result]:
+    return [run_benchmark(name, repeat) for name in selected or names()]
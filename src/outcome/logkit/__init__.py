@@ -1,6 +1,46 @@
-from outcome.logkit import context
-from outcome.logkit.features import feature_set
-from outcome.logkit.init import init as init_logging
-from outcome.logkit.logger import get_logger
+"""Logging helpers.
 
-__all__ = ['init_logging', 'get_logger', 'context', 'feature_set']
+The public attributes are imported on first use, so importing the package, or one of
+its modules, doesn't load the whole logging setup.
+"""
+
+import importlib
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:  # pragma: no cover
+    from outcome.logkit import context
+    from outcome.logkit.aio import get_async_logger
+    from outcome.logkit.counters import stats
+    from outcome.logkit.features import feature_set
+    from outcome.logkit.init import init as init_logging
+    from outcome.logkit.logger import get_logger
+
+__all__ = ['init_logging', 'get_logger', 'get_async_logger', 'context', 'feature_set', 'stats']
+
+# The module of each attribute, and its name in the module
+_lazy_attributes: Dict[str, Tuple[str, Optional[str]]] = {
+    'init_logging': ('outcome.logkit.init', 'init'),
+    'get_logger': ('outcome.logkit.logger', 'get_logger'),
+    'get_async_logger': ('outcome.logkit.aio', 'get_async_logger'),
+    'context': ('outcome.logkit.context', None),
+    'feature_set': ('outcome.logkit.features', 'feature_set'),
+    'stats': ('outcome.logkit.counters', 'stats'),
+}
+
+
+def __getattr__(name: str) -> object:
+    try:
+        module_name, attribute = _lazy_attributes[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+
+    module = importlib.import_module(module_name)
+    value = module if attribute is None else getattr(module, attribute)
+
+    # The next lookups don't go through __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *_lazy_attributes})
@@ -0,0 +1,260 @@
+"""Logging from asyncio code without blocking the event loop."""
+
+import asyncio
+import atexit
+import contextvars
+import logging
+import queue
+import threading
+import traceback
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from structlog._frames import _find_first_app_frame_and_name, _format_stack  # noqa: WPS450
+
+from outcome.logkit import fork
+from outcome.logkit.callsite import find_callsite
+from outcome.logkit.exceptions import get_exc_info
+from outcome.logkit.levels import level_aliases, levels, method_level
+from outcome.logkit.logger import get_logger, resolve_logger
+from outcome.logkit.types import StructLogger
+
+Item = Callable[[], object]
+
+
+# Tells the worker thread to stop, once it has processed everything before it
+def _stop():  # pragma: no cover
+    pass  # noqa: WPS420
+
+
+def _resolve(future: 'asyncio.Future[None]'):
+    # The caller may have stopped waiting
+    if not future.done():
+        future.set_result(None)
+
+
+class Worker:
+    """Runs the processors of the async loggers, and writes their events, on a thread.
+
+    The items are processed in the order they were submitted. The thread is started on
+    first use, and stopped by `aclose()`, or at exit after it has processed what was
+    submitted before, within `flush_timeout` seconds.
+
+    The loop can't wait for the thread, so once `capacity` items are pending, the newest
+    events are dropped and counted in `dropped`. Flushes are never dropped.
+    """
+
+    def __init__(self, capacity: int = 10000, flush_timeout: float = 5.0):
+        self.capacity = capacity
+        self.flush_timeout = flush_timeout
+
+        self._dropped = 0
+        self._reset()
+
+        fork.register(self)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._queue: 'queue.SimpleQueue[Item]' = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, item: Item, droppable: bool = True):
+        with self._lock:
+            if self._thread is None:
+                self._start()
+
+            if droppable and self._queue.qsize() >= self.capacity:
+                self._dropped += 1
+                return
+
+            self._queue.put(item)
+
+    # Waits, without blocking the loop, until the events submitted before have been written
+    async def flush(self):
+        if self._thread is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        self.submit(partial(loop.call_soon_threadsafe, _resolve, future), droppable=False)
+        await future
+
+    async def aclose(self):
+        await self.flush()
+        self._stop_thread()
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        thread = self._stop_thread()
+        if thread is None:
+            return True
+
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def _start(self):
+        # Each thread has its own queue, so a stopping thread can't take the items of the next one
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, args=(self._queue,), name='logkit-async', daemon=True)
+        self._thread.start()
+
+    def _stop_thread(self) -> Optional[threading.Thread]:
+        with self._lock:
+            thread = self._thread
+            if thread is not None:
+                self._queue.put(_stop)
+                self._thread = None
+        return thread
+
+    def _run(self, items: 'queue.SimpleQueue[Item]'):
+        while True:
+            item = items.get()
+            if item is _stop:
+                return
+
+            try:
+                item()
+            except Exception:
+                # Like the standard library handlers, there's nowhere else to report it
+                traceback.print_exc()
+
+    # The thread doesn't survive the fork, and the pending events belong to the parent
+    def _after_fork_in_child(self):
+        self._reset()
+
+
+_worker = Worker()
+
+
+def _close_worker():
+    _worker.close(_worker.flush_timeout)
+
+
+atexit.register(_close_worker)
+
+
+class AsyncLogger:
+    """A logger that runs its processors, and writes its events, on a worker thread.
+
+    The calling code only pays for the level check, and for capturing the context of the
+    call: the contextvars (including `outcome.logkit.context`), the current exception, the
+    stack if `stack_info` is set and, if the chain has a `CallsiteProcessor`, the location
+    of the call. The event is then
+    processed on the worker, in the captured context.
+
+    Use `get_async_logger` to create one, and `await flush()` or `await aclose()` on shutdown.
+    """
+
+    def __init__(self, logger: StructLogger):
+        self._logger = logger
+        self._assembled: Optional[StructLogger] = None
+        self._resolve()
+
+    # The level and the callsite processor are those of the logger assembled with the current
+    # configuration, registered loggers are assembled again when structlog is reconfigured
+    def _resolve(self) -> StructLogger:
+        assembled = resolve_logger(self._logger)
+
+        if assembled is not self._assembled:
+            self._min_level: int = getattr(assembled, 'min_level', logging.NOTSET)
+            self._callsite = find_callsite(getattr(assembled, '_processors', ()))
+            self._assembled = assembled
+
+        return assembled
+
+    @property
+    def logger(self) -> StructLogger:
+        return self._logger
+
+    @property
+    def min_level(self) -> int:
+        self._resolve()
+        return self._min_level
+
+    def is_enabled_for(self, level: int) -> bool:
+        return level >= self.min_level
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self.is_enabled_for(logging.DEBUG)
+
+    def bind(self, **kwargs: object) -> 'AsyncLogger':
+        return AsyncLogger(self._logger.bind(**kwargs))
+
+    def unbind(self, *args: str) -> 'AsyncLogger':
+        return AsyncLogger(self._logger.unbind(*args))
+
+    def log(self, event: Optional[str] = None, **event_kw: object) -> None:
+        levelno = event_kw.get('levelno')
+
+        # Like the level bound loggers, we only drop the event if we know for sure it would be
+        if levelno in levels and levelno < self.min_level:  # type: ignore
+            return None
+
+        return self._submit('log', event, event_kw)
+
+    async def flush(self):
+        await _worker.flush()
+
+    async def aclose(self):
+        await _worker.aclose()
+
+    def _submit(self, method_name: str, event: Optional[str], event_kw: Dict[str, object]) -> None:
+        if method_name == 'exception':
+            event_kw.setdefault('exc_info', True)
+
+        # The current exception is only available on this thread
+        if event_kw.get('exc_info'):
+            event_kw['exc_info'] = get_exc_info(event_kw['exc_info'])
+
+        # Rendered here, like the StackInfoRenderer would, the worker's stack isn't the caller's
+        if event_kw.pop('stack_info', None):
+            event_kw['stack'] = _format_stack(_find_first_app_frame_and_name([__name__])[0])
+
+        logger = self._resolve()
+
+        if self._callsite is not None:
+            self._callsite(logger, method_name, event_kw)
+
+        method = getattr(logger, method_name)
+        _worker.submit(partial(contextvars.copy_context().run, method, event, **event_kw))
+
+
+def _make_method(method_name: str) -> Callable[..., None]:
+    level = method_level(method_name)
+
+    def method(self: AsyncLogger, event: Optional[str] = None, **event_kw: object) -> None:  # noqa: WPS430
+        # An explicit level on the event takes priority over the method name
+        if level < self.min_level and 'levelno' not in event_kw and 'level' not in event_kw:
+            return None
+        return self._submit(method_name, event, event_kw)  # noqa: WPS437
+
+    method.__name__ = method_name
+    return method
+
+
+for _method_name in (*level_aliases.keys(), 'msg'):
+    setattr(AsyncLogger, _method_name, _make_method(_method_name))
+
+
+def get_async_logger(name: Optional[str] = None, *args: object, **kwargs: object) -> AsyncLogger:
+    return AsyncLogger(get_logger(name, *args, **kwargs))
+
+
+# Wait until the events logged so far have been written
+async def flush():
+    await _worker.flush()
+
+
+# Write the pending events and stop the worker thread, it's restarted if something is logged afterwards
+async def aclose():
+    await _worker.aclose()
+
+
+# The number of events dropped because the worker fell behind
+def dropped() -> int:
+    return _worker.dropped
@@ -0,0 +1,454 @@
+"""Compact binary framed output, with interned keys.
+
+The Stackdriver entries are written as frames, each followed by a newline:
+
+    frame  := length:varint body '\\n'
+    body   := header:u8 pid:varint stream:varint value
+    header := the format version, 1, with bit 7 set when the stream's key table is reset
+
+Varints are unsigned LEB128. Values start with a one-byte tag:
+
+    0x00 null, 0x01 false, 0x02 true
+    0x03 int    zigzag:varint
+    0x04 float  8 bytes, big-endian IEEE 754
+    0x05 str    length:varint utf-8
+    0x06 list   count:varint value*
+    0x07 map    count:varint (key value)*
+
+The entry is a map. A map key is either a str value, or an interned key:
+
+    0x08 a new key     id:varint length:varint utf-8
+    0x09 a known key   id:varint
+
+Each thread writes its own stream of frames, identified by its pid and an index, with its
+own key table: the first time the stream writes a key, it gives it the next id. The table
+is reset every `reset_every` frames, so a reader that starts in the middle of a stream,
+e.g. after the file was rotated, can decode it from the next reset.
+"""
+
+import itertools
+import os
+import struct
+import threading
+import time
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Tuple
+
+from outcome.logkit import counters, fork
+from outcome.logkit.encoders import fallback
+from outcome.logkit.limits import SizeLimits, cap_event
+from outcome.logkit.stackdriver import StackdriverRenderer
+from outcome.logkit.types import EventDict
+
+version = 1
+_reset_flag = 0x80
+_terminator = 0x0A
+
+_null, _false, _true, _int, _float, _str, _list, _map, _new_key, _known_key = range(10)  # noqa: WPS236
+
+_float_format = struct.Struct('>d')
+
+# The streams of all the renderers of a process have distinct indexes
+_stream_indexes = itertools.count()
+
+
+class DecodeError(ValueError):
+    """The input isn't a valid stream of frames."""
+
+
+class UnknownKeyError(DecodeError):
+    """A frame uses a key that was defined before the start of the input."""
+
+
+def write_varint(buffer: bytearray, value: int):
+    while value > 0x7F:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _write_str(buffer: bytearray, value: str):
+    data = value.encode('utf-8', 'surrogatepass')
+    length = len(data)
+    if length < 0x80:
+        buffer.append(length)
+    else:
+        write_varint(buffer, length)
+    buffer += data
+
+
+# Map keys are strings, like in JSON
+def _key_str(key: object) -> str:
+    if isinstance(key, str):
+        return key
+    if key is None or isinstance(key, bool):
+        return {None: 'null', True: 'true', False: 'false'}[key]
+    if isinstance(key, (int, float)):
+        return repr(key)
+    return str(key)
+
+
+class KeyTable:
+    """The ids of the keys written by a stream.
+
+    Once the table holds `max_keys` keys, the other keys are written as strings.
+    """
+
+    __slots__ = ('refs', 'max_keys')
+
+    def __init__(self, max_keys: int):
+        self.refs: Dict[str, bytes] = {}
+        self.max_keys = max_keys
+
+    def write(self, buffer: bytearray, key: str):
+        ref = self.refs.get(key)
+        if ref is not None:
+            buffer += ref
+            return
+
+        if len(self.refs) >= self.max_keys:
+            buffer.append(_str)
+            _write_str(buffer, key)
+            return
+
+        key_id = len(self.refs)
+        new_ref = bytearray((_known_key,))
+        write_varint(new_ref, key_id)
+        self.refs[key] = bytes(new_ref)
+
+        buffer.append(_new_key)
+        write_varint(buffer, key_id)
+        _write_str(buffer, key)
+
+
+# Without a key table, the keys are written as strings
+def encode_value(buffer: bytearray, value: object, keys: Optional[KeyTable] = None):  # noqa: WPS212,WPS231
+    value_type = type(value)
+
+    if value_type is str:
+        buffer.append(_str)
+        _write_str(buffer, value)  # type: ignore
+    elif value_type is dict:
+        _encode_map(buffer, value, keys)  # type: ignore
+    elif value is None:
+        buffer.append(_null)
+    elif value is True:
+        buffer.append(_true)
+    elif value is False:
+        buffer.append(_false)
+    elif isinstance(value, int):
+        buffer.append(_int)
+        write_varint(buffer, value << 1 if value >= 0 else (-value << 1) - 1)
+    elif isinstance(value, float):
+        buffer.append(_float)
+        buffer += _float_format.pack(value)
+    elif isinstance(value, str):
+        buffer.append(_str)
+        _write_str(buffer, value)
+    elif isinstance(value, (list, tuple)):
+        buffer.append(_list)
+        write_varint(buffer, len(value))
+        for item in value:
+            encode_value(buffer, item, keys)
+    elif isinstance(value, dict):
+        _encode_map(buffer, value, keys)
+    else:
+        # Other objects are rendered like the JSON encoders render them
+        encode_value(buffer, fallback(value), keys)
+
+
+def _encode_map(buffer: bytearray, value: Dict[object, object], keys: Optional[KeyTable]):
+    buffer.append(_map)
+    write_varint(buffer, len(value))
+
+    if keys is None:
+        for key, item in value.items():
+            buffer.append(_str)
+            _write_str(buffer, _key_str(key))
+            encode_value(buffer, item, keys)
+        return
+
+    refs = keys.refs
+    for key, item in value.items():
+        # Most keys have been written before
+        ref = refs.get(key) if type(key) is str else None  # noqa: WPS516
+        if ref is None:
+            keys.write(buffer, _key_str(key))
+        else:
+            buffer += ref
+
+        if type(item) is str:  # noqa: WPS516
+            buffer.append(_str)
+            _write_str(buffer, item)
+        else:
+            encode_value(buffer, item, keys)
+
+
+class Stream:
+    """The frames written by a thread, and their key table."""
+
+    __slots__ = ('ids', 'keys', 'frames', 'reset_every', 'max_keys')
+
+    def __init__(self, index: int, reset_every: int = 1000, max_keys: int = 4096):
+        ids = bytearray()
+        write_varint(ids, os.getpid())
+        write_varint(ids, index)
+
+        self.ids = bytes(ids)
+        self.reset_every = reset_every
+        self.max_keys = max_keys
+        self.clear()
+
+    # The next frame resets the key table
+    def clear(self):
+        self.keys = KeyTable(self.max_keys)
+        self.frames = 0
+
+    def frame(self, value: object) -> bytes:
+        if self.frames == self.reset_every:
+            self.clear()
+
+        header = version | _reset_flag if self.frames == 0 else version
+        self.frames += 1
+
+        return _frame(header, self.ids, value, self.keys)
+
+    # A frame that doesn't use or change the key table
+    def literal_frame(self, value: object) -> bytes:
+        return _frame(version, self.ids, value, None)
+
+
+def _frame(header: int, ids: bytes, value: object, keys: Optional[KeyTable]) -> bytes:
+    body = bytearray((header,))
+    body += ids
+    encode_value(body, value, keys)
+
+    frame = bytearray()
+    write_varint(frame, len(body))
+    frame += body
+    return bytes(frame)
+
+
+class BinaryRenderer(StackdriverRenderer):
+    """Renders the Stackdriver entries as binary frames, see the module's docstring.
+
+    The frames are bytes, so the renderer needs a logger that writes bytes, like a sink.
+    `python -m outcome.logkit.decode` converts them back to Stackdriver JSON.
+    """
+
+    def __init__(self, limits: Optional[SizeLimits] = None, reset_every: int = 1000, max_keys: int = 4096):
+        super().__init__(limits=limits)
+        self.reset_every = reset_every
+        self.max_keys = max_keys
+        self._local = threading.local()
+        fork.register(self)
+
+    def stream(self) -> Stream:
+        try:
+            return self._local.stream
+        except AttributeError:
+            pass
+
+        stream = Stream(next(_stream_indexes), self.reset_every, self.max_keys)
+        self._local.stream = stream
+        return stream
+
+    def render(self, logger: object, formatted_dict: EventDict) -> bytes:
+        start = time.perf_counter_ns()
+
+        stream = self.stream()
+        rendered = stream.frame(cap_event(formatted_dict, self.limits))
+
+        if len(rendered) > self.limits.max_line_bytes:
+            # The frame isn't written, so the keys it introduced are unknown to the reader
+            stream.clear()
+            rendered = self.shrink(formatted_dict, stream.literal_frame)  # type: ignore
+
+        counters.count_rendered(len(rendered), time.perf_counter_ns() - start)
+        return rendered
+
+    # The streams of the parent's threads belong to the parent
+    def _after_fork_in_child(self):
+        self._local = threading.local()
+
+
+def _read_varint(data: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        try:
+            byte = data[pos]
+        except IndexError:
+            raise DecodeError('Truncated varint')
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+# A frame starts with a header of the known version, and ends with a newline
+def _is_frame(buffer: bytearray, start: int, end: int) -> bool:
+    if start == end:
+        return False
+    if start < len(buffer) and buffer[start] & ~_reset_flag != version:
+        return False
+    return end >= len(buffer) or buffer[end] == _terminator
+
+
+def read_frames(
+    stream: BinaryIO, chunk_size: int = 64 * 1024, on_skip: Optional[Callable[[int], None]] = None
+) -> Iterator[bytes]:
+    """Yields the body of each frame of the stream.
+
+    Data that isn't a frame, e.g. a traceback printed to the same output, is skipped up to
+    the next newline, and the number of bytes skipped is passed to `on_skip`. Raises a
+    `DecodeError` if the stream ends in the middle of a frame.
+    """
+    buffer = bytearray()
+
+    while True:
+        chunk = stream.read(chunk_size)
+        buffer += chunk
+
+        pos = 0
+        while pos < len(buffer):
+            try:
+                length, start = _read_varint(buffer, pos)
+            except DecodeError:
+                break
+
+            end = start + length
+
+            if not _is_frame(buffer, start, end):
+                newline = buffer.find(_terminator, pos)
+                if newline == -1:
+                    break
+
+                if on_skip is not None:
+                    on_skip(newline + 1 - pos)
+                pos = newline + 1
+                continue
+
+            if end >= len(buffer):
+                break
+
+            yield bytes(buffer[start:end])
+            pos = end + 1
+
+        del buffer[:pos]
+
+        if not chunk:
+            if buffer:
+                raise DecodeError('Truncated frame at the end of the stream')
+            return
+
+
+class Decoder:
+    """Decodes frames, keeping the key table of each stream.
+
+    The frames of a stream have to be decoded in order. A frame that uses a key defined
+    before the reader started raises an `UnknownKeyError`.
+    """
+
+    def __init__(self):
+        self.tables: Dict[Tuple[int, int], Dict[int, str]] = {}
+
+    def decode(self, body: bytes) -> object:
+        try:
+            header = body[0]
+        except IndexError:
+            raise DecodeError('Empty frame')
+
+        if header & ~_reset_flag != version:
+            raise DecodeError(f'Unknown format version: {header & ~_reset_flag}')
+
+        pid, pos = _read_varint(body, 1)
+        index, pos = _read_varint(body, pos)
+
+        stream_id = (pid, index)
+        if header & _reset_flag:
+            self.tables[stream_id] = {}
+
+        keys = self.tables.setdefault(stream_id, {})
+        value, pos = _FrameReader(body, keys).value(pos)
+
+        if pos != len(body):
+            raise DecodeError('Unexpected data at the end of the frame')
+        return value
+
+
+class _FrameReader:
+    def __init__(self, body: bytes, keys: Dict[int, str]):
+        self.body = body
+        self.keys = keys
+
+    def value(self, pos: int) -> Tuple[object, int]:  # noqa: WPS212,WPS231
+        body = self.body
+        try:
+            tag = body[pos]
+        except IndexError:
+            raise DecodeError('Truncated value')
+        pos += 1
+
+        if tag == _str:
+            return self.read_str(pos)
+        elif tag == _map:
+            count, pos = _read_varint(body, pos)
+            mapping = {}
+            for _ in range(count):  # noqa: WPS122
+                key, pos = self.key(pos)
+                mapping[key], pos = self.value(pos)
+            return mapping, pos
+        elif tag == _int:
+            zigzag, pos = _read_varint(body, pos)
+            return (-((zigzag + 1) >> 1) if zigzag & 1 else zigzag >> 1), pos
+        elif tag == _null:
+            return None, pos
+        elif tag == _true:
+            return True, pos
+        elif tag == _false:
+            return False, pos
+        elif tag == _float:
+            if pos + _float_format.size > len(body):
+                raise DecodeError('Truncated float')
+            return _float_format.unpack_from(body, pos)[0], pos + _float_format.size
+        elif tag == _list:
+            count, pos = _read_varint(body, pos)
+            items = []
+            for _ in range(count):  # noqa: WPS122
+                item, pos = self.value(pos)
+                items.append(item)
+            return items, pos
+
+        raise DecodeError(f'Unknown tag: {tag:#04x}')
+
+    def read_str(self, pos: int) -> Tuple[str, int]:
+        length, pos = _read_varint(self.body, pos)
+        end = pos + length
+        if end > len(self.body):
+            raise DecodeError('Truncated string')
+        return self.body[pos:end].decode('utf-8', 'surrogatepass'), end
+
+    def key(self, pos: int) -> Tuple[str, int]:
+        try:
+            tag = self.body[pos]
+        except IndexError:
+            raise DecodeError('Truncated key')
+        pos += 1
+
+        if tag == _str:
+            return self.read_str(pos)
+
+        if tag not in {_new_key, _known_key}:
+            raise DecodeError(f'Unknown key tag: {tag:#04x}')
+
+        key_id, pos = _read_varint(self.body, pos)
+
+        if tag == _new_key:
+            key, pos = self.read_str(pos)
+            self.keys[key_id] = key
+            return key, pos
+
+        try:
+            return self.keys[key_id], pos
+        except KeyError:
+            raise UnknownKeyError(f'Unknown key: {key_id}')
@@ -0,0 +1,104 @@
+"""Level-aware bound logger."""
+
+import logging
+from typing import Callable, Dict, Optional, Tuple, Type
+
+import structlog
+
+from outcome.logkit import counters
+from outcome.logkit.levels import LevelTable, default_level, level_aliases, levels, method_level
+
+# The method names that have a fixed level, `msg` behaves like `info`
+_level_methods = [*level_aliases.keys(), 'msg']
+
+LogMethod = Callable[..., None]
+
+
+def _make_method(method_name: str) -> LogMethod:
+    def method(self: structlog.BoundLogger, event: Optional[str] = None, **event_kw: object) -> None:  # noqa: WPS430
+        return self._proxy_to_logger(method_name, event, **event_kw)  # noqa: WPS437
+
+    method.__name__ = method_name
+    return method
+
+
+def _make_filtered_method(method_name: str) -> LogMethod:
+    level_name = level_aliases.get(method_name, default_level)
+
+    def method(self: structlog.BoundLogger, event: Optional[str] = None, **event_kw: object) -> None:  # noqa: WPS430
+        # An explicit level on the event takes priority over the method name,
+        # so we leave the decision to the LogLevelProcessor
+        if 'levelno' in event_kw or 'level' in event_kw:
+            return self._proxy_to_logger(method_name, event, **event_kw)  # noqa: WPS437
+
+        counters.count_dropped(level_name)
+        return None
+
+    method.__name__ = method_name
+    return method
+
+
+class LevelBoundLogger(structlog.BoundLogger):
+    """A bound logger that drops below-level events before any processor runs.
+
+    Don't use this class directly, use `make_level_bound_logger` to get the class
+    for a given level. The methods for levels below that level are no-ops, so a
+    filtered call doesn't build an event dict.
+    """
+
+    min_level: int = logging.NOTSET
+    level_table: Optional[LevelTable] = None
+
+    # With per-logger rules, the class is configured for the lowest level of the table,
+    # this returns a logger for the level of the given name
+    def for_name(self, name: Optional[str]) -> 'LevelBoundLogger':
+        if self.level_table is None:
+            return self
+
+        cls = make_level_bound_logger(self.level_table.effective_level(name), self.level_table)
+        if cls is type(self):
+            return self
+
+        return cls(self._logger, self._processors, self._context)
+
+    def is_enabled_for(self, level: int) -> bool:
+        return level >= self.min_level
+
+    @property
+    def debug_enabled(self) -> bool:
+        return self.is_enabled_for(logging.DEBUG)
+
+    def log(self, event: Optional[str] = None, **event_kw: object) -> None:
+        levelno = event_kw.get('levelno')
+
+        # We only drop the event if we know for sure the LogLevelProcessor would
+        if levelno in levels and levelno < self.min_level:  # type: ignore
+            counters.count_dropped(levels[levelno])  # type: ignore
+            return None
+
+        return self._proxy_to_logger('log', event, **event_kw)
+
+
+_classes: Dict[Tuple[int, Optional[LevelTable]], Type[LevelBoundLogger]] = {}
+
+
+def make_level_bound_logger(level: int, level_table: Optional[LevelTable] = None) -> Type[LevelBoundLogger]:
+    level_table = level_table if level_table else None
+    key = (level, level_table)
+
+    try:
+        return _classes[key]
+    except KeyError:
+        pass
+
+    methods: Dict[str, object] = {'min_level': level, 'level_table': level_table}
+
+    for method_name in _level_methods:
+        if method_level(method_name) < level:
+            methods[method_name] = _make_filtered_method(method_name)
+        else:
+            methods[method_name] = _make_method(method_name)
+
+    cls = type(f'{LevelBoundLogger.__name__}_{level}', (LevelBoundLogger,), methods)
+
+    return _classes.setdefault(key, cls)
@@ -0,0 +1,77 @@
+"""Adds the location of the logging call to the events."""
+
+import logging
+import os
+import sys
+from types import CodeType
+from typing import Dict, Iterable, Optional, Tuple
+
+import structlog
+
+from outcome.logkit.profiling import unwrap
+from outcome.logkit.types import EventDict
+
+# Frames in these packages are part of the logging machinery, not the callsite
+_internal_prefixes = tuple(
+    os.path.dirname(os.path.abspath(module_file)) + os.sep for module_file in (structlog.__file__, logging.__file__, __file__)
+)
+
+# The location of each code object, or None if it's internal
+_code_locations: Dict[CodeType, Optional[Tuple[str, str]]] = {}
+_max_code_locations = 10000
+
+
+def code_location(code: CodeType) -> Optional[Tuple[str, str]]:
+    try:
+        return _code_locations[code]
+    except KeyError:
+        pass
+
+    if len(_code_locations) >= _max_code_locations:
+        _code_locations.clear()
+
+    location = None if code.co_filename.startswith(_internal_prefixes) else (code.co_filename, code.co_name)
+    _code_locations[code] = location
+    return location
+
+
+class CallsiteProcessor:
+    """Adds the `pathname`, `lineno` and `func_name` of the logging call.
+
+    The processor walks up the stack, at most `max_depth` frames, to the first frame that
+    isn't in logkit, structlog or the standard library's logging. Whether a frame is
+    internal is cached per code object, so the cost doesn't depend on the code base.
+    """
+
+    def __init__(self, max_depth: int = 32):
+        self.max_depth = max_depth
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+        if 'pathname' in event_dict:
+            return event_dict
+
+        frame = sys._getframe(1)  # noqa: WPS437
+
+        for _ in range(self.max_depth):
+            location = code_location(frame.f_code)
+
+            if location is not None:
+                event_dict['pathname'], event_dict['func_name'] = location
+                event_dict['lineno'] = frame.f_lineno
+                break
+
+            if frame.f_back is None:
+                break
+            frame = frame.f_back
+
+        return event_dict
+
+
+# The CallsiteProcessor of a chain, if it has one
+def find_callsite(processors: Iterable[object]) -> Optional[CallsiteProcessor]:
+    for processor in map(unwrap, processors):
+        # The fused pipeline holds its own
+        processor = getattr(processor, 'callsite', processor)
+        if isinstance(processor, CallsiteProcessor):
+            return processor
+    return None
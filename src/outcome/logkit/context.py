@@ -1,18 +1,84 @@
 """Interface to structlog."""
 
-from structlog.contextvars import bind_contextvars, clear_contextvars, unbind_contextvars
+from contextvars import ContextVar
+from typing import Callable, Dict, Mapping, NamedTuple
 
-# For these to work, structlog needs to be configured with the structlog.contextvars.merge_contextvars processor
+from structlog.contextvars import bind_contextvars, clear_contextvars, merge_contextvars, unbind_contextvars
+
+from outcome.logkit.types import EventDict, Processor
+
+# For these to work, structlog needs to be configured with the merge processor of the backend
 # This is handled for you when you use `init()`
 
 
+class Backend(NamedTuple):
+    add: Callable[..., None]
+    remove: Callable[..., None]
+    clear: Callable[[], None]
+    merge: Processor
+
+
+_empty: Mapping[str, object] = {}
+
+# The whole context, in a single variable. The mapping is never modified, each
+# change sets a new one, so a task can't see the changes made by another task
+_context: ContextVar[Mapping[str, object]] = ContextVar('outcome.logkit.context', default=_empty)
+
+
+def bind_context(**kwargs: object):
+    _context.set({**_context.get(), **kwargs})
+
+
+def unbind_context(*args: str):
+    context = _context.get()
+    if any(key in context for key in args):
+        _context.set({key: value for key, value in context.items() if key not in args})
+
+
+def clear_context():
+    _context.set(_empty)
+
+
+# Whatever is in the event takes precedence over the context
+def merge_context(logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+    context = _context.get()
+    if context:
+        return {**context, **event_dict}
+    return event_dict
+
+
+_structlog = 'structlog'
+_contextvar = 'contextvar'
+
+_backends: Dict[str, Backend] = {
+    # One contextvar per key, merging scans all the contextvars of the current context
+    _structlog: Backend(bind_contextvars, unbind_contextvars, clear_contextvars, merge_contextvars),
+    # A single contextvar, merging costs one lookup
+    _contextvar: Backend(bind_context, unbind_context, clear_context, merge_context),
+}
+
+_backend = _backends[_structlog]
+
+
+# Switch the backend, and return the processor that merges its context into the events
+def use_backend(name: str) -> Processor:
+    global _backend  # noqa: WPS420
+
+    backend = _backends.get(name)
+    if backend is None:
+        raise ValueError(f'Unknown context backend: {name}')
+
+    _backend = backend  # noqa: WPS442
+    return backend.merge
+
+
 def add(**kwargs: object):
-    bind_contextvars(**kwargs)
+    _backend.add(**kwargs)
 
 
 def remove(*args: str):
-    unbind_contextvars(*args)
+    _backend.remove(*args)
 
 
 def clear():
-    clear_contextvars()
+    _backend.clear()
@@ -0,0 +1,182 @@
+"""Runtime counters of the logging pipeline."""
+
+import os
+import threading
+import weakref
+from typing import Dict, List, Optional
+
+# Logger names beyond this number, per thread, are counted together
+max_loggers = 1000
+other_loggers = '<other>'
+
+
+class Shard:
+    """The counters of a single thread.
+
+    Only the owning thread writes to its shard, so the counters don't need a lock.
+    Readers copy the dicts, which is atomic, and add up the shards.
+    """
+
+    __slots__ = ('events', 'dropped', 'loggers', 'intercepted', 'rendered', 'bytes', 'encode_ns')
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.events: Dict[str, int] = {}
+        self.dropped: Dict[str, int] = {}
+        self.loggers: Dict[Optional[str], int] = {}
+        self.intercepted = 0
+        self.rendered = 0
+        self.bytes = 0
+        self.encode_ns = 0
+
+    # The dicts of another thread's shard can change while they're read, so they're copied
+    def add(self, other: 'Shard'):
+        _add(self.events, other.events.copy())
+        _add(self.dropped, other.dropped.copy())
+        _add(self.loggers, other.loggers.copy())
+        self.intercepted += other.intercepted
+        self.rendered += other.rendered
+        self.bytes += other.bytes
+        self.encode_ns += other.encode_ns
+
+
+# Released with the thread's locals when the thread finishes
+class _ThreadToken:
+    __slots__ = ('__weakref__',)
+
+
+_local = threading.local()
+_shards: List[Shard] = []
+_lock = threading.RLock()
+
+# The counts of the threads that have finished
+_retired = Shard()
+
+
+def shard() -> Shard:
+    try:
+        return _local.shard
+    except AttributeError:
+        pass
+
+    new_shard = Shard()
+    with _lock:
+        _shards.append(new_shard)
+    _local.shard = new_shard
+
+    # Once the thread finishes, its shard is folded into the retired counts, so the
+    # shards don't pile up when threads come and go
+    token = _ThreadToken()
+    _local.token = token
+    weakref.finalize(token, _retire, new_shard).atexit = False
+
+    return new_shard
+
+
+def _retire(counters: Shard):
+    with _lock:
+        # A forked child drops the shards of the parent's other threads
+        if counters in _shards:
+            _retired.add(counters)
+            _shards.remove(counters)
+
+
+# An event made it past the level filter
+def count_event(level: str, logger: Optional[str]):
+    counters = shard()
+    counters.events[level] = counters.events.get(level, 0) + 1
+
+    loggers = counters.loggers
+    if logger not in loggers and len(loggers) >= max_loggers:
+        logger = other_loggers
+    loggers[logger] = loggers.get(logger, 0) + 1
+
+
+# An event was dropped by the level filter
+def count_dropped(level: str):
+    counters = shard()
+    counters.dropped[level] = counters.dropped.get(level, 0) + 1
+
+
+# A standard library record reached the intercept handler
+def count_intercepted():
+    shard().intercepted += 1
+
+
+def count_rendered(size: int, encode_ns: int):
+    counters = shard()
+    counters.rendered += 1
+    counters.bytes += size
+    counters.encode_ns += encode_ns
+
+
+def _add(total: Dict, counts: Dict):
+    for key, count in counts.items():
+        total[key] = total.get(key, 0) + count
+
+
+def stats() -> Dict[str, object]:
+    """Returns the counters of the pipeline, since the start of the process.
+
+    - `events`: the events that made it past the level filter, per level
+    - `dropped`: the events dropped by the level filter, per level
+    - `loggers`: the events that made it past the level filter, per logger
+    - `intercepted`: the standard library records handled by the intercept
+    - `rendered`, `bytes` and `encode_ms`: the events rendered to JSON, their size, and the time spent encoding them
+    """
+    total = Shard()
+
+    with _lock:
+        shards = list(_shards)
+        total.add(_retired)
+
+    for counters in shards:
+        total.add(counters)
+
+    return {
+        'events': total.events,
+        'dropped': total.dropped,
+        'loggers': total.loggers,
+        'intercepted': total.intercepted,
+        'rendered': total.rendered,
+        'bytes': total.bytes,
+        'encode_ms': total.encode_ns / 1e6,
+    }
+
+
+# Reset the counters of all the threads. Events counted while it runs may be lost
+def reset():
+    with _lock:
+        _retired.clear()
+        for counters in _shards:
+            counters.clear()
+
+
+# The lock is held during the fork, so a child doesn't inherit it halfway through an
+# update. It's reentrant: in the child, the shards of the parent's other threads are
+# retired by the thread that forked, before the child's hook runs
+def _before_fork():
+    _lock.acquire()
+
+
+def _after_fork_in_parent():
+    _lock.release()
+
+
+# A forked child starts from zero, only the forking thread is left to count
+def _after_fork_in_child():
+    global _lock  # noqa: WPS420
+
+    _lock = threading.RLock()  # noqa: WPS442
+    _retired.clear()
+
+    counters: Optional[Shard] = getattr(_local, 'shard', None)
+    _shards[:] = [counters] if counters is not None else []  # noqa: WPS362
+    if counters is not None:
+        counters.clear()
+
+
+if hasattr(os, 'register_at_fork'):  # pragma: no branch
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child)
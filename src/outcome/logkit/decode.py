@@ -0,0 +1,79 @@
+"""Convert binary framed logs to Stackdriver JSON, one entry per line.
+
+Usage:
+    python -m outcome.logkit.decode [--encoder auto] [file ...]
+
+The files are decoded in order, so the rotated files of a log should be given oldest first.
+Without files, or with `-`, the frames are read from stdin.
+"""
+
+import argparse
+import sys
+from contextlib import nullcontext
+from typing import BinaryIO, ContextManager, List, Optional, Tuple
+
+from outcome.logkit.binary import DecodeError, Decoder, UnknownKeyError, read_frames
+from outcome.logkit.encoders import Encoder, get_encoder
+
+
+def open_input(path: str) -> ContextManager[BinaryIO]:
+    if path == '-':
+        return nullcontext(sys.stdin.buffer)
+    return open(path, 'rb')
+
+
+def report(message: str):
+    print(message, file=sys.stderr)  # noqa: WPS421
+
+
+# Returns the number of frames that couldn't be decoded, and the number of bytes that weren't frames
+def decode_stream(stream: BinaryIO, output: BinaryIO, decoder: Decoder, encoder: Encoder) -> Tuple[int, int]:
+    skipped = 0
+    garbage: List[int] = []
+
+    for body in read_frames(stream, on_skip=garbage.append):
+        try:
+            entry = decoder.decode(body)
+        except UnknownKeyError:
+            skipped += 1
+            continue
+
+        output.write(encoder.dumpb(entry) + b'\n')
+
+    return skipped, sum(garbage)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='python -m outcome.logkit.decode', description=__doc__.splitlines()[0])
+    parser.add_argument('files', nargs='*', default=['-'], help='The files to decode, defaults to stdin')
+    parser.add_argument('--encoder', default='auto', choices=['auto', 'orjson', 'json'], help='The JSON encoder')
+    args = parser.parse_args(argv)
+
+    encoder = get_encoder(args.encoder)
+    output = sys.stdout.buffer
+
+    # The streams of a log continue across its rotated files
+    decoder = Decoder()
+    status = 0
+
+    for path in args.files:
+        try:
+            with open_input(path) as stream:
+                skipped, garbage = decode_stream(stream, output, decoder, encoder)
+        except (OSError, DecodeError) as error:
+            report(f'{path}: {error}')
+            status = 1
+            continue
+
+        if skipped:
+            report(f'{path}: skipped {skipped} frames that use keys defined before the start of the input')
+
+        if garbage:
+            report(f'{path}: skipped {garbage} bytes that are not frames')
+
+    output.flush()
+    return status
+
+
+if __name__ == '__main__':  # pragma: no cover
+    sys.exit(main())
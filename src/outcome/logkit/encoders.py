@@ -0,0 +1,110 @@
+"""JSON encoders for the renderers."""
+
+import json
+import warnings
+from functools import partial
+from typing import Any, Callable, Protocol, Union
+
+try:
+    import orjson  # type: ignore
+except ImportError:  # pragma: no cover
+    orjson = None
+
+_auto = 'auto'
+_json = 'json'
+_orjson = 'orjson'
+
+
+class Encoder(Protocol):  # pragma: no cover
+    def dumps(self, obj: object) -> str:
+        ...
+
+    def dumpb(self, obj: object) -> bytes:
+        ...
+
+
+# Serialize custom datatypes, like structlog's JSONRenderer
+def fallback(obj: object) -> object:
+    to_structlog = getattr(obj, '__structlog__', None)
+    if to_structlog is not None:
+        return to_structlog()
+    return repr(obj)
+
+
+class JSONEncoder:
+    """Encodes with the standard library.
+
+    The output is identical to structlog's `JSONRenderer`, given the same `json.dumps`
+    arguments. `json.dumps` builds a new encoder for each call when it's given a
+    `default`, so we build ours once.
+    """
+
+    name = _json
+
+    def __init__(self, default: Callable[[object], object] = fallback, **dumps_kw: Any):
+        encoder_class = dumps_kw.pop('cls', None) or json.JSONEncoder
+        self._encode = encoder_class(default=default, **dumps_kw).encode
+
+    def dumps(self, obj: object) -> str:
+        return self._encode(obj)
+
+    def dumpb(self, obj: object) -> bytes:
+        return self._encode(obj).encode('utf-8')
+
+
+class SerializerEncoder:
+    """Encodes with a `json.dumps`-like serializer, like structlog's `JSONRenderer` does."""
+
+    def __init__(self, serializer: Callable[..., Union[str, bytes]], **dumps_kw: Any):
+        dumps_kw.setdefault('default', fallback)
+        self._serialize = partial(serializer, **dumps_kw)
+
+    def dumps(self, obj: object) -> str:
+        serialized = self._serialize(obj)
+        return serialized.decode('utf-8') if isinstance(serialized, bytes) else serialized
+
+    def dumpb(self, obj: object) -> bytes:
+        serialized = self._serialize(obj)
+        return serialized.encode('utf-8') if isinstance(serialized, str) else serialized
+
+
+class OrjsonEncoder:
+    """Encodes with orjson, only when it's asked for.
+
+    The output isn't byte-identical to the standard library's: it's in a compact form,
+    non-ASCII characters aren't escaped, and NaN and infinities become null. Datetimes and
+    dataclasses are passed to the fallback, so they are rendered like they are by the
+    standard library. Objects that orjson can't handle, like integers over 64 bits, are
+    encoded with the standard library.
+    """
+
+    name = _orjson
+
+    def __init__(self, default: Callable[[object], object] = fallback):
+        self._default = default
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+        self._fallback = JSONEncoder(default)
+
+    def dumps(self, obj: object) -> str:
+        return self.dumpb(obj).decode('utf-8')
+
+    def dumpb(self, obj: object) -> bytes:
+        try:
+            return orjson.dumps(obj, default=self._default, option=self._options)
+        except orjson.JSONEncodeError:
+            return self._fallback.dumpb(obj)
+
+
+# The default output is the standard library's, byte for byte, orjson has to be opted into
+def get_encoder(name: str = _auto) -> Encoder:
+    if name in {_auto, _json}:
+        return JSONEncoder()
+
+    if name != _orjson:
+        raise ValueError(f'Unknown encoder: {name}')
+
+    if orjson is None:
+        warnings.warn('orjson is not installed, using the standard library encoder', RuntimeWarning)
+        return JSONEncoder()
+
+    return OrjsonEncoder()
@@ -0,0 +1,118 @@
+"""Exception fingerprints, and suppression of repeated tracebacks."""
+
+import hashlib
+import sys
+import time
+from types import CodeType, TracebackType
+from typing import Callable, Dict, List, Optional, Set, Tuple, Type
+
+from outcome.logkit.types import EventDict
+
+ExcInfo = Tuple[Type[BaseException], BaseException, Optional[TracebackType]]
+
+# The location of the code objects, shared by all the processors
+_code_locations: Dict[CodeType, bytes] = {}
+_max_code_locations = 10000
+
+
+def code_location(code: CodeType) -> bytes:
+    location = _code_locations.get(code)
+    if location is None:
+        if len(_code_locations) >= _max_code_locations:
+            _code_locations.clear()
+        location = f'{code.co_filename}:{code.co_name}:'.encode('utf-8')
+        _code_locations[code] = location
+    return location
+
+
+# Like structlog, we accept an exception, an exc_info tuple, or a flag to use the current exception
+def get_exc_info(value: object) -> Optional[ExcInfo]:
+    if isinstance(value, BaseException):
+        return (type(value), value, value.__traceback__)
+    if isinstance(value, tuple):
+        return value if value and value[0] is not None else None  # type: ignore
+    if value:
+        exc_info = sys.exc_info()
+        return exc_info if exc_info[0] is not None else None  # type: ignore
+    return None
+
+
+# The exceptions the traceback shows before this one, like the `traceback` module finds them
+def _chained(exc: BaseException) -> Optional[BaseException]:
+    if exc.__cause__ is not None:
+        return exc.__cause__
+    if exc.__suppress_context__:
+        return None
+    return exc.__context__
+
+
+# Identifies an exception by its type, and the code locations of its traceback, and those
+# of the exceptions chained to it
+def fingerprint(exc_info: ExcInfo) -> str:
+    exc_type, exc, tb = exc_info
+
+    digest = hashlib.blake2b(digest_size=8)
+    seen: Set[int] = set()
+
+    while True:
+        digest.update(f'{exc_type.__module__}.{exc_type.__qualname__}'.encode('utf-8'))
+
+        while tb is not None:
+            digest.update(code_location(tb.tb_frame.f_code))
+            digest.update(tb.tb_lineno.to_bytes(4, 'little'))
+            tb = tb.tb_next
+
+        # A chain can loop back on itself
+        seen.add(id(exc))
+        chained = _chained(exc)
+        if chained is None or id(chained) in seen:
+            return digest.hexdigest()
+
+        digest.update(b'\0')
+        exc_type, exc, tb = type(chained), chained, chained.__traceback__
+
+
+class ExceptionDeduplicator:
+    """Suppresses repeated tracebacks.
+
+    Events with an exception get an `exception_fingerprint`. The traceback of a given
+    fingerprint is kept once per `window` seconds, the following occurrences in the
+    window only carry the fingerprint and their `exception_repeat_count`. The first
+    occurrence of the next window reports how many were suppressed in the previous one,
+    as `exception_suppressed_count`.
+
+    The processor needs to run before `format_exc_info`.
+    """
+
+    def __init__(self, window: float = 60, max_fingerprints: int = 10000, clock: Callable[[], float] = time.monotonic):
+        self.window = window
+        self.max_fingerprints = max_fingerprints
+
+        self._clock = clock
+        # The start of the window, and the number of occurrences in it
+        self._seen: Dict[str, List[float]] = {}
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+        exc_info = get_exc_info(event_dict.get('exc_info'))
+        if exc_info is None:
+            return event_dict
+
+        key = fingerprint(exc_info)
+        event_dict['exception_fingerprint'] = key
+
+        now = self._clock()
+        seen = self._seen.get(key)
+
+        if seen is None or now - seen[0] >= self.window:
+            if seen is None and len(self._seen) >= self.max_fingerprints:
+                self._seen = {}
+            elif seen is not None and seen[1] > 1:
+                event_dict['exception_suppressed_count'] = int(seen[1]) - 1
+
+            self._seen[key] = [now, 1]
+            return event_dict
+
+        seen[1] += 1
+        event_dict['exception_repeat_count'] = int(seen[1])
+        event_dict.pop('exc_info')
+        return event_dict
@@ -3,3 +3,11 @@
 from outcome.utils import feature_set
 
 feature_set.register_feature('co.outcome.logkit.use_stackdriver', 'auto', feature_set.FeatureType.string)
+feature_set.register_feature('co.outcome.logkit.json_encoder', 'auto', feature_set.FeatureType.string)
+feature_set.register_feature('co.outcome.logkit.intercept_bridge', True, feature_set.FeatureType.boolean)
+feature_set.register_feature('co.outcome.logkit.sampling', False, feature_set.FeatureType.boolean)
+feature_set.register_feature('co.outcome.logkit.context_backend', 'structlog', feature_set.FeatureType.string)
+feature_set.register_feature('co.outcome.logkit.callsite', 'auto', feature_set.FeatureType.string)
+feature_set.register_feature('co.outcome.logkit.fork_aggregation', False, feature_set.FeatureType.boolean)
+feature_set.register_feature('co.outcome.logkit.fused_pipeline', True, feature_set.FeatureType.boolean)
+feature_set.register_feature('co.outcome.logkit.output_format', 'json', feature_set.FeatureType.string)
@@ -18,7 +18,9 @@ import pytest
 import structlog
 from structlog.testing import LogCapture
 
+from outcome.logkit.bound import make_level_bound_logger
 from outcome.logkit.init import get_final_processors
+from outcome.logkit.logger import reset_loggers
 
 
 @pytest.fixture
@@ -39,4 +41,5 @@ def log_processors(log_output: LogCapture):  # pragma: no cover
 @pytest.fixture
 def configure_structlog(log_level: int, log_processors: Sequence[LogCapture]):  # pragma: no cover
     processors = get_final_processors(log_level, log_processors)  # type: ignore
-    structlog.configure(processors=processors)
+    structlog.configure(processors=processors, wrapper_class=make_level_bound_logger(log_level))
+    reset_loggers()
@@ -0,0 +1,66 @@
+"""Resets logkit's I/O state when the process forks.
+
+Without it, a child process can inherit a lock held by another thread of the parent,
+and deadlock on its first event, or inherit buffered output that is then written twice.
+"""
+
+import os
+import sys
+import threading
+import weakref
+from typing import List
+
+from structlog import _loggers  # noqa: WPS450
+
+# Objects that hold I/O state, with `_before_fork`, `_after_fork_in_parent`
+# and `_after_fork_in_child` methods
+_objects: 'weakref.WeakSet[object]' = weakref.WeakSet()
+
+# The structlog write locks we hold during the fork
+_held_locks: List[threading.Lock] = []
+
+
+def register(obj: object):
+    _objects.add(obj)
+
+
+def _call(method_name: str):
+    for obj in list(_objects):
+        method = getattr(obj, method_name, None)
+        if method is not None:
+            method()
+
+
+def _before_fork():
+    # Anything left in the buffers would be written by both processes
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (AttributeError, ValueError, OSError):
+            pass
+
+    _call('_before_fork')
+
+    # Make sure no other thread is halfway through writing with structlog's print loggers
+    for lock in list(_loggers.WRITE_LOCKS.values()):
+        lock.acquire()
+        _held_locks.append(lock)
+
+
+def _release_locks():
+    while _held_locks:
+        _held_locks.pop().release()
+
+
+def _after_fork_in_parent():
+    _release_locks()
+    _call('_after_fork_in_parent')
+
+
+def _after_fork_in_child():
+    _release_locks()
+    _call('_after_fork_in_child')
+
+
+if hasattr(os, 'register_at_fork'):  # pragma: no branch
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent, after_in_child=_after_fork_in_child)
@@ -0,0 +1,110 @@
+"""A fused implementation of the default Stackdriver processor chain."""
+
+import time
+from datetime import datetime
+from typing import Dict, Optional, Tuple, Union
+
+import structlog
+from structlog._frames import _find_first_app_frame_and_name, _format_stack  # noqa: WPS450
+
+from outcome.logkit import counters
+from outcome.logkit.callsite import CallsiteProcessor
+from outcome.logkit.exceptions import ExceptionDeduplicator
+from outcome.logkit.lazy import Lazy
+from outcome.logkit.levels import LevelTable, LogLevelProcessor, default_level, level_aliases, level_numbers, levels
+from outcome.logkit.stackdriver import StackdriverRenderer
+from outcome.logkit.types import EventDict, Processor
+
+# The canonical name and number of each level alias
+_normalized_levels: Dict[str, Tuple[str, int]] = {alias: (name, level_numbers[name]) for alias, name in level_aliases.items()}
+_default_level = _normalized_levels[default_level]
+
+
+class FusedLevelProcessor(LogLevelProcessor):
+    """The context merge, `logger_name_processor` and the `LogLevelProcessor`, in a single call.
+
+    The level is normalized with a precomputed table, and in place, instead of in a copy
+    of the event dict.
+    """
+
+    def __init__(self, merge_context: Processor, level: int, level_table: Optional[LevelTable] = None):
+        super().__init__(level, level_table)
+        self.merge_context = merge_context
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+        event_dict = self.merge_context(logger, method_name, event_dict)  # type: ignore
+
+        logger_name = event_dict.pop('name', method_name)
+        if logger_name is None:
+            logger_name = event_dict.get('logger')
+        event_dict['logger'] = logger_name
+
+        event_level_number = event_dict.pop('levelno', None)
+        event_level_name = event_dict.pop('level', None)
+
+        # The same strategies as `normalize_level`
+        if not (event_level_number or event_level_name):  # noqa: WPS504
+            level = method_name
+        elif event_level_number in levels:
+            level = levels[event_level_number]
+        else:
+            assert isinstance(event_level_name, str)
+            level = event_level_name.lower()
+
+        level_name, levelno = _normalized_levels.get(level, _default_level)
+        event_dict['level'] = level_name
+
+        threshold = self.level if self.level_table is None else self.level_table.effective_level(logger_name)
+        if levelno < threshold:
+            counters.count_dropped(level_name)
+            raise structlog.DropEvent
+
+        counters.count_event(level_name, logger_name)
+        return event_dict
+
+
+class FusedStackdriverPipeline:
+    """The processors of the default Stackdriver chain that follow the level filter, in a single call.
+
+    It resolves the lazy values, adds the callsite, the stack and the exception, stamps the
+    event, and renders it, with the same output as the separate processors. The steps that
+    don't apply to an event, like formatting an exception, are skipped with a key lookup.
+    """
+
+    def __init__(
+        self,
+        renderer: StackdriverRenderer,
+        callsite: Optional[CallsiteProcessor] = None,
+        pretty_printer: Optional[Processor] = None,
+    ):
+        self.renderer = renderer
+        self.callsite = callsite
+        self.pretty_printer = pretty_printer
+        self.deduplicator = ExceptionDeduplicator()
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> Union[str, bytes]:  # noqa: WPS231
+        for key, value in event_dict.items():
+            if isinstance(value, Lazy):
+                event_dict[key] = value.resolve()
+
+        if self.callsite is not None:
+            self.callsite(logger, method_name, event_dict)
+
+        # The stack starts at the first frame outside of structlog and this module, like
+        # it does when the StackInfoRenderer is called by structlog
+        if event_dict.pop('stack_info', None):
+            event_dict['stack'] = _format_stack(_find_first_app_frame_and_name([__name__])[0])
+
+        if method_name == 'exception' and 'exc_info' not in event_dict:
+            event_dict['exc_info'] = True
+
+        if 'exc_info' in event_dict:
+            event_dict = self.deduplicator(logger, method_name, event_dict)
+            event_dict = structlog.processors.format_exc_info(logger, method_name, event_dict)
+
+        if self.pretty_printer is not None and 'exception' in event_dict:
+            event_dict = self.pretty_printer(logger, method_name, event_dict)  # type: ignore
+
+        # The timestamp is formatted once, where the TimeStamper and the renderer format it twice
+        timestamp = f'{datetime.fromtimestamp(time.time()).isoformat("T")}Z'
+        return self.renderer.render(logger, self.renderer.format_for_stackdriver(event_dict, timestamp))
@@ -2,16 +2,42 @@
 
 import logging
 import os
-from typing import List, Optional, Sequence, cast
+import sys
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Sequence, Union, cast
 
 import structlog
-from outcome.utils import env, feature_set
-
-from outcome.logkit import intercept
-from outcome.logkit.stackdriver import StackdriverRenderer
+from outcome.utils import env
+
+from outcome.logkit import context, intercept
+from outcome.logkit.bound import make_level_bound_logger
+from outcome.logkit.callsite import CallsiteProcessor
+from outcome.logkit.exceptions import ExceptionDeduplicator
+from outcome.logkit.features import feature_set
+from outcome.logkit.lazy import resolve_lazy_values
+from outcome.logkit.levels import (  # noqa: F401
+    LevelRules,
+    LevelTable,
+    LogLevelProcessor,
+    default_level,
+    level_aliases,
+    level_numbers,
+    levels,
+    parse_level_rules,
+)
+from outcome.logkit.limits import SizeCapProcessor
+from outcome.logkit.logger import reset_loggers
+from outcome.logkit.sampling import SamplingProcessor
 from outcome.logkit.types import EventDict, Processor
 
+# The sinks and the renderers are only imported when they are used
+if TYPE_CHECKING:  # pragma: no cover
+    from outcome.logkit.sinks import AggregatingSink, BackgroundSink, Sink
+    from outcome.logkit.stackdriver import StackdriverRenderer
+
 _os_key = 'LOGKIT_LOG_LEVEL'
+_os_rules_key = 'LOGKIT_LOG_LEVELS'
+_os_file_key = 'LOGKIT_LOG_FILE'
+_os_profile_key = 'LOGKIT_PROFILE'
 
 
 def get_level() -> int:
@@ -25,150 +51,317 @@ def get_level() -> int:
     return logging.DEBUG
 
 
-_critical = 'critical'
-_fatal = 'fatal'
-_error = 'error'
-_warning = 'warning'
-_warn = 'warn'
-_info = 'info'
-_debug = 'debug'
-
-# These are taken from the standard library
-levels = {
-    logging.FATAL: _fatal,
-    logging.ERROR: _error,
-    logging.WARNING: _warning,
-    logging.INFO: _info,
-    logging.DEBUG: _debug,
-}
-
-level_numbers = {name: number for number, name in levels.items()}
-
-default_level = _info
-
-# These map variations to canonical labels
-level_aliases = {
-    default_level: default_level,
-    _debug: _debug,
-    _warn: _warning,
-    _warning: _warning,
-    _error: _error,
-    'err': _error,
-    _fatal: _fatal,
-    _critical: _fatal,
-    'failure': _error,
-    'exception': _fatal,
-}
-
-
-class LogLevelProcessor:
-    """This processor class ensures that each log message has a standardized log level.
-
-    It is reponsible for determining the level, and filtering out messages that don't
-    meet the level.
-    """
-
-    def __init__(self, level: int):
-        self.level = level
-
-    # At the end, we want an event dict that has a valid label, and no level number.
-    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
-        event_dict = self.normalize_level(method_name, event_dict)
-        return self.filter_on_level(event_dict)
-
-    def filter_on_level(self, event_dict: EventDict) -> EventDict:
-        levelno = event_dict.pop('levelno')
-        assert isinstance(levelno, int)
-        if levelno < self.level:
-            raise structlog.DropEvent
-        return event_dict
-
-    # Try various strategies to determine the message level
-    def normalize_level(self, method_name: str, event_dict: EventDict) -> EventDict:
-        event_level_number = event_dict.pop('levelno', None)
-        event_level_name = event_dict.pop('level', None)
-
-        # If we don't have anything, we tentatively use the method_name as a level
-        if not (event_level_number or event_level_name):  # noqa: WPS504
-            level = method_name
-
-        # level_number has priority over the provided level name
-        elif event_level_number in levels:
-            # if levels is a dict with int keys, and event_level_number is a valid key, then it's an int...
-            level = levels.get(cast(int, event_level_number))
-
-        # Try using the provided level name
+# Per-logger levels, e.g. `LOGKIT_LOG_LEVELS=urllib3=WARNING,app.db=DEBUG,google.*=ERROR`
+def get_level_rules() -> Dict[str, int]:
+    return parse_level_rules(os.environ.get(_os_rules_key, ''))
+
+
+OwnSink = Union['BackgroundSink', 'AggregatingSink']
+
+# The sinks that logkit created for the current configuration. The next configuration
+# reuses those it needs, and the others are closed, so their files and threads don't leak
+_own_sinks: List[OwnSink] = []
+
+
+# The logger factory logkit installed, as opposed to one the application configured
+_installed_factory: Optional[object] = None
+
+
+def find_own_sink(match: Callable[[OwnSink], bool]) -> Optional[OwnSink]:
+    return next((sink for sink in _own_sinks if match(sink)), None)
+
+
+# Write to rotating files, e.g. `LOGKIT_LOG_FILE=/var/log/app/app.log`
+def get_sink() -> Optional['Sink']:
+    path = os.environ.get(_os_file_key)
+
+    if path:
+        from outcome.logkit.sinks import FileSink  # noqa: WPS433
+
+        # Two sinks can't share a file, the truncation on close would cut the other's data
+        path = os.path.abspath(path)
+        return find_own_sink(lambda sink: isinstance(sink, FileSink) and sink.base_path == path) or FileSink(path)
+    return None
+
+
+def get_stdout_sink() -> 'BackgroundSink':
+    from outcome.logkit.sinks import BackgroundSink  # noqa: WPS433
+
+    stdout = sys.stdout.buffer
+    return find_own_sink(lambda sink: type(sink) is BackgroundSink and sink.stream is stdout) or BackgroundSink()
+
+
+def get_aggregating_sink(sink: 'Sink') -> 'AggregatingSink':
+    from outcome.logkit.sinks import AggregatingSink  # noqa: WPS433
+
+    return find_own_sink(lambda own: isinstance(own, AggregatingSink) and own.sink is sink) or AggregatingSink(sink)
+
+
+# The sinks of the configuration that wasn't installed are closed. An aggregating sink is
+# only detached, as the sink it wraps can still be in use
+def replace_own_sinks(own_sinks: List[OwnSink], installed: bool):
+    global _own_sinks  # noqa: WPS420
+
+    from outcome.logkit.sinks import AggregatingSink  # noqa: WPS433
+
+    if installed:
+        kept, discarded = own_sinks, _own_sinks
+        _own_sinks = own_sinks  # noqa: WPS442
+    else:
+        kept, discarded = _own_sinks, own_sinks
+
+    # The aggregating sinks come after the sinks they wrap
+    for sink in reversed(discarded):
+        if any(sink is own for own in kept):
+            continue
+        if isinstance(sink, AggregatingSink):
+            sink.detach(sink.flush_timeout)
         else:
-            assert isinstance(event_level_name, str)
-            level = event_level_name.lower()
+            sink.close(sink.flush_timeout)
+
+
+# Time the processors, e.g. `LOGKIT_PROFILE=1`
+def get_profile() -> bool:
+    return os.environ.get(_os_profile_key, '').strip().lower() in {'1', 'true', 'yes', 'on'}
+
+
+def use_stackdriver() -> bool:
+    use_stackdriver = feature_set.value('co.outcome.logkit.use_stackdriver')
+    return (use_stackdriver == 'auto' and env.is_google_cloud()) or use_stackdriver == 'yes'
+
+
+# The Stackdriver entries can be written as binary frames instead of JSON
+def use_binary_output() -> bool:
+    return use_stackdriver() and feature_set.value('co.outcome.logkit.output_format') == 'binary'
+
+
+def get_stackdriver_renderer() -> 'StackdriverRenderer':
+    if use_binary_output():
+        from outcome.logkit.binary import BinaryRenderer  # noqa: WPS433
+
+        return BinaryRenderer()
 
-        # Find its canonical name, or revert to default
-        normalized_level_name = level_aliases.get(str(level), default_level)
-        normalized_level_number = level_numbers.get(normalized_level_name)
+    from outcome.logkit.encoders import get_encoder  # noqa: WPS433
+    from outcome.logkit.stackdriver import StackdriverRenderer  # noqa: WPS433
 
-        return {**event_dict, 'level': normalized_level_name, 'levelno': normalized_level_number}
+    return StackdriverRenderer(encoder=get_encoder(str(feature_set.value('co.outcome.logkit.json_encoder'))))
 
 
-# Normalize the name/logger attribute
+# The traceback is already in the event, it only needs to be printed again in development.
+# The binary frames are written to stdout, so the traceback goes to stderr instead
+def get_pretty_printer() -> Optional[Processor]:
+    if env.is_prod():
+        return None
+
+    output = sys.stderr if use_binary_output() else None
+    return cast(Processor, structlog.processors.ExceptionPrettyPrinter(file=output))
+
+
+# Normalize the name/logger attribute. The intercepted records are dispatched through
+# the root logger, which has no name, and carry the name of their own logger
 def logger_name_processor(logger: object, name: str, event_dict: EventDict) -> EventDict:
     name = event_dict.pop('name', name)
-    event_dict['logger'] = name
+    if name is not None or 'logger' not in event_dict:
+        event_dict['logger'] = name
     return event_dict
 
 
 # Initialize the logging system
-def init(level: Optional[int] = None, processors: Optional[List[Processor]] = None):  # pragma: no cover
+def init(  # pragma: no cover
+    level: Optional[int] = None,
+    processors: Optional[List[Processor]] = None,
+    sink: Optional['Sink'] = None,
+    level_rules: Optional[Union[str, LevelRules]] = None,
+    buffer_capacity: int = intercept.default_buffer_capacity,
+    profile: Optional[bool] = None,
+):
     if not level:
         level = get_level()
 
-    with intercept.intercepted_logging(level):
-        configure_structured_logging(level, processors)
+    if profile is None:
+        profile = get_profile()
+
+    if level_rules is None:
+        level_rules = get_level_rules()
+    elif isinstance(level_rules, str):
+        level_rules = parse_level_rules(level_rules)
+
+    level_table = LevelTable(level, level_rules)
+
+    with intercept.intercepted_logging(level, level_table, buffer_capacity):
+        configure_structured_logging(level, processors, sink, level_table, profile)
+
+
+def configure_structured_logging(
+    level: int,
+    processors: Optional[List[Processor]] = None,
+    sink: Optional['Sink'] = None,
+    level_table: Optional[LevelTable] = None,
+    profile: bool = False,
+):
+    global _installed_factory  # noqa: WPS420
 
+    own_sinks: List[OwnSink] = []
 
-def configure_structured_logging(level: int, processors: Optional[List[Processor]] = None):
+    if sink is None:
+        sink = get_sink()
+        if sink is not None:
+            own_sinks.append(cast(OwnSink, sink))
 
-    final_processors = get_final_processors(level, processors)
+    # The binary frames can't be printed, they are written to stdout as bytes
+    if sink is None and use_binary_output():
+        sink = get_stdout_sink()
+        own_sinks.append(sink)
 
-    # We can leave everything else as default
-    # Output will use StructLog's PrintLogger that just prints to stdout
+    # Forked workers send their events to this process, which writes them all
+    if feature_set.is_active('co.outcome.logkit.fork_aggregation'):
+        from outcome.logkit.sinks import AggregatingSink  # noqa: WPS433
+
+        if not isinstance(sink, AggregatingSink):
+            if sink is None:
+                sink = get_stdout_sink()
+                own_sinks.append(sink)
+
+            sink = get_aggregating_sink(sink)
+            own_sinks.append(sink)
+
+    # Colours are for the terminal, not for the files and streams of the sinks
+    final_processors = get_final_processors(level, processors, level_table, profile, colors=sink is None)
+
+    # The wrapper class drops below-level events before they reach the processors. With
+    # per-logger rules, `get_logger` narrows it down to the level of each logger
+    wrapper_level = level_table.min_level if level_table else level
+    wrapper_class = make_level_bound_logger(wrapper_level, level_table)
+
+    # A sink is its own logger factory. Without one, a factory the application configured
+    # is kept, and the one logkit installed before is replaced by StructLog's PrintLogger
+    # that just prints to stdout
     # https://www.structlog.org/en/stable/api.html#structlog.PrintLogger
+    previous_factory = structlog.get_config()['logger_factory']
+    if sink is not None:
+        logger_factory = sink
+    elif previous_factory is _installed_factory:
+        logger_factory = structlog.PrintLoggerFactory()
+    else:
+        logger_factory = previous_factory
 
     if env.is_prod():
-        structlog.configure_once(processors=final_processors)
+        # In prod the configuration is final, so loggers can be assembled once
+        structlog.configure_once(
+            processors=final_processors,
+            wrapper_class=wrapper_class,
+            logger_factory=logger_factory,
+            cache_logger_on_first_use=True,
+        )
     else:
-        structlog.configure(processors=final_processors)
+        structlog.configure(processors=final_processors, wrapper_class=wrapper_class, logger_factory=logger_factory)
+
+    # In prod, a repeated configuration isn't installed
+    installed = structlog.get_config()['logger_factory'] is logger_factory
+    replace_own_sinks(own_sinks, installed)
+
+    if installed and logger_factory is not previous_factory:
+        _installed_factory = logger_factory  # noqa: WPS442
 
+    # Loggers assembled with the previous configuration are stale
+    reset_loggers()
 
-def get_final_processors(level: int, processors: Optional[Sequence[Processor]] = None) -> List[Processor]:
+
+def get_final_processors(
+    level: int,
+    processors: Optional[Sequence[Processor]] = None,
+    level_table: Optional[LevelTable] = None,
+    profile: bool = False,
+    colors: bool = True,
+) -> List[Processor]:
 
     if not processors:
         processors = []
 
+    # Rate limit repetitive events, before any other work is done on them
+    sampling: List[Processor] = []
+    if feature_set.is_active('co.outcome.logkit.sampling'):
+        sampling.append(cast(Processor, SamplingProcessor()))
+
+    stackdriver = use_stackdriver()
+
+    # Stackdriver shows the callsite of each entry
+    callsite: List[Processor] = []
+    use_callsite = feature_set.value('co.outcome.logkit.callsite')
+    if (use_callsite == 'auto' and stackdriver) or use_callsite == 'yes':
+        callsite.append(cast(Processor, CallsiteProcessor()))
+
+    merge_context = context.use_backend(str(feature_set.value('co.outcome.logkit.context_backend')))
+
+    # Without custom processors, the default Stackdriver chain has a fused implementation.
+    # When profiled, the fused stages are timed as they are
+    if stackdriver and not (processors or sampling) and feature_set.is_active('co.outcome.logkit.fused_pipeline'):
+        fused_processors = get_fused_processors(
+            level, level_table, merge_context, cast(Optional[CallsiteProcessor], next(iter(callsite), None))
+        )
+        return profile_if(fused_processors, profile)
+
     # Some sensible defaults
     final_processors: List[Processor] = [
-        structlog.contextvars.merge_contextvars,
+        merge_context,
         logger_name_processor,
-        cast(Processor, LogLevelProcessor(level)),
+        cast(Processor, LogLevelProcessor(level, level_table)),
+        *sampling,
+        # Only now that we know the event will be written
+        resolve_lazy_values,
+        *callsite,
         *processors,
         # Partially defined type...
         structlog.processors.StackInfoRenderer(),
         cast(Processor, structlog.dev.set_exc_info),
+        # Repeated tracebacks are only formatted once per window
+        cast(Processor, ExceptionDeduplicator()),
         cast(Processor, structlog.processors.format_exc_info),
-        cast(Processor, structlog.processors.ExceptionPrettyPrinter()),
     ]
 
-    use_stackdriver = feature_set.value('co.outcome.logkit.use_stackdriver')
+    pretty_printer = get_pretty_printer()
+    if pretty_printer is not None:
+        final_processors.append(pretty_printer)
 
     # How is the output formatted
-    if (use_stackdriver == 'auto' and env.is_google_cloud()) or use_stackdriver == 'yes':
+    if stackdriver:
         final_processors.append(structlog.processors.TimeStamper())
         # The renderer needs to be the last processor
-        final_processors.append(StackdriverRenderer())
+        final_processors.append(get_stackdriver_renderer())
     else:
         final_processors.append(structlog.processors.TimeStamper(fmt='iso'))
         # param name mismatch
         final_processors.append(cast(Processor, structlog.stdlib.PositionalArgumentsFormatter()))
+        # The Stackdriver renderer caps the events itself
+        final_processors.append(cast(Processor, SizeCapProcessor()))
         # The renderer needs to be the last processor
-        final_processors.append(structlog.dev.ConsoleRenderer())
+        final_processors.append(structlog.dev.ConsoleRenderer(colors=colors))
+
+    return profile_if(final_processors, profile)
 
-    return final_processors
+
+# Each processor, including the user's, is wrapped with a sampling timer
+def profile_if(processors: List[Processor], profile: bool) -> List[Processor]:
+    if profile:
+        from outcome.logkit.profiling import profile_processors  # noqa: WPS433
+
+        return profile_processors(processors)
+
+    return processors
+
+
+# The default Stackdriver chain, in two calls: up to the level filter, and after it
+def get_fused_processors(
+    level: int,
+    level_table: Optional[LevelTable],
+    merge_context: Processor,
+    callsite: Optional[CallsiteProcessor] = None,
+) -> List[Processor]:
+    from outcome.logkit.fused import FusedLevelProcessor, FusedStackdriverPipeline  # noqa: WPS433
+
+    pretty_printer = get_pretty_printer()
+
+    return [
+        cast(Processor, FusedLevelProcessor(merge_context, level, level_table)),
+        cast(Processor, FusedStackdriverPipeline(get_stackdriver_renderer(), callsite, pretty_printer)),
+    ]
@@ -2,13 +2,35 @@
 
 import inspect
 import logging
+from collections import deque
 from contextlib import contextmanager
-from typing import TYPE_CHECKING, Any, Dict, Iterable, List, MutableSequence, Optional, Protocol, Sequence, Union, cast, overload
-
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    MutableSequence,
+    Optional,
+    Protocol,
+    Sequence,
+    Tuple,
+    Union,
+    cast,
+    overload,
+)
+
+import structlog
 from outcome.utils import env
+from structlog import BoundLoggerBase
 
-from outcome.logkit.logger import get_logger
-from outcome.logkit.types import StructLogger
+from outcome.logkit import counters
+from outcome.logkit.features import feature_set
+from outcome.logkit.levels import LevelTable, LogLevelProcessor, levels
+from outcome.logkit.logger import get_logger, resolve_logger
+from outcome.logkit.profiling import unwrap
+from outcome.logkit.types import Processor, StructLogger
 
 if TYPE_CHECKING:  # pragma: no cover
     ArgsType = logging._ArgsType  # type: ignore
@@ -101,26 +123,41 @@ class HandlerList(MutableSequence[logging.Handler]):  # noqa: WPS214
 
 # Extract some useful attributes to a dict
 def record_to_dict(record: logging.LogRecord) -> Dict[str, object]:
-    d: Dict[str, object] = {
-        # These keys have specific meanings
-        'levelno': record.levelno,
-        'level': record.levelname,
-        'logger': record.name,
-    }
+    d: Dict[str, object] = {}
+    add_record_fields(d, record)
+    return d
+
+
+def add_record_fields(d: Dict[str, object], record: logging.LogRecord) -> None:
+    # These keys have specific meanings
+    d['levelno'] = record.levelno
+    d['level'] = record.levelname
+    d['logger'] = record.name
 
     # Bindings contains additional information added by the InterceptLogger
-    bindings = getattr(record, 'bindings', {})
-    d.update(bindings)
+    bindings = getattr(record, 'bindings', None)
+    if bindings:
+        d.update(bindings)
 
     if record.exc_info:
         d['exc_info'] = record.exc_info
 
-    return d
-
 
 # Behave exactly like a normal logger, except don't allow
 # any local handlers and always forward to root
 class InterceptLogger(logging.Logger):
+    # Per-logger level rules, set by `reset_standard_library_logging`
+    level_table: Optional[LevelTable] = None
+
+    # A matching rule takes priority over the level set on the logger hierarchy
+    def isEnabledFor(self, level: int) -> bool:  # noqa: N802
+        rule_level = self.level_table.rule_level(self.name) if self.level_table else None
+
+        if rule_level is None:
+            return super().isEnabledFor(level)
+
+        return not self.disabled and level > self.manager.disable and level >= rule_level
+
     @property
     def propagate(self):
         return True
@@ -164,10 +201,57 @@ class InterceptLogger(logging.Logger):
 
 # This is the bridge between the two logging systems - messages are
 # handled by being forwarded to the struct logger
+#
+# The handler has no lock: it's the only handler on the root logger, so a lock
+# would serialize the logging of every thread, and the processors don't need it.
+# Writing the output is left to the struct logger, which does its own locking
 class StructlogHandler(logging.Handler):
-    def __init__(self, struct_logger: StructLogger, level: int = logging.NOTSET):
+    def __init__(self, struct_logger: Optional[StructLogger] = None, level: int = logging.NOTSET):
         super().__init__(level)
-        self.struct_logger = struct_logger
+        self._struct_logger = struct_logger
+
+    def createLock(self):  # noqa: N802
+        self.lock = None
+
+    def _at_fork_reinit(self):
+        pass  # noqa: WPS420
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        counters.count_intercepted()
+
+        rv = self.filter(record)
+        if rv:
+            # Since Python 3.12, filters can return a replacement record
+            self.emit(rv if isinstance(rv, logging.LogRecord) else record)
+        return bool(rv)
+
+    # Without an explicit logger, we resolve the root logger from the registry
+    # on each record, so the handler follows structlog reconfigurations
+    @property
+    def struct_logger(self) -> StructLogger:
+        return self._struct_logger or get_logger()
+
+    # Handles several records, checking the level before running the filters,
+    # and emits the accepted ones together
+    def handle_batch(self, records: Iterable[logging.LogRecord]):
+        accepted: List[logging.LogRecord] = []
+
+        for record in records:
+            if record.levelno < self.level:
+                continue
+
+            counters.count_intercepted()
+
+            rv = self.filter(record)
+            if rv:
+                accepted.append(rv if isinstance(rv, logging.LogRecord) else record)
+
+        if accepted:
+            self.emit_batch(accepted)
+
+    def emit_batch(self, records: List[logging.LogRecord]):
+        for record in records:
+            self.emit(record)
 
     def emit(self, record: logging.LogRecord):
         # We need to retrieve the name of the method based on the level, and re-dispatch
@@ -175,18 +259,117 @@ class StructlogHandler(logging.Handler):
         getattr(self.struct_logger, record.levelname.lower())(record.getMessage().strip(), **record_to_dict(record))
 
 
+# The struct logger method for each standard level, e.g. `logging.WARNING` -> `warning`
+_level_methods = {number: logging.getLevelName(number).lower() for number in levels}
+
+
+# Call the wrapped logger with the output of the processor chain, like structlog's bound loggers
+def dispatch(logger: object, method_name: str, event: object) -> None:
+    if isinstance(event, (str, bytes, bytearray)):
+        getattr(logger, method_name)(event)
+    elif isinstance(event, tuple):
+        args, kwargs = cast(Tuple[Sequence[object], Dict[str, object]], event)
+        getattr(logger, method_name)(*args, **kwargs)
+    else:
+        getattr(logger, method_name)(**cast(Dict[str, object], event))
+
+
+# The bound logger, and its processor chain split after the level filter
+BridgeChain = Tuple[Optional[BoundLoggerBase], List[Processor], List[Processor]]
+
+
+class StructlogBridgeHandler(StructlogHandler):
+    """A handler that feeds records straight into the struct logger's processor chain.
+
+    Instead of dispatching each record through the struct logger, it builds the event
+    dict directly from the record and runs the processors itself. The message is only
+    formatted once the event has made it through the `LogLevelProcessor`.
+    """
+
+    def __init__(self, struct_logger: Optional[StructLogger] = None, level: int = logging.NOTSET):
+        super().__init__(struct_logger, level)
+        # The handler has no lock, so the bound logger and its chain are replaced together
+        self._chain: BridgeChain = (None, [], [])
+
+    # Split the chain after the level filter, the message is formatted between the two parts
+    def _prepare(self, bound_logger: BoundLoggerBase) -> BridgeChain:
+        processors = list(cast(Iterable[Processor], bound_logger._processors))
+        split = next((i + 1 for i, p in enumerate(processors) if isinstance(unwrap(p), LogLevelProcessor)), 0)
+
+        self._chain = (bound_logger, processors[:split], processors[split:])
+        return self._chain
+
+    def _chain_for(self, bound_logger: BoundLoggerBase) -> BridgeChain:
+        chain = self._chain
+        if bound_logger is not chain[0]:
+            chain = self._prepare(bound_logger)
+        return chain
+
+    def emit(self, record: logging.LogRecord):
+        bound_logger = resolve_logger(self.struct_logger)
+
+        if not isinstance(bound_logger, BoundLoggerBase):
+            return super().emit(record)
+
+        self._process(bound_logger, self._chain_for(bound_logger), record)
+
+    # The bound logger and its chain are resolved once for the whole batch
+    def emit_batch(self, records: List[logging.LogRecord]):
+        bound_logger = resolve_logger(self.struct_logger)
+
+        if not isinstance(bound_logger, BoundLoggerBase):
+            return super().emit_batch(records)
+
+        chain = self._chain_for(bound_logger)
+        for record in records:
+            self._process(bound_logger, chain, record)
+
+    def _process(self, bound_logger: BoundLoggerBase, chain: BridgeChain, record: logging.LogRecord):
+        _, filters, processors = chain
+
+        method_name = _level_methods.get(record.levelno) or record.levelname.lower()
+        logger = bound_logger._logger
+
+        event_dict: Any = bound_logger._context.copy()
+        add_record_fields(event_dict, record)
+
+        # The placeholder keeps the key in the same position as in a dispatched event
+        event_dict['event'] = None
+
+        try:
+            for level_filter in filters:
+                event_dict = level_filter(logger, method_name, event_dict)
+
+            event_dict['event'] = record.getMessage().strip()
+
+            for processor in processors:
+                event_dict = processor(logger, method_name, event_dict)
+        except structlog.DropEvent:
+            return None
+
+        dispatch(logger, method_name, event_dict)
+
+
+# The number of records kept while logging is being configured
+default_buffer_capacity = 10000
+
+
 # This handler stores emitted records in a buffer
-# so they can be processed later
+# so they can be processed later. It keeps the most
+# recent records, up to `capacity`, and counts the ones it drops
 class BufferHandler(logging.Handler):
-    def __init__(self, level: int = logging.NOTSET):
+    def __init__(self, level: int = logging.NOTSET, capacity: int = default_buffer_capacity):
         super().__init__(level)
-        self.buffer: List[logging.LogRecord] = []
+        self.buffer: Deque[logging.LogRecord] = deque(maxlen=capacity)
+        self.dropped = 0
 
     def emit(self, record: logging.LogRecord):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
         self.buffer.append(record)
 
 
-def reset_standard_library_logging(level: int):
+def reset_standard_library_logging(level: int, level_table: Optional[LevelTable] = None):
     # Send warnings to the standard library log system
     logging.captureWarnings(True)
 
@@ -195,10 +378,11 @@ def reset_standard_library_logging(level: int):
 
     # Ensure all future loggers use the InterceptLogger as the base class
     logging.setLoggerClass(InterceptLogger)
+    InterceptLogger.level_table = level_table if level_table else None
 
     # Iterate over all existing loggers and configure them to
     # behave like InterceptLoggers
-    intercept_existing_loggers()
+    intercept_existing_loggers(level_table)
 
 
 # There's no stub for manager
@@ -206,7 +390,7 @@ class Manager(Protocol):
     loggerDict: Dict[str, Union[logging.Logger, logging.PlaceHolder]]  # noqa: WPS115,N815
 
 
-def intercept_existing_loggers():
+def intercept_existing_loggers(level_table: Optional[LevelTable] = None):
     # All existing loggers (at least those retrieved via `getLogger`)
     # are in the loggerDict dict on the manager object
     manager = cast(Manager, logging.Logger.manager)  # type: ignore
@@ -224,23 +408,39 @@ def intercept_existing_loggers():
         # Ensure it propagates its messages up to root
         logger.propagate = True
 
+        # Loggers created before the intercept aren't InterceptLoggers, so
+        # we apply the level rules to them directly
+        rule_level = level_table.rule_level(logger.name) if level_table else None
+        if rule_level is not None:
+            logger.setLevel(rule_level)
+
 
 @contextmanager
-def intercepted_logging(level: int):
-    reset_standard_library_logging(level)
-    buffer = setup_buffer_intercept(level)
+def intercepted_logging(
+    level: int,
+    level_table: Optional[LevelTable] = None,
+    buffer_capacity: int = default_buffer_capacity,
+):
+    reset_standard_library_logging(level, level_table)
+
+    # The handlers need to let through anything a logger with a rule can emit
+    handler_level = level_table.min_level if level_table else level
+    buffer = setup_buffer_intercept(handler_level, buffer_capacity)
 
     yield
 
-    structlog_handler = setup_structlog_intercept(level)
+    structlog_handler = setup_structlog_intercept(handler_level)
     handle_records(buffer.buffer, structlog_handler)
 
+    if buffer.dropped:
+        get_logger(__name__).warning('log_records_dropped', dropped_count=buffer.dropped, buffer_capacity=buffer_capacity)
+
 
-def setup_buffer_intercept(level: int) -> BufferHandler:
+def setup_buffer_intercept(level: int, capacity: int = default_buffer_capacity) -> BufferHandler:
     # Create a buffer to store all of the log records
     # that may occur during the setup so we can process
     # them after the config is complete
-    buffer_handler = BufferHandler(level)
+    buffer_handler = BufferHandler(level, capacity)
 
     # Use a frozenlist to make sure no-one tries to modify handlers
     handlers = HandlerList([buffer_handler])
@@ -260,7 +460,10 @@ def setup_structlog_intercept(level: int) -> StructlogHandler:
     # and replace all other handlers.
 
     # Create a handler that we'll put on the root
-    structlog_handler = StructlogHandler(get_logger(), level)
+    if feature_set.is_active('co.outcome.logkit.intercept_bridge'):
+        structlog_handler: StructlogHandler = StructlogBridgeHandler(level=level)
+    else:
+        structlog_handler = StructlogHandler(level=level)
 
     # To make ipython bearable, we filter some log messages
     if env.is_ipython():  # pragma: no cover
@@ -290,6 +493,10 @@ def replace_handlers(logger: logging.Logger, handlers: Sequence[logging.Handler]
     logger.handlers = list(handlers)
 
 
-def handle_records(records: List[logging.LogRecord], handler: logging.Handler):
+def handle_records(records: Iterable[logging.LogRecord], handler: logging.Handler):
+    if isinstance(handler, StructlogHandler):
+        handler.handle_batch(records)
+        return
+
     for record in records:
         handler.handle(record)
@@ -0,0 +1,37 @@
+"""Field values that are only computed for events that are written."""
+
+from typing import Callable
+
+from outcome.logkit.types import EventDict
+
+
+class Lazy:
+    """Defers the computation of a field value.
+
+    The value is computed by the `resolve_lazy_values` processor, which runs after the
+    level filtering, so nothing is computed for dropped events.
+
+    Example:
+        logger.debug('state', snapshot=Lazy(obj.to_dict))
+    """
+
+    __slots__ = ('func', 'args', 'kwargs')
+
+    def __init__(self, func: Callable[..., object], *args: object, **kwargs: object):
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+
+    def resolve(self) -> object:
+        return self.func(*self.args, **self.kwargs)
+
+    def __repr__(self) -> str:
+        return f'Lazy({self.func!r})'
+
+
+# Only `Lazy` values are resolved, plain callables may be values in their own right
+def resolve_lazy_values(logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+    for key, value in event_dict.items():
+        if isinstance(value, Lazy):
+            event_dict[key] = value.resolve()
+    return event_dict
@@ -0,0 +1,204 @@
+"""Log level names and numbers."""
+
+import logging
+from typing import Dict, Mapping, Optional, Union, cast
+
+import structlog
+
+from outcome.logkit import counters
+from outcome.logkit.types import EventDict
+
+_critical = 'critical'
+_fatal = 'fatal'
+_error = 'error'
+_warning = 'warning'
+_warn = 'warn'
+_info = 'info'
+_debug = 'debug'
+
+# These are taken from the standard library
+levels = {
+    logging.FATAL: _fatal,
+    logging.ERROR: _error,
+    logging.WARNING: _warning,
+    logging.INFO: _info,
+    logging.DEBUG: _debug,
+}
+
+level_numbers = {name: number for number, name in levels.items()}
+
+default_level = _info
+
+# These map variations to canonical labels
+level_aliases = {
+    default_level: default_level,
+    _debug: _debug,
+    _warn: _warning,
+    _warning: _warning,
+    _error: _error,
+    'err': _error,
+    _fatal: _fatal,
+    _critical: _fatal,
+    'failure': _error,
+    'exception': _fatal,
+}
+
+
+LevelRules = Mapping[str, Union[int, str]]
+
+
+# Parse a level given as a number, or a standard library level name
+def parse_level(level: Union[int, str]) -> int:
+    if isinstance(level, int):
+        return level
+
+    if level.strip().isdigit():
+        return int(level)
+
+    number = logging.getLevelName(level.strip().upper())
+    if not isinstance(number, int):
+        raise ValueError(f'Unknown log level: {level}')
+
+    return number
+
+
+# Parse rules like `urllib3=WARNING,app.db=DEBUG,google.*=ERROR`
+def parse_level_rules(rules: str) -> Dict[str, int]:
+    parsed: Dict[str, int] = {}
+
+    for rule in rules.split(','):
+        if not rule.strip():
+            continue
+
+        name, sep, level = rule.partition('=')
+        if not (sep and name.strip()):
+            raise ValueError(f'Invalid log level rule: {rule}')
+
+        parsed[name.strip()] = parse_level(level)
+
+    return parsed
+
+
+class LevelTable:
+    """The effective level for each logger name, compiled from per-logger rules.
+
+    A rule for `name` applies to that logger and its descendants, a rule for `name.*`
+    only applies to the descendants. The most specific rule wins, and loggers without
+    a matching rule use the default level. Each name is resolved once, after which
+    the lookup is a dict access.
+    """
+
+    def __init__(self, default: int, rules: Optional[LevelRules] = None):
+        self.default = default
+        self._rules: Dict[str, int] = {}
+        self._descendant_rules: Dict[str, int] = {}
+        self._cache: Dict[Optional[str], Optional[int]] = {}
+
+        for name, level in (rules or {}).items():
+            if name.endswith('.*'):
+                self._descendant_rules[name[:-2]] = parse_level(level)
+            else:
+                self._rules[name] = parse_level(level)
+
+        # The lowest level that any logger can emit at
+        self.min_level = min([default, *self._rules.values(), *self._descendant_rules.values()])
+
+    def __bool__(self) -> bool:
+        return bool(self._rules or self._descendant_rules)
+
+    def effective_level(self, name: Optional[str]) -> int:
+        level = self.rule_level(name)
+        return self.default if level is None else level
+
+    # The level set by the most specific matching rule, if there is one
+    def rule_level(self, name: Optional[str]) -> Optional[int]:
+        try:
+            return self._cache[name]
+        except KeyError:
+            return self._cache.setdefault(name, self._resolve(name))
+
+    def _resolve(self, name: Optional[str]) -> Optional[int]:
+        if not name:
+            return None
+
+        if name in self._rules:
+            return self._rules[name]
+
+        parent = name
+        while '.' in parent:
+            parent = parent.rpartition('.')[0]
+
+            if parent in self._descendant_rules:
+                return self._descendant_rules[parent]
+
+            if parent in self._rules:
+                return self._rules[parent]
+
+        return None
+
+
+# The level number a structlog method name maps to, e.g. `exception` -> `logging.FATAL`
+def method_level(method_name: str) -> int:
+    return level_numbers[level_aliases.get(method_name, default_level)]
+
+
+class LogLevelProcessor:
+    """This processor class ensures that each log message has a standardized log level.
+
+    It is reponsible for determining the level, and filtering out messages that don't
+    meet the level.
+    """
+
+    def __init__(self, level: int, level_table: Optional[LevelTable] = None):
+        self.level = level
+        self.level_table = level_table if level_table else None
+
+    # At the end, we want an event dict that has a valid label, and no level number.
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+        event_dict = self.normalize_level(method_name, event_dict)
+        return self.filter_on_level(event_dict)
+
+    def filter_on_level(self, event_dict: EventDict) -> EventDict:
+        levelno = event_dict.pop('levelno')
+        assert isinstance(levelno, int)
+
+        logger = event_dict.get('logger')
+
+        if self.level_table is None:
+            level = self.level
+        else:
+            level = self.level_table.effective_level(logger)
+
+        level_name = levels.get(levelno, default_level)
+
+        if levelno < level:
+            counters.count_dropped(level_name)
+            raise structlog.DropEvent
+
+        counters.count_event(level_name, logger)
+        return event_dict
+
+    # Try various strategies to determine the message level
+    def normalize_level(self, method_name: str, event_dict: EventDict) -> EventDict:
+        event_level_number = event_dict.pop('levelno', None)
+        event_level_name = event_dict.pop('level', None)
+
+        # If we don't have anything, we tentatively use the method_name as a level
+        if not (event_level_number or event_level_name):  # noqa: WPS504
+            level = method_name
+
+        # level_number has priority over the provided level name
+        elif event_level_number in levels:
+            # if levels is a dict with int keys, and event_level_number is a valid key, then it's an int...
+            level = levels.get(cast(int, event_level_number))
+
+        # Try using the provided level name
+        else:
+            assert isinstance(event_level_name, str)
+            level = event_level_name.lower()
+
+        # Find its canonical name, or revert to default
+        normalized_level_name = level_aliases.get(str(level), default_level)
+        normalized_level_number = level_numbers.get(normalized_level_name)
+
+        return {**event_dict, 'level': normalized_level_name, 'levelno': normalized_level_number}
@@ -0,0 +1,221 @@
+"""Size caps for oversized events."""
+
+import builtins
+import reprlib
+from itertools import islice
+from typing import Dict, FrozenSet, List, Optional, Sequence, Set
+
+from outcome.logkit.encoders import fallback
+from outcome.logkit.types import EventDict
+
+# The top-level fields that had to be truncated
+truncated_key = 'truncated_fields'
+
+# The end of a traceback is where the error is, so these fields keep their tail
+_tail_keys = frozenset(('exception', 'stack'))
+
+# The values that are encoded as they are, the others go through the encoder's fallback
+_scalar_types = (int, float, type(None))
+
+
+class SizeLimits:
+    """The limits applied to the events before they are encoded.
+
+    Strings are cut at `max_string` characters, lists, tuples and dicts at `max_items`
+    items, and containers nested deeper than `max_depth` are replaced by a summary. Other
+    values are capped like the string, or the container, the encoder turns them into. The
+    renderers guarantee a rendered line is at most `max_line_bytes` long.
+
+    The tracebacks in `exception` and `stack` keep their last `max_string` characters.
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 10,
+        max_items: int = 1000,
+        max_string: int = 16 * 1024,
+        max_line_bytes: int = 250 * 1024,
+    ):
+        self.max_depth = max_depth
+        self.max_items = max_items
+        self.max_string = max_string
+        self.max_line_bytes = max_line_bytes
+
+
+def cap_string(value: str, limits: SizeLimits, keep_tail: bool = False) -> str:
+    if len(value) <= limits.max_string:
+        return value
+
+    if keep_tail:
+        return f'<truncated {len(value) - limits.max_string} chars>...{value[-limits.max_string:]}'
+    return f'{value[:limits.max_string]}...<truncated {len(value) - limits.max_string} chars>'
+
+
+def cap_value(value: object, limits: SizeLimits, depth: int = 1) -> object:  # noqa: WPS212,WPS231
+    if isinstance(value, str):
+        return cap_string(value, limits)
+
+    if isinstance(value, _scalar_types):
+        return value
+
+    # The encoder would serialize the value with the fallback, e.g. its `repr`. The
+    # fallback's output is only kept if it had to be capped
+    if not isinstance(value, (dict, list, tuple)):
+        if getattr(value, '__structlog__', None) is None:
+            return _cap_repr(value, limits, depth)
+
+        serialized = fallback(value)
+        capped = cap_value(serialized, limits, depth)
+        return value if capped is serialized else capped
+
+    if depth > limits.max_depth:
+        return f'<truncated {type(value).__name__} of {len(value)} items>'
+
+    if isinstance(value, dict):
+        return _cap_dict(value, limits, depth)
+    return _cap_sequence(value, limits, depth)
+
+
+class _BoundedRepr(reprlib.Repr):
+    """A `repr` that stops at the limits, instead of generating the full string first.
+
+    It records whether anything was left out. The items of sets and dicts are kept in
+    their order, sorting them would cost more than the full `repr`. The `repr` of other
+    objects can't be stopped early, it's cut afterwards.
+    """
+
+    def __init__(self, limits: SizeLimits, depth: int):
+        super().__init__()
+        self.limits = limits
+        self.maxlevel = limits.max_depth - depth + 1
+        self.maxtuple = limits.max_items
+        self.maxlist = limits.max_items
+        self.maxarray = limits.max_items
+        self.maxdict = limits.max_items
+        self.maxset = limits.max_items
+        self.maxfrozenset = limits.max_items
+        self.maxdeque = limits.max_items
+        self.truncated = False
+
+    def repr_instance(self, x: object, level: int) -> str:
+        text = builtins.repr(x)
+
+        # The value itself is capped with the rest of the string
+        if level == self.maxlevel:
+            return text
+        return self._cap(text)
+
+    repr_int = repr_instance
+
+    def repr_str(self, x: str, level: int) -> str:
+        return builtins.repr(self._cap(x))
+
+    def repr_set(self, x: Set[object], level: int) -> str:
+        return self._repr_iterable(x, level, '{', '}', self.maxset) if x else 'set()'
+
+    def repr_frozenset(self, x: FrozenSet[object], level: int) -> str:
+        return self._repr_iterable(x, level, 'frozenset({', '})', self.maxfrozenset) if x else 'frozenset()'
+
+    def repr_dict(self, x: Dict[object, object], level: int) -> str:
+        if not x:
+            return '{}'
+
+        self.truncated = self.truncated or level <= 0 or len(x) > self.maxdict
+        if level <= 0:
+            return '{...}'
+
+        pieces = [f'{self.repr1(key, level - 1)}: {self.repr1(item, level - 1)}' for key, item in islice(x.items(), self.maxdict)]
+        if len(x) > self.maxdict:
+            pieces.append('...')
+        return '{%s}' % ', '.join(pieces)  # noqa: WPS323
+
+    def _repr_iterable(self, x, level, left, right, maxiter, trail=''):  # noqa: WPS211
+        self.truncated = self.truncated or (level <= 0 and len(x) > 0) or len(x) > maxiter
+        return super()._repr_iterable(x, level, left, right, maxiter, trail)
+
+    def _cap(self, text: str) -> str:
+        capped = cap_string(text, self.limits)
+        self.truncated = self.truncated or capped is not text
+        return capped
+
+
+# The repr is only kept if it had to be capped, the encoder serializes the value otherwise
+def _cap_repr(value: object, limits: SizeLimits, depth: int) -> object:
+    bounded = _BoundedRepr(limits, depth)
+    serialized = bounded.repr(value)
+    capped = cap_string(serialized, limits)
+
+    return capped if bounded.truncated or capped is not serialized else value
+
+
+# The containers are only copied if something in them is truncated
+def _cap_dict(value: Dict[object, object], limits: SizeLimits, depth: int) -> object:
+    capped: Optional[Dict[object, object]] = None
+
+    for index, (key, item) in enumerate(value.items()):
+        if index == limits.max_items:
+            if capped is None:
+                capped = dict(islice(value.items(), index))
+            capped['...'] = f'<truncated {len(value) - index} items>'
+            break
+
+        capped_item = cap_value(item, limits, depth + 1)
+
+        if capped is None and capped_item is not item:
+            capped = dict(islice(value.items(), index))
+        if capped is not None:
+            capped[key] = capped_item
+
+    return value if capped is None else capped
+
+
+def _cap_sequence(value: Sequence[object], limits: SizeLimits, depth: int) -> object:
+    capped: Optional[List[object]] = None
+
+    for index, item in enumerate(value):
+        if index == limits.max_items:
+            if capped is None:
+                capped = list(value[:index])
+            capped.append(f'<truncated {len(value) - index} items>')
+            break
+
+        capped_item = cap_value(item, limits, depth + 1)
+
+        if capped is None and capped_item is not item:
+            capped = list(value[:index])
+        if capped is not None:
+            capped.append(capped_item)
+
+    return value if capped is None else capped
+
+
+# Cap the values of the event dict in place, the truncated fields are listed under `truncated_fields`
+def cap_event(event_dict: EventDict, limits: SizeLimits) -> EventDict:
+    truncated: List[str] = []
+
+    for key, value in event_dict.items():
+        if key in _tail_keys and isinstance(value, str):
+            capped: object = cap_string(value, limits, keep_tail=True)
+        else:
+            capped = cap_value(value, limits)
+        if capped is not value:
+            event_dict[key] = capped
+            truncated.append(str(key))
+
+    if truncated:
+        event_dict[truncated_key] = truncated
+
+    return event_dict
+
+
+class SizeCapProcessor:
+    """Caps the size of the event values, see `SizeLimits`.
+
+    The Stackdriver renderer caps the events itself, this processor is for the other renderers.
+    """
+
+    def __init__(self, limits: Optional[SizeLimits] = None):
+        self.limits = limits or SizeLimits()
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+        return cap_event(event_dict, self.limits)
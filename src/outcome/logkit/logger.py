@@ -1,15 +1,103 @@
 """Interface to structlog."""
 
-from typing import Optional
+from typing import Callable, Dict, Optional, Tuple
 
 import structlog
 from outcome.utils import env
 
+from outcome.logkit.bound import LevelBoundLogger
+from outcome.logkit.levels import level_aliases
 from outcome.logkit.types import StructLogger
 
+# Bumped by `reset_loggers`, the loggers assembled before it are stale
+_generation = 0
+
+
+class RegisteredLogger:  # noqa: WPS214
+    """The logger returned by `get_logger`.
+
+    It holds a logger assembled with the current configuration, and assembles it again
+    after `reset_loggers`, so module-level loggers follow later calls to `init()`.
+    Everything else is forwarded to the assembled logger.
+    """
+
+    __slots__ = ('_name', '_args', '_kwargs', '_logger', '_generation')
+
+    def __init__(self, name: Optional[str], args: Tuple[object, ...], kwargs: Dict[str, object]):
+        self._name = name
+        self._args = args
+        self._kwargs = kwargs
+        self._generation = -1
+        self._logger = self.resolve()
+
+    # The assembled logger, for the code that works with the bound logger itself. It's
+    # called on each logging call, so it's a single comparison until the next reset
+    def resolve(self) -> StructLogger:
+        if self._generation == _generation:
+            return self._logger
+
+        self._logger = build_logger(self._name, *self._args, **self._kwargs)
+        self._generation = _generation
+        return self._logger
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self.resolve(), name)
+
+    def __repr__(self) -> str:
+        return f'<RegisteredLogger {self._name!r}>'
+
+
+# The logging methods are forwarded without going through `__getattr__`
+def _forward(method_name: str) -> Callable[..., object]:
+    def method(self: RegisteredLogger, *args: object, **kwargs: object) -> object:  # noqa: WPS430
+        return getattr(self.resolve(), method_name)(*args, **kwargs)
+
+    method.__name__ = method_name
+    return method
+
+
+for _method_name in (*level_aliases.keys(), 'msg', 'log', 'bind', 'unbind', 'new'):
+    setattr(RegisteredLogger, _method_name, _forward(_method_name))
+
+
+def resolve_logger(logger: StructLogger) -> StructLogger:
+    return logger.resolve() if isinstance(logger, RegisteredLogger) else logger
+
+
+# Registered loggers, by name. Loggers with bindings are often created per request,
+# so they aren't registered, the registry would grow without bounds
+_registry: Dict[Optional[str], StructLogger] = {}
+
 
 def get_logger(name: Optional[str] = None, *args: object, **kwargs: object) -> StructLogger:
+    if args or kwargs:
+        return RegisteredLogger(name, args, kwargs)  # type: ignore
+
+    try:
+        return _registry[name]
+    except KeyError:
+        return _registry.setdefault(name, RegisteredLogger(name, args, kwargs))  # type: ignore
+
+
+def build_logger(name: Optional[str] = None, *args: object, **kwargs: object) -> StructLogger:
     if not structlog.is_configured():
         raise Exception('Logger is not configured')  # noqa: WPS454
 
-    return structlog.get_logger(*args, env=env.env(), name=name, **kwargs)
+    # Binding the lazy proxy assembles the logger with the current configuration
+    logger = structlog.get_logger(*args, env=env.env(), name=name, **kwargs).bind()
+
+    # With per-logger level rules, the logger's level depends on its name
+    if isinstance(logger, LevelBoundLogger):
+        return logger.for_name(name)
+
+    return logger
+
+
+# The registered loggers are assembled again after a reset. This is handled for you by
+# `init()`, but you'll need to call it if you configure structlog yourself, or change
+# its configuration in place
+def reset_loggers():
+    global _generation  # noqa: WPS420
+
+    _registry.clear()
+    _generation += 1  # noqa: WPS442
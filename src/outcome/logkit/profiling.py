@@ -0,0 +1,151 @@
+"""Per-processor latency profiling.
+
+The processors are only wrapped when profiling is enabled, with `init_logging(profile=True)`
+or `LOGKIT_PROFILE=1`, otherwise the chain is left as it is.
+"""
+
+import atexit
+import sys
+import time
+from typing import Dict, List, Optional, TextIO
+
+from outcome.logkit.types import EventDict, Processor
+
+# The upper bound, in ns, of the last histogram bucket is 2 ** (_buckets - 1)
+_buckets = 40
+
+
+class Histogram:
+    """The latencies of a processor, in power of two buckets of nanoseconds.
+
+    The counters aren't locked, so concurrent updates can lose a few samples.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.clear()
+
+    def clear(self):
+        self.calls = 0
+        self.samples = 0
+        self.total_ns = 0
+        self.buckets = [0] * _buckets
+
+    def add(self, duration_ns: int):
+        self.samples += 1
+        self.total_ns += duration_ns
+        self.buckets[min(duration_ns.bit_length(), _buckets - 1)] += 1
+
+    @property
+    def mean_ns(self) -> float:
+        return self.total_ns / self.samples if self.samples else 0
+
+    # The upper bound of the bucket that holds the given percentile
+    def percentile_ns(self, percentile: float) -> int:
+        threshold = self.samples * percentile / 100
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= threshold:
+                return 2**bucket
+        return 0
+
+    # The time spent in the processor, extrapolated from the samples
+    @property
+    def estimated_total_ns(self) -> float:
+        return self.mean_ns * self.calls
+
+
+_histograms: Dict[str, Histogram] = {}
+
+
+def histogram(name: str) -> Histogram:
+    try:
+        return _histograms[name]
+    except KeyError:
+        return _histograms.setdefault(name, Histogram(name))
+
+
+def processor_name(processor: object) -> str:
+    target = processor if hasattr(processor, '__qualname__') else type(processor)
+    return f'{target.__module__}.{target.__qualname__}'
+
+
+class ProfiledProcessor:
+    """Times one in `sample_every` calls of the wrapped processor.
+
+    The time of the calls that drop the event, or raise, is recorded too.
+    """
+
+    __slots__ = ('processor', 'histogram', 'sample_every', '_countdown')
+
+    def __init__(self, processor: Processor, sample_every: int = 16):
+        self.processor = processor
+        self.histogram = histogram(processor_name(processor))
+        self.sample_every = sample_every
+        self._countdown = 0
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> object:
+        self.histogram.calls += 1
+
+        if self._countdown:
+            self._countdown -= 1
+            return self.processor(logger, method_name, event_dict)
+
+        self._countdown = self.sample_every - 1
+        start = time.perf_counter_ns()
+        try:  # noqa: WPS501
+            return self.processor(logger, method_name, event_dict)
+        finally:
+            self.histogram.add(time.perf_counter_ns() - start)
+
+
+# The processor that a profiled processor wraps, for the code that looks for a given processor in the chain
+def unwrap(processor: object) -> object:
+    return processor.processor if isinstance(processor, ProfiledProcessor) else processor
+
+
+_dump_registered = False
+
+
+def profile_processors(processors: List[Processor], sample_every: int = 16) -> List[Processor]:
+    global _dump_registered  # noqa: WPS420
+
+    # The report is printed at exit once profiling has been enabled
+    if not _dump_registered:
+        atexit.register(dump)
+        _dump_registered = True  # noqa: WPS442
+
+    return [ProfiledProcessor(unwrap(p), sample_every) for p in processors]  # type: ignore
+
+
+def _format_ns(ns: float) -> str:
+    return f'{ns / 1000:.1f}us'
+
+
+# The processors that took the most time, with their latency distribution
+def report(top: int = 10) -> str:
+    histograms = sorted(_histograms.values(), key=lambda h: h.estimated_total_ns, reverse=True)[:top]
+    total = sum(h.estimated_total_ns for h in _histograms.values()) or 1
+
+    lines = [f'{"processor":<64} {"calls":>10} {"share":>7} {"mean":>10} {"p50":>10} {"p99":>10}']
+    for h in histograms:
+        lines.append(
+            f'{h.name:<64} {h.calls:>10} {h.estimated_total_ns / total:>7.1%} {_format_ns(h.mean_ns):>10}'
+            + f' {_format_ns(h.percentile_ns(50)):>10} {_format_ns(h.percentile_ns(99)):>10}',
+        )
+
+    return '\n'.join(lines)
+
+
+def dump(top: int = 10, stream: Optional[TextIO] = None):
+    if not any(h.samples for h in _histograms.values()):
+        return
+
+    print(report(top), file=stream or sys.stderr)  # noqa: WPS421
+
+
+# The profiled processors keep their histograms, so they are cleared in place
+def reset():
+    for h in _histograms.values():
+        h.clear()
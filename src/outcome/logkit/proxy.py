@@ -1,7 +1,9 @@
 """Logging proxy. Logs calls to attributes and methods."""
 
+import inspect
 import logging
-from typing import Optional
+import time
+from typing import AsyncGenerator, Awaitable, Dict, Optional, Tuple
 
 from outcome.logkit.logger import get_logger
 
@@ -12,31 +14,105 @@ class LoggingProxy:
         self._logger = get_logger(name)
         self._name = name
         self._level = level
+        # Child proxies, with the attribute they were built for
+        self._children: Dict[str, Tuple[object, LoggingProxy]] = {}
+
+    # Skip the event altogether if it would be dropped
+    def _enabled(self) -> bool:
+        is_enabled_for = getattr(self._logger, 'is_enabled_for', None)
+        return is_enabled_for is None or is_enabled_for(self._level)
 
     def __call__(self, *args: object, **kwargs: object) -> object:
         assert callable(self._target)
-        rv: object = None
-        try:  # noqa: WPS501
+        start = time.perf_counter_ns()
+
+        try:
             rv = self._target(*args, **kwargs)
-        finally:
-            self._logger.log(
-                self._name or 'unknown',
-                type='method',
-                args=args,
-                kwargs=kwargs,
-                retval=rv,
-                levelno=self._level,
-                logger=self._name,
-            )
+        except BaseException as exc:
+            self._log_call(start, args, kwargs, error=exc)
+            raise
+
+        # Coroutines and async generators are logged when they complete. They're
+        # wrapped in place, so they run on the caller's task without extra loop hops
+        if inspect.iscoroutine(rv):
+            return self._await(start, args, kwargs, rv)
+        if inspect.isasyncgen(rv):
+            return self._iterate(start, args, kwargs, rv)
+
+        self._log_call(start, args, kwargs, rv)
+        return rv
+
+    async def _await(
+        self, start: int, args: Tuple[object, ...], kwargs: Dict[str, object], coroutine: Awaitable[object]
+    ) -> object:
+        try:
+            rv = await coroutine
+        except BaseException as exc:
+            self._log_call(start, args, kwargs, error=exc)
+            raise
 
+        self._log_call(start, args, kwargs, rv)
         return rv
 
+    async def _iterate(
+        self,
+        start: int,
+        args: Tuple[object, ...],
+        kwargs: Dict[str, object],
+        generator: AsyncGenerator[object, None],
+    ) -> AsyncGenerator[object, None]:
+        items = 0
+        error: Optional[BaseException] = None
+
+        try:  # noqa: WPS501
+            async for item in generator:
+                items += 1
+                yield item
+        except GeneratorExit:
+            # The consumer stopped early
+            raise
+        except BaseException as exc:
+            error = exc
+            raise
+        finally:
+            await generator.aclose()
+            self._log_call(start, args, kwargs, error=error, items=items)
+
+    def _log_call(
+        self,
+        start: int,
+        args: Tuple[object, ...],
+        kwargs: Dict[str, object],
+        rv: object = None,
+        error: Optional[BaseException] = None,
+        **fields: object,
+    ):
+        duration_ms = (time.perf_counter_ns() - start) / 1e6
+
+        if not self._enabled():
+            return
+
+        if error is not None:
+            fields['error'] = error
+
+        self._logger.log(
+            self._name or 'unknown',
+            type='method',
+            args=args,
+            kwargs=kwargs,
+            retval=rv,
+            duration_ms=duration_ms,
+            levelno=self._level,
+            logger=self._name,
+            **fields,
+        )
+
     def __getattr__(self, name: str):
         attr = getattr(self._target, name)
 
         if callable(attr):
-            return LoggingProxy(attr, name=f'{self._name}.{name}', level=self._level)
-        else:
+            return self._child(name, attr)
+        elif self._enabled():
             self._logger.log(
                 f'{self._name}.{name}',
                 type='attribute',
@@ -46,3 +122,15 @@ class LoggingProxy:
             )
 
         return attr
+
+    def _child(self, name: str, attr: object) -> 'LoggingProxy':
+        cached = self._children.get(name)
+
+        # Bound methods are new objects on each access, but they compare equal
+        # if they bind the same function to the same object
+        if cached is not None and (cached[0] is attr or (inspect.ismethod(attr) and cached[0] == attr)):
+            return cached[1]
+
+        child = LoggingProxy(attr, name=f'{self._name}.{name}', level=self._level)
+        self._children[name] = (attr, child)
+        return child
@@ -0,0 +1,230 @@
+"""Sampling and rate limiting of repetitive events."""
+
+import atexit
+import logging
+import random
+import threading
+import time
+import weakref
+from typing import Callable, Dict, Hashable, Mapping, Optional, Tuple, Union
+
+import structlog
+
+from outcome.logkit import fork
+from outcome.logkit.levels import level_numbers, levels, parse_level
+from outcome.logkit.logger import get_logger
+from outcome.logkit.types import EventDict
+
+summary_logger_name = 'outcome.logkit.sampling'
+summary_event = 'log_events_suppressed'
+
+# Events at, or above, this level are never sampled
+_unsampled_level = logging.ERROR
+
+EventKey = Tuple[Hashable, Hashable]
+
+
+class TokenBucket:
+    """Allows `rate` events per second, with bursts of up to `burst` events.
+
+    The bucket isn't locked: when threads race on the last token, a few extra
+    events can get through, but no thread ever waits on another.
+    """
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: float, now: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> bool:
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+        if tokens < 1:
+            self.tokens = tokens
+            return False
+
+        self.tokens = tokens - 1
+        return True
+
+
+class SamplingProcessor:
+    """Drops repetitive events.
+
+    Each (logger, event) pair gets its own token bucket, and `sample_rates` keeps a
+    fraction of the events of a level, e.g. `{'debug': 0.1}`. Errors are never dropped.
+
+    The number of dropped events is reported in a `log_events_suppressed` event, at most
+    once per `summary_interval`: by the next event that goes through the processor, or by
+    a timer if there's none, and at exit.
+
+    The processor needs to run after the `LogLevelProcessor`, so events that are below
+    the log level don't take tokens.
+    """
+
+    def __init__(
+        self,
+        rate: Optional[float] = 10,
+        burst: int = 100,
+        sample_rates: Optional[Mapping[Union[int, str], float]] = None,
+        summary_interval: float = 60,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+        random: Callable[[], float] = random.random,  # noqa: WPS442
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.sample_rates = self.normalize_sample_rates(sample_rates or {})
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+
+        self._clock = clock
+        self._random = random
+        self._buckets: Dict[EventKey, TokenBucket] = {}
+        self._suppressed: Dict[EventKey, int] = {}
+        self._summary_lock = threading.Lock()
+        self._next_summary = clock() + summary_interval
+        self._timer: Optional[threading.Timer] = None
+
+        _processors.add(self)
+        fork.register(self)
+
+    @staticmethod
+    def normalize_sample_rates(sample_rates: Mapping[Union[int, str], float]) -> Dict[str, float]:
+        normalized: Dict[str, float] = {}
+
+        for level, sample_rate in sample_rates.items():
+            name = levels.get(parse_level(level))
+            if name is None:
+                raise ValueError(f'Sample rates need a standard level: {level}')
+            if not 0 <= sample_rate <= 1:
+                raise ValueError(f'Invalid sample rate for {level}: {sample_rate}')
+            normalized[name] = sample_rate
+
+        return normalized
+
+    @property
+    def suppressed_count(self) -> int:
+        return sum(self._suppressed.values())
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+        level = event_dict.get('level')
+        logger_name = event_dict.get('logger')
+
+        if level_numbers.get(str(level), logging.INFO) >= _unsampled_level or logger_name == summary_logger_name:
+            return event_dict
+
+        now = self._clock()
+
+        if self._suppressed and now >= self._next_summary:
+            self.emit_summary(now)
+
+        key = (logger_name, event_dict.get('event'))
+
+        try:
+            hash(key)
+        except TypeError:
+            # Unhashable events aren't sampled
+            return event_dict
+
+        if not self.keep(key, str(level), now):
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            if self._timer is None:
+                self._schedule_summary(now)
+            raise structlog.DropEvent
+
+        return event_dict
+
+    def keep(self, key: EventKey, level: str, now: float) -> bool:
+        sample_rate = self.sample_rates.get(level)
+        if sample_rate is not None and self._random() >= sample_rate:
+            return False
+
+        if self.rate is None:
+            return True
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                # Don't grow without bounds when event names are dynamic
+                self._buckets = {}
+            bucket = self._buckets.setdefault(key, TokenBucket(self.rate, self.burst, now))
+
+        return bucket.take(now)
+
+    # The summary is due at the end of the interval, even if no other event comes along
+    def _schedule_summary(self, now: float):
+        with self._summary_lock:
+            if self._timer is not None:
+                return
+
+            timer = threading.Timer(max(self._next_summary - now, 0), self._on_timer)
+            timer.daemon = True
+            timer.start()
+            self._timer = timer
+
+    def _on_timer(self):
+        self._timer = None
+
+        # The next drop schedules the timer again
+        if self._suppressed and structlog.is_configured():
+            now = self._clock()
+            self.emit_summary(now)
+
+            # The summary wasn't due yet, or another thread was emitting it
+            if self._suppressed:
+                self._schedule_summary(now)
+
+    # Report the events dropped so far, without waiting for the end of the interval
+    def flush(self):
+        if self._suppressed and structlog.is_configured():
+            self.emit_summary(self._clock(), force=True)
+
+    def cancel_timer(self):
+        timer = self._timer
+        if timer is not None:
+            timer.cancel()
+            self._timer = None
+
+    def close(self):
+        self.cancel_timer()
+        self.flush()
+
+    def emit_summary(self, now: float, force: bool = False):
+        # Only one thread emits the summary, the others carry on without waiting
+        if not self._summary_lock.acquire(blocking=False):
+            return
+
+        try:  # noqa: WPS501
+            if now < self._next_summary and not force:
+                return
+            self._next_summary = now + self.summary_interval
+            suppressed, self._suppressed = self._suppressed, {}
+        finally:
+            self._summary_lock.release()
+
+        events: Dict[str, int] = {}
+        for (logger_name, event), count in suppressed.items():
+            name = f'{logger_name}:{event}'
+            events[name] = events.get(name, 0) + count
+
+        get_logger(summary_logger_name).warning(summary_event, suppressed_count=sum(events.values()), suppressed_events=events)
+
+    # The lock could have been held by another thread of the parent, and the timer doesn't survive the fork
+    def _after_fork_in_child(self):
+        self._summary_lock = threading.Lock()
+        self._timer = None
+
+
+_processors: 'weakref.WeakSet[SamplingProcessor]' = weakref.WeakSet()
+
+
+def _close_processors():
+    for processor in list(_processors):
+        processor.close()
+
+
+atexit.register(_close_processors)
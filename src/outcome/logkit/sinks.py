@@ -0,0 +1,566 @@
+"""Output sinks for the structlog pipeline."""
+
+import atexit
+import multiprocessing
+import multiprocessing.util
+import os
+import re
+import socket
+import sys
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
+from enum import Enum
+from typing import BinaryIO, Deque, List, Optional, Tuple, Union
+
+from outcome.logkit import fork
+
+Message = Union[str, bytes, bytearray]
+
+_terminator = b'\n'
+
+
+def to_bytes(message: Message) -> bytes:
+    if isinstance(message, str):
+        return message.encode('utf-8')
+    return bytes(message)
+
+
+class OverflowPolicy(Enum):
+    block = 'block'
+    drop_newest = 'drop_newest'
+    drop_oldest = 'drop_oldest'
+
+
+class Sink(ABC):
+    """Base class for logkit sinks.
+
+    A sink is both the structlog logger factory and the logger it produces. Whatever
+    the final processor returns is passed to the method named after the log level,
+    and every one of those methods forwards to `write`.
+    """
+
+    def __call__(self, *args: object) -> 'Sink':
+        return self
+
+    @abstractmethod
+    def write(self, message: Message) -> None:  # pragma: no cover
+        ...
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        return self.flush(timeout)
+
+    def msg(self, message: Message) -> None:
+        self.write(message)
+
+    log = msg
+    debug = msg
+    info = msg
+    warn = msg
+    warning = msg
+    err = msg
+    error = msg
+    critical = msg
+    exception = msg
+    failure = msg
+    fatal = msg
+
+
+class BackgroundSink(Sink):  # noqa: WPS214,WPS230
+    """A sink that hands events to a writer thread.
+
+    The calling thread only appends the rendered event to a bounded ring buffer. A
+    daemon thread drains the buffer in batches and writes each batch to the stream
+    with a single call. When the buffer is full, `policy` decides whether the caller
+    waits, or whether the newest or oldest event is dropped.
+    """
+
+    def __init__(
+        self,
+        stream: Optional[BinaryIO] = None,
+        capacity: int = 10000,
+        policy: OverflowPolicy = OverflowPolicy.block,
+        batch_size: int = 512,
+        flush_timeout: float = 5.0,
+    ):
+        self.stream = stream or sys.stdout.buffer
+        self.capacity = capacity
+        self.policy = policy
+        self.batch_size = batch_size
+        self.flush_timeout = flush_timeout
+
+        self._dropped = 0
+        self._reset()
+
+        _sinks.add(self)
+        fork.register(self)
+
+    @property
+    def dropped(self) -> int:
+        return self._dropped
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._drained = threading.Condition(self._lock)
+        self._queue: Deque[bytes] = deque()
+        self._in_flight = 0
+        self._closed = False
+        self._writer: Optional[threading.Thread] = None
+
+    def write(self, message: Message) -> None:
+        data = to_bytes(message)
+
+        with self._lock:
+            # Once closed, there's no writer left, so we write on the calling thread
+            if self._closed:
+                self.write_batch([data])
+                return
+
+            if self._writer is None:
+                self._start()
+
+            if len(self._queue) >= self.capacity:
+                if self.policy is OverflowPolicy.drop_newest:
+                    self._dropped += 1
+                    return
+                elif self.policy is OverflowPolicy.drop_oldest:
+                    self._queue.popleft()
+                    self._dropped += 1
+                else:
+                    while len(self._queue) >= self.capacity and not self._closed:
+                        self._not_full.wait()
+
+                    if self._closed:
+                        self.write_batch([data])
+                        return
+
+            self._queue.append(data)
+            self._not_empty.notify()
+
+    def write_batch(self, batch: List[bytes]) -> None:
+        self.stream.write(_terminator.join(batch) + _terminator)
+        self.stream.flush()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        with self._lock:
+            while self._queue or self._in_flight:
+                if deadline is None:
+                    self._drained.wait()
+                    continue
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._drained.wait(remaining)
+
+        return True
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            self._not_full.notify_all()
+
+        flushed = self.flush(timeout)
+
+        writer = self._writer
+        if writer is not None and flushed:
+            writer.join(timeout)
+
+        return flushed
+
+    def _start(self):
+        _register_finalizer()
+        self._writer = threading.Thread(target=self._run, name='logkit-sink', daemon=True)
+        self._writer.start()
+
+    def _run(self):  # noqa: WPS231
+        while True:
+            with self._lock:
+                while not self._queue and not self._closed:
+                    self._not_empty.wait()
+
+                if not self._queue:
+                    return
+
+                batch_size = min(self.batch_size, len(self._queue))
+                batch = [self._queue.popleft() for _ in range(batch_size)]
+                self._in_flight = batch_size
+                self._not_full.notify_all()
+
+            try:
+                self.write_batch(batch)
+            except Exception:
+                # There's nowhere to report a failing stream, so we account for the loss
+                self._dropped += batch_size
+
+            with self._lock:
+                self._in_flight = 0
+                if not self._queue:
+                    self._drained.notify_all()
+
+    # Fork handling: the parent drains what it can before the fork, and holds
+    # the lock so the child inherits a consistent buffer. The child gets fresh
+    # locks and an empty buffer, and starts its own writer on first use.
+    def _before_fork(self):
+        self.flush(self.flush_timeout)
+        self._lock.acquire()
+
+    def _after_fork_in_parent(self):
+        self._lock.release()
+
+    def _after_fork_in_child(self):
+        closed = self._closed
+        self._reset()
+        self._closed = closed
+
+
+class FsyncPolicy(Enum):
+    never = 'never'
+    interval = 'interval'
+    batch = 'batch'
+
+
+# Rotated segments are named `<path>.<timestamp>.<n>`
+_segment_suffix = re.compile(r'\.(\d{8}-\d{6})\.(\d+)$')
+_segment_timestamp = '%Y%m%d-%H%M%S'
+
+# How much of a segment is read at a time, when looking for the end of its content
+_scan_chunk = 64 * 1024
+
+_fdatasync = getattr(os, 'fdatasync', os.fsync)
+
+
+# The end of the content of a segment, ignoring preallocated space left by a crash
+def content_end(fd: int, size: int) -> int:
+    end = size
+    while end > 0:
+        start = max(0, end - _scan_chunk)
+        content = os.pread(fd, end - start, start).rstrip(b'\0')
+        if content:
+            return start + len(content)
+        end = start
+    return 0
+
+
+class FileSink(BackgroundSink):  # noqa: WPS214,WPS230
+    """A background sink that writes to rotating segment files.
+
+    The writer thread writes the batches into segments that were preallocated to
+    `max_bytes`, so the file doesn't grow on every write. The active segment is padded
+    with zeros until it's rotated, or until the sink is closed, when it's truncated to
+    its content.
+
+    A segment is rotated when the next event doesn't fit, even in the middle of a batch,
+    or `interval` seconds after it was opened. An event larger than `max_bytes` gets a
+    segment of its own. Rotated segments are renamed to `<path>.<timestamp>.<n>`, and a
+    background thread removes all but the `backup_count` most recent segments. Rotation happens on the writer thread, so it
+    never blocks the loggers.
+
+    `fsync` determines when the data is synced to disk: after each batch, at most every
+    `fsync_interval` seconds, or never. Segments are synced when they are rotated, unless
+    the policy is `never`.
+
+    A forked process writes to its own file, `<path>.<pid>`.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 64 * 1024 * 1024,
+        interval: Optional[float] = None,
+        backup_count: int = 5,
+        fsync: FsyncPolicy = FsyncPolicy.interval,
+        fsync_interval: float = 1.0,
+        preallocate: bool = True,
+        capacity: int = 10000,
+        policy: OverflowPolicy = OverflowPolicy.block,
+        batch_size: int = 512,
+        flush_timeout: float = 5.0,
+    ):
+        self.base_path = os.path.abspath(path)
+        self.path = self.base_path
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backup_count = backup_count
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.preallocate = preallocate
+
+        self._fd: Optional[int] = None
+        self._offset = 0
+        self._opened_at = 0.0
+        self._synced_at = 0.0
+        self._cleaner: Optional[threading.Thread] = None
+
+        super().__init__(
+            capacity=capacity,
+            policy=policy,
+            batch_size=batch_size,
+            flush_timeout=flush_timeout,
+        )
+
+    def _reset(self):
+        super()._reset()
+        self._file_lock = threading.Lock()
+
+    def write_batch(self, batch: List[bytes]) -> None:
+        with self._file_lock:
+            now = time.monotonic()
+
+            if self._fd is None:
+                self._open(now)
+            elif self._should_rotate(now):
+                self._rotate(now)
+
+            # The batch is split where the segment is full
+            start = 0
+            while start < len(batch):
+                end = self._fitting(batch, start)
+
+                if end == start:
+                    # An event larger than a segment gets a segment of its own
+                    if self._offset == 0:
+                        end += 1
+                    else:
+                        self._rotate(now)
+                        continue
+
+                self._write(_terminator.join(batch[start:end]) + _terminator)
+                start = end
+
+            self._sync(now)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        flushed = super().close(timeout)
+
+        with self._file_lock:
+            self._finish_segment()
+
+        return flushed
+
+    def segments(self) -> List[str]:
+        directory, name = os.path.split(self.path)
+        found: List[Tuple[Tuple[str, int], str]] = []
+
+        for entry in os.listdir(directory):
+            if not entry.startswith(name):
+                continue
+
+            match = _segment_suffix.fullmatch(entry[len(name) :])  # noqa: E203
+            if match:
+                found.append(((match.group(1), int(match.group(2))), os.path.join(directory, entry)))
+
+        return [segment for _, segment in sorted(found)]
+
+    def cleanup(self):
+        segments = self.segments()
+        expired = segments[: max(0, len(segments) - self.backup_count)]  # noqa: E203
+
+        for segment in expired:
+            try:
+                os.remove(segment)
+            except FileNotFoundError:  # pragma: no cover
+                pass
+
+    def _open(self, now: float):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)  # noqa: WPS432
+
+        self._fd = fd
+        self._offset = content_end(fd, os.fstat(fd).st_size)
+        self._opened_at = now
+        self._synced_at = now
+
+        # No more preallocation once we're closed, as nothing would truncate the segment
+        if self.preallocate and not self._closed and self._offset < self.max_bytes:
+            self._preallocate(fd)
+
+    def _preallocate(self, fd: int):
+        fallocate = getattr(os, 'posix_fallocate', None)
+
+        try:
+            if fallocate is None:
+                raise OSError('posix_fallocate is not available')
+            fallocate(fd, self._offset, self.max_bytes - self._offset)
+        except OSError:
+            # Not supported by the platform, or the filesystem
+            self.preallocate = False
+
+    def _should_rotate(self, now: float) -> bool:
+        return self.interval is not None and now - self._opened_at >= self.interval
+
+    # The end of the events, from `start`, that fit in the rest of the segment
+    def _fitting(self, batch: List[bytes], start: int) -> int:
+        room = self.max_bytes - self._offset
+        end = start
+
+        while end < len(batch) and len(batch[end]) < room:
+            room -= len(batch[end]) + 1
+            end += 1
+
+        return end
+
+    def _rotate(self, now: float):
+        self._finish_segment()
+        os.rename(self.path, self._rotated_path())
+        self._open(now)
+
+        self._cleaner = threading.Thread(target=self.cleanup, name='logkit-sink-cleanup', daemon=True)
+        self._cleaner.start()
+
+    def _rotated_path(self) -> str:
+        timestamp = time.strftime(_segment_timestamp)
+        n = 0
+        while os.path.exists(f'{self.path}.{timestamp}.{n}'):
+            n += 1
+        return f'{self.path}.{timestamp}.{n}'
+
+    def _write(self, data: bytes):
+        view = memoryview(data)
+        while view:
+            written = os.pwrite(self._fd, view, self._offset)  # type: ignore
+            self._offset += written
+            view = view[written:]
+
+    def _sync(self, now: float):
+        if self.fsync is FsyncPolicy.batch:
+            _fdatasync(self._fd)
+        elif self.fsync is FsyncPolicy.interval and now - self._synced_at >= self.fsync_interval:
+            _fdatasync(self._fd)
+            self._synced_at = now
+
+    def _finish_segment(self):
+        fd = self._fd
+        if fd is None:
+            return
+
+        os.ftruncate(fd, self._offset)
+        if self.fsync is not FsyncPolicy.never:
+            os.fsync(fd)
+        os.close(fd)
+        self._fd = None
+
+    def _after_fork_in_child(self):
+        super()._after_fork_in_child()
+
+        # The parent keeps writing to the inherited segment
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+        self.path = f'{self.base_path}.{os.getpid()}'
+
+
+# The largest event that's sent to the aggregating process, larger ones are written by the sender
+_max_datagram = 256 * 1024
+
+# Tells the aggregating thread to stop
+_stop = b''
+
+
+class AggregatingSink(Sink):
+    """Funnels the events of forked processes to a single writer.
+
+    The process that creates the sink writes to `sink` directly. The processes forked
+    from it send each event as a single datagram over a unix socket, and a thread of the
+    creating process writes them to `sink`. A datagram is delivered whole, so events
+    from different processes never interleave.
+
+    Events that are too large for a datagram, or that are sent after the creating
+    process has closed the sink, are written by the forked process itself.
+    """
+
+    def __init__(self, sink: Optional[Sink] = None, flush_timeout: float = 5.0):
+        self.sink = sink or BackgroundSink()
+        self.flush_timeout = flush_timeout
+
+        self._pid = os.getpid()
+        self._receiver, self._sender = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._reader = threading.Thread(target=self._run, name='logkit-aggregator', daemon=True)
+        self._reader.start()
+
+        _sinks.add(self)
+        fork.register(self)
+
+    def write(self, message: Message) -> None:
+        if os.getpid() == self._pid:
+            self.sink.write(message)
+            return
+
+        data = to_bytes(message)
+
+        if not data or len(data) > _max_datagram:
+            self.sink.write(data)
+            return
+
+        try:
+            self._sender.send(data)
+        except OSError:
+            self.sink.write(data)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        return self.sink.flush(timeout)
+
+    def close(self, timeout: Optional[float] = None) -> bool:
+        self.detach(timeout)
+        return self.sink.close(timeout)
+
+    # Stops receiving the events of the forked processes, but leaves `sink` open
+    def detach(self, timeout: Optional[float] = None):
+        if os.getpid() == self._pid and self._reader.is_alive():
+            # The datagrams are received in order, so everything sent before is written
+            self._sender.send(_stop)
+            self._reader.join(timeout)
+
+            # From now on, the forked processes write their own events
+            if not self._reader.is_alive():
+                self._receiver.close()
+
+    def _run(self):
+        buffer = bytearray(_max_datagram)
+        view = memoryview(buffer)
+
+        while True:
+            size = self._receiver.recv_into(buffer)
+            if not size:
+                return
+            self.sink.write(bytes(view[:size]))
+
+    def _after_fork_in_child(self):
+        # Only the creating process receives
+        self._receiver.close()
+
+
+_sinks: 'weakref.WeakSet[Union[BackgroundSink, AggregatingSink]]' = weakref.WeakSet()
+
+
+def _close_sinks():
+    for sink in list(_sinks):
+        sink.close(sink.flush_timeout)
+
+
+atexit.register(_close_sinks)
+
+# The process in which the sinks are closed by a `multiprocessing` finalizer
+_finalizer_pid: Optional[int] = None
+
+
+# `multiprocessing` ends the processes it forks with `os._exit`, which skips `atexit`
+# but runs its own finalizers. They're cleared when the process starts, so the
+# finalizer is registered when the first writer thread of the process starts
+def _register_finalizer():
+    global _finalizer_pid  # noqa: WPS420
+
+    pid = os.getpid()
+    if _finalizer_pid != pid and multiprocessing.parent_process() is not None:
+        _finalizer_pid = pid  # noqa: WPS442
+        multiprocessing.util.Finalize(None, _close_sinks, exitpriority=0)
@@ -1,41 +1,140 @@
 """Outputs Stackdriver-compliant JSON."""
 
+import json
+import time
 from datetime import datetime
-from typing import Union, cast
+from typing import Any, Callable, Optional, Union, cast
 
 import structlog
 
+from outcome.logkit import counters
+from outcome.logkit.encoders import Encoder, JSONEncoder, SerializerEncoder
+from outcome.logkit.limits import SizeLimits, cap_event, truncated_key
+from outcome.logkit.sinks import Sink
 from outcome.logkit.types import EventDict
 
+# Loggers that write bytes as they are, so we don't need to decode the output
+_bytes_loggers = (structlog.BytesLogger, Sink)
+
+_source_location = 'logging.googleapis.com/sourceLocation'
+
+
+# The fields kept when an entry has to be cut down to the maximum line size
+_protected_keys = frozenset(('severity', 'message', 'timestamp', 'logger', _source_location, truncated_key))
+
+# The fields of the entry that replaces one whose protected fields don't fit
+_minimal_keys = frozenset(('severity', 'message', 'timestamp', truncated_key))
+
 
 class StackdriverRenderer(structlog.processors.JSONRenderer):
+    """Renders the events as Stackdriver entries, within the size limits.
+
+    Like structlog's `JSONRenderer`, it takes a `json.dumps`-like serializer and its
+    arguments. An `encoder` replaces both.
+    """
+
+    def __init__(
+        self,
+        serializer: Callable[..., Union[str, bytes]] = json.dumps,
+        *,
+        encoder: Optional[Encoder] = None,
+        limits: Optional[SizeLimits] = None,
+        **dumps_kw: Any,
+    ):
+        super().__init__(serializer, **dumps_kw)
+
+        if encoder is None:
+            encoder = JSONEncoder(**dumps_kw) if serializer is json.dumps else SerializerEncoder(serializer, **dumps_kw)
+
+        self.encoder = encoder
+        self.limits = limits or SizeLimits()
+
     def __call__(self, logger: object, name: str, event_dict: EventDict) -> Union[str, bytes]:
-        return super().__call__(logger, name, self.format_for_stackdriver(event_dict))
+        return self.render(logger, self.format_for_stackdriver(event_dict))
+
+    # Encode a formatted event dict, within the size limits
+    def render(self, logger: object, formatted_dict: EventDict) -> Union[str, bytes]:
+        start = time.perf_counter_ns()
+
+        encode = self.encoder.dumpb if isinstance(logger, _bytes_loggers) else self.encoder.dumps
+        rendered: Union[str, bytes] = encode(cap_event(formatted_dict, self.limits))
 
+        if line_size(rendered) > self.limits.max_line_bytes:
+            rendered = self.shrink(formatted_dict, encode)
+
+        counters.count_rendered(line_size(rendered), time.perf_counter_ns() - start)
+        return rendered
+
+    # Replace the largest fields by their size until the entry fits on a line
+    def shrink(self, formatted_dict: EventDict, encode: Callable[[object], Union[str, bytes]]) -> Union[str, bytes]:
+        truncated = formatted_dict.setdefault(truncated_key, [])
+
+        sizes = [(line_size(encode({key: value})), key) for key, value in formatted_dict.items() if key not in _protected_keys]
+        for size, key in sorted(sizes, key=lambda size_key: size_key[0], reverse=True):
+            formatted_dict[key] = f'<truncated {size} bytes>'
+            if key not in truncated:
+                truncated.append(key)
+
+            rendered = encode(formatted_dict)
+            if line_size(rendered) <= self.limits.max_line_bytes:
+                return rendered
+
+        # The protected fields are too large on their own. Even escaped, each character takes at most 12 bytes
+        message = str(formatted_dict.get('message', ''))
+        minimal = {
+            'severity': formatted_dict.get('severity'),
+            'message': message[: self.limits.max_line_bytes // 24],
+            'timestamp': formatted_dict.get('timestamp'),
+            truncated_key: ['message', *(key for key in formatted_dict if key not in _minimal_keys)],
+        }
+        return encode(minimal)
+
+    # The event dict is reshaped in place, the renderer is the last processor
+    # so no-one else holds on to it. A formatted `timestamp_str` replaces the event's timestamp
     @classmethod
-    def format_for_stackdriver(cls, event_dict: EventDict):
-        formatted_dict = dict(event_dict)
-        level = formatted_dict.pop('level', None)
+    def format_for_stackdriver(cls, event_dict: EventDict, timestamp_str: Optional[object] = None):
+        level = event_dict.pop('level', None)
         if level:
-            formatted_dict['severity'] = level
+            event_dict['severity'] = level
 
-        event = formatted_dict.pop('event', None)
+        event = event_dict.pop('event', None)
         if event:
-            formatted_dict['message'] = event
+            event_dict['message'] = event
         else:
-            formatted_dict['message'] = ''
+            event_dict['message'] = ''
 
-        timestamp = formatted_dict.pop('timestamp', None)
+        timestamp = event_dict.pop('timestamp', None)
+        if timestamp_str is None:
+            timestamp_str = cls.format_timestamp(timestamp)
+
+        event_dict['timestamp'] = timestamp_str
+
+        # Added by the CallsiteProcessor
+        pathname = event_dict.pop('pathname', None)
+        if pathname:
+            event_dict[_source_location] = {
+                'file': pathname,
+                'line': event_dict.pop('lineno', None),
+                'function': event_dict.pop('func_name', None),
+            }
+
+        return event_dict
+
+    @staticmethod
+    def format_timestamp(timestamp: object) -> object:
         if timestamp:
             try:
                 ts = datetime.fromtimestamp(cast(float, timestamp)).isoformat('T')
-                timestamp_str = f'{ts}Z'
+                return f'{ts}Z'
             except Exception:
-                timestamp_str = timestamp
-        else:
-            ts = datetime.now().isoformat('T')
-            timestamp_str = f'{ts}Z'
+                return timestamp
+
+        ts = datetime.now().isoformat('T')
+        return f'{ts}Z'
 
-        formatted_dict['timestamp'] = timestamp_str
 
-        return formatted_dict
+# The size of a rendered line in bytes, a string's characters take up to 4 bytes in UTF-8
+def line_size(rendered: Union[str, bytes]) -> int:
+    if isinstance(rendered, bytes) or rendered.isascii():
+        return len(rendered)
+    return len(rendered.encode('utf-8'))
@@ -53,6 +53,13 @@ class StructLogger(Protocol):  # noqa: WPS214  # pragma: no cover
     def exception(self, message: str, **kwargs: object) -> None:
         ...
 
+    def is_enabled_for(self, level: int) -> bool:
+        ...
+
+    @property
+    def debug_enabled(self) -> bool:
+        ...
+
     def bind(self: L, **kwargs: object) -> L:
         ...
 
@@ -0,0 +1,294 @@
+import asyncio
+import logging
+import os
+import threading
+from functools import partial
+from typing import List
+from unittest.mock import Mock, patch
+
+import pytest
+import structlog
+
+from outcome.logkit import aio, context
+from outcome.logkit.bound import make_level_bound_logger
+from outcome.logkit.callsite import CallsiteProcessor
+from outcome.logkit.logger import reset_loggers
+from outcome.logkit.types import EventDict
+
+
+class Capture:
+    def __init__(self):
+        self.entries: List[EventDict] = []
+
+    def __call__(self, logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+        self.entries.append({**event_dict, 'method_name': method_name, 'thread': threading.current_thread().name})
+        raise structlog.DropEvent
+
+
+@pytest.fixture
+def capture():
+    capture = Capture()
+
+    structlog.configure(
+        processors=[context.use_backend('contextvar'), CallsiteProcessor(), capture],
+        wrapper_class=make_level_bound_logger(logging.INFO),
+        logger_factory=structlog.ReturnLoggerFactory(),
+    )
+    reset_loggers()
+
+    yield capture
+
+    asyncio.run(aio.aclose())
+    context.use_backend('structlog')
+    structlog.reset_defaults()
+    reset_loggers()
+
+
+def log_from_loop(func):
+    async def main():  # noqa: WPS430
+        func()
+        await aio.flush()
+
+    asyncio.run(main())
+
+
+class TestAsyncLogger:
+    def test_runs_on_worker(self, capture: Capture):
+        logger = aio.get_async_logger('async')
+
+        log_from_loop(lambda: logger.info('hello', user_id=1))
+
+        assert len(capture.entries) == 1
+        entry = capture.entries[0]
+        assert entry['event'] == 'hello'
+        assert entry['user_id'] == 1
+        assert entry['name'] == 'async'
+        assert entry['thread'] == 'logkit-async'
+
+    def test_follows_reconfiguration(self, capture: Capture):
+        logger = aio.get_async_logger('async')
+        assert logger.min_level == logging.INFO
+
+        structlog.configure(processors=[capture], wrapper_class=make_level_bound_logger(logging.DEBUG))
+        reset_loggers()
+
+        log_from_loop(lambda: logger.debug('debug'))
+
+        assert logger.min_level == logging.DEBUG
+        assert [entry['event'] for entry in capture.entries] == ['debug']
+        assert 'pathname' not in capture.entries[0]
+
+    def test_context(self, capture: Capture):
+        logger = aio.get_async_logger('async')
+
+        async def task(request_id: str):  # noqa: WPS430
+            context.add(request_id=request_id)
+            await asyncio.sleep(0)
+            logger.info('in_task')
+            context.remove('request_id')
+            logger.info('after_task')
+
+        async def main():  # noqa: WPS430
+            await asyncio.gather(task('a'), task('b'))
+            await logger.flush()
+
+        asyncio.run(main())
+
+        assert sorted(e.get('request_id', '-') for e in capture.entries if e['event'] == 'in_task') == ['a', 'b']
+        assert [e.get('request_id') for e in capture.entries if e['event'] == 'after_task'] == [None, None]
+
+    def test_level_check(self, capture: Capture):
+        logger = aio.get_async_logger('async')
+
+        assert not logger.debug_enabled
+        assert logger.is_enabled_for(logging.INFO)
+
+        with patch.object(aio._worker, 'submit') as submit:
+            logger.debug('dropped')
+            logger.log('dropped', levelno=logging.DEBUG)
+
+        submit.assert_not_called()
+
+        log_from_loop(lambda: logger.debug('explicit', levelno=logging.ERROR))
+        log_from_loop(lambda: logger.log('logged', levelno=logging.WARNING))
+
+        assert [e['event'] for e in capture.entries] == ['explicit', 'logged']
+
+    def test_exception(self, capture: Capture):
+        logger = aio.get_async_logger('async')
+
+        def fail():  # noqa: WPS430
+            try:
+                raise ValueError('failed')
+            except ValueError:
+                logger.exception('failure')
+                logger.error('no_exc_info', exc_info=False)
+
+        log_from_loop(fail)
+
+        exc_info = capture.entries[0]['exc_info']
+        assert exc_info[0] is ValueError
+        assert capture.entries[1]['exc_info'] is False
+
+    def test_callsite(self, capture: Capture):
+        logger = aio.get_async_logger('async')
+
+        log_from_loop(lambda: logger.warning('located'))
+
+        entry = capture.entries[0]
+        assert entry['pathname'] == __file__
+        assert entry['func_name'] == '<lambda>'
+
+    def test_stack_info(self, capture: Capture):
+        logger = aio.get_async_logger('async')
+
+        def log_with_stack():  # noqa: WPS430
+            logger.info('with_stack', stack_info=True)
+            logger.info('without_stack', stack_info=False)
+
+        log_from_loop(log_with_stack)
+
+        stack = capture.entries[0]['stack']
+        assert 'stack_info' not in capture.entries[0]
+        assert stack.startswith('Stack (most recent call last):')
+        assert stack.rstrip().endswith("logger.info('with_stack', stack_info=True)")
+        assert 'log_with_stack' in stack
+        assert 'stack' not in capture.entries[1]
+
+    def test_bind(self, capture: Capture):
+        logger = aio.get_async_logger('async').bind(user_id=1, tenant='tenant').unbind('tenant')
+
+        assert isinstance(logger, aio.AsyncLogger)
+
+        async def main():  # noqa: WPS430
+            logger.info('bound')
+            await logger.aclose()
+
+        asyncio.run(main())
+
+        assert capture.entries[0]['user_id'] == 1
+        assert 'tenant' not in capture.entries[0]
+
+    def test_plain_logger(self):
+        logger = aio.AsyncLogger(Mock(spec=['info']))
+
+        assert logger.min_level == logging.NOTSET
+        assert logger.debug_enabled
+
+        log_from_loop(lambda: logger.info('plain'))
+
+        logger.logger.info.assert_called_once_with('plain')
+
+
+class TestWorker:
+    def test_flush_without_thread(self):
+        worker = aio.Worker()
+        asyncio.run(worker.flush())
+
+        assert worker.close()
+
+    def test_aclose_restarts(self):
+        worker = aio.Worker()
+        calls = []
+
+        async def main():  # noqa: WPS430
+            worker.submit(lambda: calls.append(1))
+            await worker.aclose()
+            worker.submit(lambda: calls.append(2))
+            await worker.flush()
+
+        asyncio.run(main())
+
+        assert calls == [1, 2]
+        assert worker.close(5)
+        assert worker._thread is None
+
+    def test_capacity(self):
+        worker = aio.Worker(capacity=2)
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        async def main():  # noqa: WPS430
+            worker.submit(lambda: started.set() or release.wait(5))
+            started.wait(5)
+
+            for n in range(4):
+                worker.submit(partial(calls.append, n))
+
+            flushed = asyncio.ensure_future(worker.flush())
+            release.set()
+            await flushed
+
+        asyncio.run(main())
+
+        assert calls == [0, 1]
+        assert worker.dropped == 2
+        assert worker.close(5)
+
+    def test_error(self, capsys: pytest.CaptureFixture):
+        worker = aio.Worker()
+
+        def fail():  # noqa: WPS430
+            raise ValueError('failed')
+
+        worker.submit(fail)
+        assert worker.close(5)
+
+        assert 'ValueError: failed' in capsys.readouterr().err
+
+    def test_resolve_done_future(self):
+        loop = asyncio.new_event_loop()
+        future = loop.create_future()
+        future.cancel()
+
+        aio._resolve(future)
+
+        assert future.cancelled()
+        loop.close()
+
+    def test_after_fork_in_child(self):
+        worker = aio.Worker()
+        worker.submit(lambda: None)
+        thread, items = worker._thread, worker._queue
+
+        worker._after_fork_in_child()
+
+        assert worker._thread is None
+        assert worker._queue is not items
+
+        items.put(aio._stop)
+        thread.join(5)  # type: ignore
+
+    def test_close_worker(self):
+        with patch.object(aio._worker, 'close') as close:
+            aio._close_worker()
+
+        close.assert_called_once_with(aio._worker.flush_timeout)
+
+    @pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requires fork')
+    def test_fork(self):
+        worker = aio.Worker()
+        worker.submit(lambda: None)
+
+        pid = os.fork()
+        if pid == 0:  # pragma: no cover
+            os._exit(0 if worker._thread is None else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+        assert worker.close(5)
+
+
+def test_module_functions():
+    with patch.object(aio, '_worker') as worker:
+        worker.flush.return_value = asyncio.sleep(0)
+        asyncio.run(aio.flush())
+
+        worker.aclose.return_value = asyncio.sleep(0)
+        asyncio.run(aio.aclose())
+
+        worker.dropped = 3
+        assert aio.dropped() == 3
+
+    worker.flush.assert_called_once_with()
+    worker.aclose.assert_called_once_with()
@@ -0,0 +1,226 @@
+import io
+import json
+import threading
+from datetime import datetime
+from typing import List
+
+import pytest
+import structlog
+
+from outcome.logkit import binary, counters, encoders
+from outcome.logkit.limits import SizeLimits, truncated_key
+from outcome.logkit.stackdriver import StackdriverRenderer
+
+
+class Structlog:
+    def __structlog__(self):
+        return {'custom': True}
+
+
+def round_trip(value: object) -> object:
+    return binary.Decoder().decode(binary.read_frames(io.BytesIO(binary.Stream(0).frame(value) + b'\n')).__next__())
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        (None, None),
+        (True, True),
+        (False, False),
+        (0, 0),
+        (-1, -1),
+        (2**70, 2**70),
+        (-(2**70), -(2**70)),
+        (1.5, 1.5),
+        ('', ''),
+        ('é😀', 'é😀'),
+        ('x' * 1000, 'x' * 1000),
+        ([1, [2, 'a']], [1, [2, 'a']]),
+        ((1, 2), [1, 2]),
+        ({'a': {'b': {'a': 1}}}, {'a': {'b': {'a': 1}}}),
+        (
+            {2: 'a', None: 'b', True: 'c', 1.5: 'd', 'key': 'e', (1,): 'f'},
+            {'2': 'a', 'null': 'b', 'true': 'c', '1.5': 'd', 'key': 'e', '(1,)': 'f'},
+        ),
+        ([{2: 'a'}, {2: 'b'}], [{'2': 'a'}, {'2': 'b'}]),
+        (Structlog(), {'custom': True}),
+        (object, repr(object)),
+    ],
+)
+def test_round_trip(value: object, expected: object):
+    assert round_trip({'value': value}) == {'value': expected}
+    assert round_trip(value) == expected
+
+
+def test_subclasses():
+    class Text(str):  # noqa: WPS431
+        ...
+
+    class Mapping(dict):  # noqa: WPS431
+        ...
+
+    assert round_trip([Text('text'), Mapping(a=Text('b'))]) == ['text', {'a': 'b'}]
+
+
+def render_all(renderer: binary.BinaryRenderer, events: List[dict]) -> List[bytes]:
+    return [renderer(structlog.BytesLogger(), 'info', event) for event in events]
+
+
+def decode_all(frames: List[bytes], decoder: binary.Decoder = None) -> List[object]:
+    decoder = decoder or binary.Decoder()
+    return [decoder.decode(body) for body in binary.read_frames(io.BytesIO(b''.join(f + b'\n' for f in frames)))]
+
+
+class TestBinaryRenderer:
+    def test_same_entries_as_json(self):
+        event = {
+            'event': 'event',
+            'level': 'info',
+            'timestamp': 1600000000.5,
+            'user_id': 12345,
+            'ratio': 0.25,
+            'text': 'é😀',
+            'items': [1, None, {'nested': True}],
+            'when': datetime(2020, 10, 12),  # noqa: WPS432
+            'pathname': '/app.py',
+            'lineno': 1,
+            'func_name': 'func',
+        }
+        json_renderer = StackdriverRenderer(encoder=encoders.JSONEncoder())
+
+        assert decode_all(render_all(binary.BinaryRenderer(), [dict(event)])) == [
+            json.loads(json_renderer(None, 'info', dict(event)))
+        ]
+
+    def test_interned_keys(self):
+        events = [{'event': 'event', 'level': 'info', 'timestamp': 1, 'user_id': i} for i in range(3)]
+        frames = render_all(binary.BinaryRenderer(), events)
+
+        # The keys are only written once
+        assert b'user_id' in frames[0]
+        assert b'user_id' not in frames[1]
+        assert len(frames[1]) < len(frames[0])
+        assert [entry['user_id'] for entry in decode_all(frames)] == [0, 1, 2]  # type: ignore
+
+    def test_reset(self):
+        renderer = binary.BinaryRenderer(reset_every=2)
+        frames = render_all(renderer, [{'event': 'event', 'index': i} for i in range(5)])
+
+        # The frames of the first reset are unknown to a reader starting at the second one
+        decoder = binary.Decoder()
+        with pytest.raises(binary.UnknownKeyError):
+            decode_all(frames[1:2], decoder)
+
+        assert [entry['index'] for entry in decode_all(frames[2:], decoder)] == [2, 3, 4]  # type: ignore
+
+    def test_max_keys(self):
+        frames = render_all(binary.BinaryRenderer(max_keys=1), [{'event': 'event', 'other': i} for i in range(2)])
+
+        # Only the first key is interned
+        assert b'other' not in frames[1]
+        assert frames[0].count(b'message') == frames[1].count(b'message') == 1
+        assert [entry['other'] for entry in decode_all(frames)] == [0, 1]  # type: ignore
+
+    def test_streams(self):
+        renderer = binary.BinaryRenderer()
+        frames = render_all(renderer, [{'event': 'main'}])
+
+        thread = threading.Thread(
+            target=lambda: frames.extend(render_all(renderer, [{'event': 'thread', 'extra': 1} for _ in range(2)]))
+        )
+        thread.start()
+        thread.join()
+
+        frames.extend(render_all(renderer, [{'event': 'main', 'extra': 2}]))
+
+        # The frames of each thread only use the keys of their own stream
+        entries = decode_all(frames)
+        assert [entry['message'] for entry in entries] == ['main', 'thread', 'thread', 'main']  # type: ignore
+        assert [entry.get('extra') for entry in entries] == [None, 1, 1, 2]  # type: ignore
+
+    def test_fork(self):
+        renderer = binary.BinaryRenderer()
+        stream = renderer.stream()
+
+        renderer._after_fork_in_child()  # noqa: WPS437
+
+        assert renderer.stream() is not stream
+        assert renderer.stream() is renderer.stream()
+
+    def test_oversized(self):
+        renderer = binary.BinaryRenderer(limits=SizeLimits(max_line_bytes=1000))
+        frames = render_all(
+            renderer, [{'event': 'first', 'key': 1}, {'event': 'large', 'payload': 'x' * 2000}, {'event': 'last', 'key': 2}]
+        )
+
+        assert all(len(frame) <= 1000 for frame in frames)
+
+        entries = decode_all(frames)
+        assert entries[1]['payload'].startswith('<truncated')  # type: ignore
+        assert entries[1][truncated_key] == ['payload']  # type: ignore
+        assert entries[2]['key'] == 2  # type: ignore
+
+    def test_counters(self):
+        counters.reset()
+        frames = render_all(binary.BinaryRenderer(), [{'event': 'event'}])
+
+        assert counters.stats()['rendered'] == 1
+        assert counters.stats()['bytes'] == len(frames[0])
+
+
+class TestReadFrames:
+    def test_chunks(self):
+        frames = render_all(binary.BinaryRenderer(), [{'event': 'x' * 200, 'index': i} for i in range(3)])
+        data = b''.join(f + b'\n' for f in frames)
+
+        assert len(list(binary.read_frames(io.BytesIO(data), chunk_size=3))) == 3
+        assert not list(binary.read_frames(io.BytesIO(b'')))
+
+    def test_missing_newline(self):
+        # Not a frame, and no newline to skip to
+        with pytest.raises(binary.DecodeError, match='Truncated frame'):
+            list(binary.read_frames(io.BytesIO(b'\x02\x01\x00\x00')))
+
+    def test_skip_empty_line(self):
+        frames = render_all(binary.BinaryRenderer(), [{'event': 'event'}])
+
+        assert list(binary.read_frames(io.BytesIO(b'\x00\n' + frames[0] + b'\n'))) == [frames[0][1:]]
+
+    @pytest.mark.parametrize('chunk_size', [3, 64 * 1024])
+    def test_skip_other_output(self, chunk_size: int):
+        frames = render_all(binary.BinaryRenderer(), [{'event': 'event', 'index': i} for i in range(3)])
+        traceback = b'Traceback (most recent call last):\n  File "app.py", line 1\nValueError: error\n\n'
+        data = frames[0] + b'\n' + traceback + frames[1] + b'\n' + b'\x01\x01\x01\n' + frames[2] + b'\n'
+        skipped: List[int] = []
+
+        bodies = list(binary.read_frames(io.BytesIO(data), chunk_size=chunk_size, on_skip=skipped.append))
+
+        decoder = binary.Decoder()
+        assert [decoder.decode(body)['index'] for body in bodies] == [0, 1, 2]  # type: ignore
+        assert sum(skipped) == len(traceback) + 4
+
+    @pytest.mark.parametrize('data', [b'\x05\x00', b'\x80'])
+    def test_truncated(self, data: bytes):
+        with pytest.raises(binary.DecodeError, match='Truncated frame'):
+            list(binary.read_frames(io.BytesIO(data)))
+
+
+@pytest.mark.parametrize(
+    'body, message',
+    [
+        (b'', 'Empty frame'),
+        (b'\x02\x00\x00\x00', 'Unknown format version'),
+        (b'\x81\x00\x00\x00\x00', 'Unexpected data'),
+        (b'\x81\x00\x00', 'Truncated value'),
+        (b'\x81\x00', 'Truncated varint'),
+        (b'\x81\x00\x00\x0a', 'Unknown tag'),
+        (b'\x81\x00\x00\x05\x02a', 'Truncated string'),
+        (b'\x81\x00\x00\x04\x00', 'Truncated float'),
+        (b'\x81\x00\x00\x07\x01', 'Truncated key'),
+        (b'\x81\x00\x00\x07\x01\x01', 'Unknown key tag'),
+        (b'\x81\x00\x00\x07\x01\x09\x00\x00', 'Unknown key'),
+    ],
+)
+def test_decode_errors(body: bytes, message: str):
+    with pytest.raises(binary.DecodeError, match=message):
+        binary.Decoder().decode(body)
@@ -0,0 +1,101 @@
+import logging
+from unittest.mock import Mock
+
+import pytest
+
+from outcome.logkit.bound import LevelBoundLogger, make_level_bound_logger
+from outcome.logkit.levels import LevelTable
+
+
+def make_logger(level: int) -> LevelBoundLogger:
+    cls = make_level_bound_logger(level)
+    return cls(Mock(), processors=[], context={})
+
+
+def test_class_cache():
+    assert make_level_bound_logger(logging.INFO) is make_level_bound_logger(logging.INFO)
+    assert make_level_bound_logger(logging.INFO) is not make_level_bound_logger(logging.DEBUG)
+
+
+def test_is_enabled_for():
+    logger = make_logger(logging.INFO)
+
+    assert logger.is_enabled_for(logging.INFO)
+    assert logger.is_enabled_for(logging.ERROR)
+    assert not logger.is_enabled_for(logging.DEBUG)
+    assert not logger.debug_enabled
+    assert make_logger(logging.DEBUG).debug_enabled
+
+
+@pytest.mark.parametrize(
+    'method,forwarded',
+    [
+        ('debug', False),
+        ('info', False),
+        ('msg', False),
+        ('warn', True),
+        ('warning', True),
+        ('error', True),
+        ('err', True),
+        ('failure', True),
+        ('fatal', True),
+        ('critical', True),
+        ('exception', True),
+    ],
+)
+def test_level_methods(method: str, forwarded: bool):
+    logger = make_logger(logging.WARNING)
+
+    getattr(logger, method)('event', key='value')
+
+    wrapped = logger._logger
+    if forwarded:
+        getattr(wrapped, method).assert_called_once_with(event='event', key='value')
+    else:
+        assert not wrapped.mock_calls
+
+
+def test_explicit_level_overrides_method():
+    logger = make_logger(logging.WARNING)
+
+    logger.debug('event', levelno=logging.ERROR)
+    logger.debug('other_event', level='error')
+
+    assert len(logger._logger.debug.mock_calls) == 2
+
+
+def test_log():
+    logger = make_logger(logging.WARNING)
+
+    logger.log('dropped', levelno=logging.DEBUG)
+    assert not logger._logger.mock_calls
+
+    logger.log('kept', levelno=logging.ERROR)
+    logger.log('unknown_level', levelno=35, level='custom')
+    logger.log('no_level')
+
+    assert len(logger._logger.log.mock_calls) == 3
+
+
+def test_unknown_method():
+    logger = make_logger(logging.FATAL)
+
+    logger.custom('event')
+
+    logger._logger.custom.assert_called_once_with(event='event')
+
+
+def test_for_name():
+    table = LevelTable(logging.INFO, {'app.db': logging.DEBUG, 'urllib3': logging.ERROR})
+    logger = make_level_bound_logger(table.min_level, table)(Mock(), processors=[], context={})
+
+    assert logger.for_name('app.db') is logger
+    assert logger.for_name('app.db.session') is logger
+    assert logger.for_name('urllib3').min_level == logging.ERROR
+    assert logger.for_name(None).min_level == logging.INFO
+    assert not logger.for_name(None).debug_enabled
+
+
+def test_for_name_without_rules():
+    logger = make_logger(logging.INFO)
+    assert logger.for_name('app') is logger
@@ -0,0 +1,113 @@
+import json
+import logging
+import os
+from typing import Any
+from unittest.mock import patch
+
+import structlog
+
+from outcome.logkit import callsite, init, intercept
+from outcome.logkit.types import EventDict
+
+
+def call_processor(processor: callsite.CallsiteProcessor) -> EventDict:
+    return processor(None, 'info', {'event': 'event'})
+
+
+def test_callsite():
+    event_dict = call_processor(callsite.CallsiteProcessor())
+
+    assert event_dict['pathname'] == __file__
+    assert event_dict['func_name'] == 'call_processor'
+    assert event_dict['lineno'] == call_processor.__code__.co_firstlineno + 1
+
+
+def test_explicit_callsite():
+    event_dict = {'pathname': 'file.py', 'lineno': 1}
+
+    assert callsite.CallsiteProcessor()(None, 'info', event_dict) == {'pathname': 'file.py', 'lineno': 1}
+
+
+def test_internal_frames_skipped():
+    with patch.object(callsite, '_internal_prefixes', (os.path.dirname(__file__),)):
+        callsite._code_locations.clear()
+        event_dict = call_processor(callsite.CallsiteProcessor())
+
+    callsite._code_locations.clear()
+    assert not event_dict['pathname'].startswith(os.path.dirname(__file__))
+
+
+def test_max_depth():
+    with patch.object(callsite, '_internal_prefixes', ('',)):
+        callsite._code_locations.clear()
+        assert call_processor(callsite.CallsiteProcessor(max_depth=1000)) == {'event': 'event'}
+        assert call_processor(callsite.CallsiteProcessor(max_depth=2)) == {'event': 'event'}
+
+    callsite._code_locations.clear()
+
+
+def test_code_location_cache():
+    code = test_code_location_cache.__code__
+
+    with patch.object(callsite, '_max_code_locations', 1):
+        callsite._code_locations.clear()
+
+        assert callsite.code_location(code) == (__file__, 'test_code_location_cache')
+        callsite.code_location(call_processor.__code__)
+        assert list(callsite._code_locations) == [call_processor.__code__]
+
+    assert callsite.code_location(structlog.get_logger.__code__) is None
+
+
+def log_event(logger: Any) -> Any:
+    return logger.info('event')
+
+
+@patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'yes'})
+def test_pipeline():
+    structlog.configure(processors=init.get_final_processors(logging.INFO), logger_factory=structlog.ReturnLoggerFactory())
+
+    entry = json.loads(log_event(structlog.get_logger()))
+
+    structlog.reset_defaults()
+
+    assert entry['logging.googleapis.com/sourceLocation'] == {
+        'file': __file__,
+        'line': log_event.__code__.co_firstlineno + 1,
+        'function': 'log_event',
+    }
+
+
+@patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'yes'})
+def test_pipeline_stdlib():
+    structlog.configure(processors=init.get_final_processors(logging.INFO), logger_factory=structlog.ReturnLoggerFactory())
+
+    root = logging.RootLogger(logging.INFO)
+    root.handlers = [intercept.StructlogBridgeHandler()]
+    std_logger = intercept.InterceptLogger('stdlib')
+    std_logger.parent = root
+
+    with patch.object(intercept, 'dispatch') as dispatch:
+        log_event(std_logger)
+
+    structlog.reset_defaults()
+
+    event_dict = dispatch.call_args.args[2]
+    assert json.loads(event_dict)['logging.googleapis.com/sourceLocation']['function'] == 'log_event'
+
+
+def test_callsite_feature():
+    def has_callsite() -> bool:  # noqa: WPS430
+        return callsite.find_callsite(init.get_final_processors(logging.INFO)) is not None
+
+    with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'yes'}):
+        assert has_callsite()
+
+        with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_CALLSITE': 'no'}):
+            assert not has_callsite()
+
+    with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'no'}):
+        assert not has_callsite()
+
+        with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_CALLSITE': 'yes'}):
+            assert has_callsite()
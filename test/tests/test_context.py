@@ -1,10 +1,13 @@
+import asyncio
+import logging
+import os
 from importlib import reload
-from unittest.mock import Mock
+from unittest.mock import Mock, patch
 
 import pytest
 import structlog
 
-from outcome.logkit import context
+from outcome.logkit import context, init
 
 mock_logger = Mock()
 
@@ -20,7 +23,19 @@ def reload_structlog():
     structlog.configure(processors=[structlog.contextvars.merge_contextvars], logger_factory=mock_logger_factory)  # type: ignore
 
 
-def test_context():
+@pytest.fixture(params=['structlog', 'contextvar'])
+def backend(request: pytest.FixtureRequest):
+    mock_logger.reset_mock()
+    merge = context.use_backend(request.param)
+    structlog.configure(processors=[merge], logger_factory=mock_logger_factory)  # type: ignore
+
+    yield request.param
+
+    context.clear()
+    context.use_backend('structlog')
+
+
+def test_context(backend: str):
     logger = structlog.get_logger()
 
     logger.info('without_context')
@@ -39,3 +54,52 @@ def test_context():
     assert mock_logger.mock_calls[1].kwargs == {'event': 'with_context', 'var_a': 'a', 'var_b': 'b'}
     assert mock_logger.mock_calls[2].kwargs == {'event': 'with_partial_context', 'var_b': 'b'}
     assert mock_logger.mock_calls[3].kwargs == {'event': 'without_context'}
+
+
+def test_event_takes_precedence(backend: str):
+    context.add(key='context', other='other')
+    structlog.get_logger().info('event', key='event')
+
+    assert mock_logger.mock_calls[0].kwargs == {'event': 'event', 'key': 'event', 'other': 'other'}
+
+
+def test_remove_missing_key(backend: str):
+    context.add(key='value')
+    context.remove('missing')
+    structlog.get_logger().info('event')
+
+    assert mock_logger.mock_calls[0].kwargs == {'event': 'event', 'key': 'value'}
+
+
+def test_task_isolation(backend: str):
+    async def task(value: str):  # noqa: WPS430
+        context.add(task=value)
+        await asyncio.sleep(0)
+        structlog.get_logger().info('event')
+
+    async def main():  # noqa: WPS430
+        context.add(shared='shared')
+        await asyncio.gather(task('a'), task('b'))
+        structlog.get_logger().info('after')
+
+    asyncio.run(main())
+
+    kwargs = [c.kwargs for c in mock_logger.mock_calls]
+    assert {'event': 'event', 'shared': 'shared', 'task': 'a'} in kwargs
+    assert {'event': 'event', 'shared': 'shared', 'task': 'b'} in kwargs
+    assert kwargs[-1] == {'event': 'after', 'shared': 'shared'}
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        context.use_backend('unknown')
+
+
+def test_context_backend_feature():
+    try:  # noqa: WPS501
+        with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_CONTEXT_BACKEND': 'contextvar'}):
+            assert init.get_final_processors(logging.INFO)[0] is context.merge_context
+
+        assert init.get_final_processors(logging.INFO)[0] is structlog.contextvars.merge_contextvars
+    finally:
+        context.use_backend('structlog')
@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import threading
+
+import pytest
+import structlog
+
+from outcome.logkit import counters, intercept
+from outcome.logkit.bound import make_level_bound_logger
+from outcome.logkit.encoders import JSONEncoder
+from outcome.logkit.levels import LogLevelProcessor
+from outcome.logkit.stackdriver import StackdriverRenderer
+
+
+@pytest.fixture(autouse=True)
+def reset_counters():
+    counters.reset()
+    yield
+    counters.reset()
+
+
+def test_shard_per_thread():
+    main_shard = counters.shard()
+    assert counters.shard() is main_shard
+
+    shards = []
+    thread = threading.Thread(target=lambda: shards.append(counters.shard()))
+    thread.start()
+    thread.join()
+
+    assert shards[0] is not main_shard
+
+
+def test_finished_threads_retired():
+    shards = []
+
+    def count():  # noqa: WPS430
+        counters.count_event('info', 'worker')
+        shards.append(counters.shard())
+
+    for _ in range(3):  # noqa: WPS122
+        thread = threading.Thread(target=count)
+        thread.start()
+        thread.join()
+
+    # The shards of the finished threads are folded together, their counts are kept
+    assert not any(shard in counters._shards for shard in shards)  # noqa: WPS437
+    assert counters.stats()['events'] == {'info': 3}
+
+    counters.reset()
+    assert counters.stats()['events'] == {}
+
+
+def test_merged_on_read():
+    def count():  # noqa: WPS430
+        for _ in range(100):  # noqa: WPS122
+            counters.count_event('info', 'worker')
+        counters.count_dropped('debug')
+        counters.count_intercepted()
+        counters.count_rendered(10, 1000)
+
+    threads = [threading.Thread(target=count) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    count()
+
+    assert counters.stats() == {
+        'events': {'info': 500},
+        'dropped': {'debug': 5},
+        'loggers': {'worker': 500},
+        'intercepted': 5,
+        'rendered': 5,
+        'bytes': 50,
+        'encode_ms': 0.005,
+    }
+
+
+def test_max_loggers(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(counters, 'max_loggers', 2)
+
+    for name in ('a', 'b', 'c', 'd', 'a'):
+        counters.count_event('info', name)
+
+    assert counters.stats()['loggers'] == {'a': 2, 'b': 1, counters.other_loggers: 2}
+
+
+def test_reset():
+    counters.count_event('info', 'reset')
+    counters.reset()
+
+    assert counters.stats()['events'] == {}
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Requires fork')
+def test_fork():
+    counters.count_event('info', 'parent')
+
+    # Another thread has its own shard when the process forks, it's gone in the child
+    counting, release = threading.Event(), threading.Event()
+
+    def hold():  # noqa: WPS430
+        counters.count_event('info', 'thread')
+        counting.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=hold)
+    thread.start()
+    counting.wait(5)
+
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover
+        counters.count_event('info', 'child')
+        os._exit(0 if counters.stats()['loggers'] == {'child': 1} else 1)
+
+    release.set()
+    thread.join()
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WEXITSTATUS(status) == 0
+    assert counters.stats()['loggers'] == {'parent': 1, 'thread': 1}
+
+
+def test_after_fork_in_child():
+    counters.count_event('info', 'parent')
+    shards = list(counters._shards)  # noqa: WPS437
+
+    try:
+        counters._after_fork_in_child()  # noqa: WPS437
+
+        assert counters._shards == [counters.shard()]  # noqa: WPS437
+        assert counters.stats()['events'] == {}
+
+        # The dropped shards aren't retired
+        counters._retire(counters.Shard())  # noqa: WPS437
+        assert counters._shards == [counters.shard()]  # noqa: WPS437
+    finally:
+        counters._shards[:] = shards  # noqa: WPS437
+
+
+def test_after_fork_in_child_without_shard():
+    shards = list(counters._shards)  # noqa: WPS437
+    thread = threading.Thread(target=counters._after_fork_in_child)  # noqa: WPS437
+
+    try:
+        thread.start()
+        thread.join()
+
+        assert counters._shards == []  # noqa: WPS437
+    finally:
+        counters._shards[:] = shards  # noqa: WPS437
+
+
+def test_level_processor():
+    processor = LogLevelProcessor(logging.INFO)
+
+    processor(None, 'info', {'event': 'kept', 'logger': 'levels'})
+    with pytest.raises(structlog.DropEvent):
+        processor(None, 'debug', {'event': 'dropped', 'logger': 'levels'})
+
+    stats = counters.stats()
+    assert stats['events'] == {'info': 1}
+    assert stats['dropped'] == {'debug': 1}
+    assert stats['loggers'] == {'levels': 1}
+
+
+def test_level_bound_logger():
+    struct_logger = make_level_bound_logger(logging.INFO)(structlog.ReturnLogger(), [], {})
+
+    struct_logger.debug('filtered')
+    struct_logger.msg('kept')
+    struct_logger.log('filtered', levelno=logging.DEBUG)
+
+    assert counters.stats()['dropped'] == {'debug': 2}
+
+
+def test_intercept_handler():
+    handler = intercept.StructlogHandler(struct_logger=structlog.get_logger())
+    handler.handle(logging.LogRecord('intercepted', logging.INFO, __file__, 1, 'message', (), None))
+
+    assert counters.stats()['intercepted'] == 1
+
+
+def test_renderer():
+    renderer = StackdriverRenderer(encoder=JSONEncoder())
+
+    rendered = renderer(None, 'info', {'event': 'rendered', 'level': 'info'})
+    renderer(structlog.BytesLogger(), 'info', {'event': 'rendered', 'level': 'info'})
+
+    stats = counters.stats()
+    assert json.loads(rendered)['message'] == 'rendered'
+    assert stats['rendered'] == 2
+    assert stats['bytes'] == 2 * len(rendered)
+    assert stats['encode_ms'] > 0
+
+
+class UnicodeEncoder(JSONEncoder):
+    def dumps(self, obj: object) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
+
+def test_renderer_size_in_bytes():
+    rendered = StackdriverRenderer(encoder=UnicodeEncoder())(None, 'info', {'event': 'é😀', 'level': 'info'})
+
+    assert counters.stats()['bytes'] == len(rendered.encode('utf-8'))
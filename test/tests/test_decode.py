@@ -0,0 +1,82 @@
+import io
+import json
+from pathlib import Path
+from typing import List
+from unittest.mock import patch
+
+import pytest
+import structlog
+
+from outcome.logkit import binary, decode
+
+
+def write_log(path: Path, frames: List[bytes]) -> str:
+    path.write_bytes(b''.join(f + b'\n' for f in frames))
+    return str(path)
+
+
+@pytest.fixture
+def frames() -> List[bytes]:
+    renderer = binary.BinaryRenderer(reset_every=2)
+    return [renderer(structlog.BytesLogger(), 'info', {'event': 'event', 'index': i}) for i in range(4)]
+
+
+def entries(output: bytes) -> List[object]:
+    return [json.loads(line) for line in output.splitlines()]
+
+
+def test_decode(tmp_path: Path, frames: List[bytes], capsysbinary: pytest.CaptureFixture):
+    # Rotated files are decoded in order
+    paths = [write_log(tmp_path / 'app.log.1', frames[:1]), write_log(tmp_path / 'app.log', frames[1:])]
+
+    assert decode.main(['--encoder', 'json', *paths]) == 0
+
+    output = capsysbinary.readouterr()
+    assert [entry['index'] for entry in entries(output.out)] == [0, 1, 2, 3]  # type: ignore
+    assert entries(output.out)[0]['message'] == 'event'  # type: ignore
+    assert not output.err
+
+
+def test_decode_stdin(frames: List[bytes], capsysbinary: pytest.CaptureFixture):
+    stdin = io.TextIOWrapper(io.BytesIO(b''.join(f + b'\n' for f in frames)))
+
+    with patch.object(decode.sys, 'stdin', stdin):
+        assert decode.main([]) == 0
+
+    assert len(entries(capsysbinary.readouterr().out)) == 4
+
+
+def test_decode_unknown_keys(tmp_path: Path, frames: List[bytes], capsysbinary: pytest.CaptureFixture):
+    # The reader starts after the first reset, so the next frame can't be decoded
+    path = write_log(tmp_path / 'app.log', frames[1:])
+
+    assert decode.main([path]) == 0
+
+    output = capsysbinary.readouterr()
+    assert [entry['index'] for entry in entries(output.out)] == [2, 3]  # type: ignore
+    assert b'skipped 1 frames' in output.err
+
+
+def test_decode_errors(tmp_path: Path, frames: List[bytes], capsysbinary: pytest.CaptureFixture):
+    corrupt = tmp_path / 'corrupt.log'
+    corrupt.write_bytes(frames[0])
+
+    assert decode.main([str(tmp_path / 'missing.log'), str(corrupt)]) == 1
+
+    output = capsysbinary.readouterr()
+    assert not output.out
+    assert b'missing.log' in output.err
+    assert b'corrupt.log: Truncated frame' in output.err
+
+
+def test_decode_other_output(tmp_path: Path, frames: List[bytes], capsysbinary: pytest.CaptureFixture):
+    # A traceback printed to the same output doesn't stop the decoding
+    traceback = b'Traceback (most recent call last):\nValueError: error\n'
+    path = tmp_path / 'app.log'
+    path.write_bytes(frames[0] + b'\n' + traceback + b''.join(f + b'\n' for f in frames[1:]))
+
+    assert decode.main([str(path)]) == 0
+
+    output = capsysbinary.readouterr()
+    assert [entry['index'] for entry in entries(output.out)] == [0, 1, 2, 3]  # type: ignore
+    assert f'skipped {len(traceback)} bytes'.encode() in output.err
@@ -0,0 +1,99 @@
+import json
+import warnings
+from dataclasses import dataclass
+from datetime import datetime
+from unittest.mock import patch
+
+import pytest
+import structlog
+
+from outcome.logkit import encoders
+
+
+class Custom:
+    def __structlog__(self):
+        return 'custom'
+
+
+@dataclass
+class Data:
+    value: int
+
+
+event = {
+    'message': 'é',
+    'number': 1.5,
+    1: 'non_str_key',
+    'nested': {'list': [1, None, True]},
+    'custom': Custom(),
+    'datetime': datetime(2020, 1, 1),
+    'data': Data(1),
+    'big': 2**70,
+}
+
+
+def test_fallback():
+    assert encoders.fallback(Custom()) == 'custom'
+    assert encoders.fallback(Data(1)) == 'Data(value=1)'
+
+
+def test_json_encoder():
+    encoder = encoders.JSONEncoder()
+
+    expected = json.dumps(event, default=encoders.fallback)
+
+    assert encoder.dumps(event) == expected
+    assert encoder.dumpb(event) == expected.encode('utf-8')
+
+
+def test_orjson_encoder():
+    pytest.importorskip('orjson')
+    encoder = encoders.OrjsonEncoder()
+
+    small_event = {k: v for k, v in event.items() if k != 'big'}
+    expected = json.loads(json.dumps(small_event, default=encoders.fallback))
+
+    assert json.loads(encoder.dumpb(small_event)) == expected
+    assert json.loads(encoder.dumps(small_event)) == expected
+
+
+def test_orjson_encoder_fallback():
+    pytest.importorskip('orjson')
+    encoder = encoders.OrjsonEncoder()
+
+    assert encoder.dumpb({'big': 2**70}) == b'{"big": 1180591620717411303424}'
+
+
+def test_get_encoder_json():
+    assert isinstance(encoders.get_encoder('json'), encoders.JSONEncoder)
+
+
+def test_get_encoder_unknown():
+    with pytest.raises(ValueError):
+        encoders.get_encoder('yaml')
+
+
+@patch('outcome.logkit.encoders.orjson', None)
+def test_get_encoder_without_orjson():
+    assert isinstance(encoders.get_encoder(), encoders.JSONEncoder)
+
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter('always')
+        assert isinstance(encoders.get_encoder('orjson'), encoders.JSONEncoder)
+        assert issubclass(w[0].category, RuntimeWarning)
+
+
+def test_get_encoder_with_orjson():
+    pytest.importorskip('orjson')
+
+    # orjson is opt-in, its output isn't byte-identical
+    assert isinstance(encoders.get_encoder(), encoders.JSONEncoder)
+    assert isinstance(encoders.get_encoder('auto'), encoders.JSONEncoder)
+    assert isinstance(encoders.get_encoder('orjson'), encoders.OrjsonEncoder)
+
+
+def test_default_output_is_unchanged():
+    event = {'x': [1, 2], 'f': float('nan'), 'message': 'héllo'}
+
+    assert encoders.get_encoder().dumps(event) == structlog.processors.JSONRenderer()(None, 'info', dict(event))
+    assert encoders.get_encoder().dumps(event) == '{"x": [1, 2], "f": NaN, "message": "h\\u00e9llo"}'
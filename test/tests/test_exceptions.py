@@ -0,0 +1,192 @@
+import json
+import logging
+import os
+import sys
+from typing import List
+from unittest.mock import Mock, patch
+
+import structlog
+
+from outcome.logkit import exceptions, init
+from outcome.logkit.types import EventDict
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def fail(message: str = 'error'):
+    raise ValueError(message)
+
+
+def fail_elsewhere():
+    raise ValueError('error')
+
+
+def capture(func=fail, *args: object) -> exceptions.ExcInfo:
+    try:
+        func(*args)
+    except ValueError:
+        return sys.exc_info()  # type: ignore
+    raise AssertionError('No exception')  # pragma: no cover
+
+
+def test_get_exc_info():
+    exc_info = capture()
+
+    assert exceptions.get_exc_info(exc_info) == exc_info
+    assert exceptions.get_exc_info(exc_info[1]) == exc_info
+    assert exceptions.get_exc_info(None) is None
+    assert exceptions.get_exc_info(False) is None
+    assert exceptions.get_exc_info((None, None, None)) is None
+    assert exceptions.get_exc_info(True) is None
+
+    try:
+        fail()
+    except ValueError:
+        assert exceptions.get_exc_info(True)[0] is ValueError  # type: ignore
+
+
+def test_fingerprint():
+    # The message isn't part of the fingerprint, the locations are
+    assert exceptions.fingerprint(capture()) == exceptions.fingerprint(capture(fail, 'other'))
+    assert exceptions.fingerprint(capture()) != exceptions.fingerprint(capture(fail_elsewhere))
+
+    exc_type, exc, tb = capture()
+    assert exceptions.fingerprint((exc_type, exc, tb)) != exceptions.fingerprint((KeyError, exc, tb))
+    assert len(exceptions.fingerprint((exc_type, exc, None))) == 16
+
+
+def wrap(cause: BaseException, suppress: bool = False):
+    try:
+        raise cause
+    except Exception as exc:
+        raise ValueError('wrapped') from (None if suppress else exc)
+
+
+def wrap_implicitly(cause: BaseException):
+    try:
+        raise cause
+    except Exception:
+        raise ValueError('wrapped')
+
+
+def test_fingerprint_chained():
+    # `raise X from Y` with different Ys, or the same Y raised in different places
+    by_cause = exceptions.fingerprint(capture(wrap, KeyError()))
+    assert by_cause == exceptions.fingerprint(capture(wrap, KeyError('other')))
+    assert by_cause != exceptions.fingerprint(capture(wrap, TypeError()))
+    assert by_cause != exceptions.fingerprint(capture(wrap_implicitly, KeyError()))
+
+    # The context is part of it, unless it's suppressed
+    assert exceptions.fingerprint(capture(wrap_implicitly, KeyError())) != exceptions.fingerprint(
+        capture(wrap_implicitly, TypeError()),
+    )
+    assert exceptions.fingerprint(capture(wrap, KeyError(), True)) == exceptions.fingerprint(
+        capture(wrap, TypeError(), True),
+    )
+
+
+def test_fingerprint_cycle():
+    exc_type, exc, tb = capture(wrap, KeyError())
+    exc.__cause__.__cause__ = exc  # type: ignore
+
+    assert len(exceptions.fingerprint((exc_type, exc, tb))) == 16
+
+
+def test_code_location_cache():
+    code = fail.__code__
+
+    with patch.object(exceptions, '_max_code_locations', 1):
+        exceptions._code_locations.clear()
+        location = exceptions.code_location(code)
+
+        assert exceptions.code_location(code) is location
+        exceptions.code_location(fail_elsewhere.__code__)
+        assert list(exceptions._code_locations) == [fail_elsewhere.__code__]
+
+    assert location.endswith(b':fail:')
+
+
+class TestExceptionDeduplicator:
+    def process(self, processor: exceptions.ExceptionDeduplicator, exc_info: object) -> EventDict:
+        return processor(None, 'error', {'event': 'event', 'exc_info': exc_info})
+
+    def test_without_exception(self):
+        processor = exceptions.ExceptionDeduplicator()
+
+        assert processor(None, 'info', {'event': 'event'}) == {'event': 'event'}
+
+    def test_window(self):
+        clock = Clock()
+        processor = exceptions.ExceptionDeduplicator(window=10, clock=clock)
+        exc_info = capture()
+        key = exceptions.fingerprint(exc_info)
+
+        first = self.process(processor, exc_info)
+        assert first['exc_info'] is exc_info
+        assert first['exception_fingerprint'] == key
+
+        repeats: List[EventDict] = [self.process(processor, exc_info) for _ in range(2)]
+        assert repeats == [
+            {'event': 'event', 'exception_fingerprint': key, 'exception_repeat_count': 2},
+            {'event': 'event', 'exception_fingerprint': key, 'exception_repeat_count': 3},
+        ]
+
+        # Other exceptions have their own window
+        assert 'exc_info' in self.process(processor, capture(fail_elsewhere))
+
+        clock.now = 10
+        next_window = self.process(processor, exc_info)
+        assert next_window['exc_info'] is exc_info
+        assert next_window['exception_suppressed_count'] == 2
+
+        clock.now = 20
+        assert 'exception_suppressed_count' not in self.process(processor, exc_info)
+
+    def test_max_fingerprints(self):
+        processor = exceptions.ExceptionDeduplicator(max_fingerprints=1)
+
+        self.process(processor, capture())
+        self.process(processor, capture(fail_elsewhere))
+
+        assert list(processor._seen) == [exceptions.fingerprint(capture(fail_elsewhere))]
+
+
+@patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'yes'})
+@patch('outcome.logkit.init.env.is_prod', return_value=True)
+def test_pipeline(is_prod: Mock):
+    structlog.configure(processors=init.get_final_processors(logging.INFO), logger_factory=structlog.ReturnLoggerFactory())
+    logger = structlog.get_logger()
+    entries: List[EventDict] = []
+
+    for _ in range(3):
+        try:
+            fail()
+        except ValueError:
+            entries.append(json.loads(logger.exception('failed')))
+
+    structlog.reset_defaults()
+
+    assert 'ValueError' in entries[0]['exception']
+    assert [e.get('exception_repeat_count') for e in entries] == [None, 2, 3]
+    assert not any('exception' in e for e in entries[1:])
+    assert len({e['exception_fingerprint'] for e in entries}) == 1
+
+
+@patch('outcome.logkit.init.env.is_prod', return_value=True)
+def test_no_pretty_printer_in_prod(is_prod: Mock):
+    processors = init.get_final_processors(logging.INFO)
+
+    assert not any(isinstance(p, structlog.processors.ExceptionPrettyPrinter) for p in processors)
+
+
+@patch('outcome.logkit.init.env.is_prod', return_value=False)
+def test_pretty_printer_in_dev(is_prod: Mock):
+    processors = init.get_final_processors(logging.INFO)
+
+    assert any(isinstance(p, structlog.processors.ExceptionPrettyPrinter) for p in processors)
@@ -0,0 +1,228 @@
+import io
+import multiprocessing
+import os
+import sys
+import threading
+from unittest.mock import Mock, patch
+
+import pytest
+import structlog
+
+from outcome.logkit import fork, sampling, sinks
+
+fork_only = pytest.mark.skipif(not hasattr(os, 'fork'), reason='Needs os.fork')
+
+
+class Hooks:
+    def __init__(self):
+        self.calls = []
+
+    def _before_fork(self):
+        self.calls.append('before')
+
+    def _after_fork_in_parent(self):
+        self.calls.append('parent')
+
+    def _after_fork_in_child(self):
+        self.calls.append('child')
+
+
+def test_registered_hooks():
+    class Partial:
+        pass
+
+    hooks = Hooks()
+    partial = Partial()
+
+    fork.register(hooks)
+    fork.register(partial)
+
+    fork._before_fork()
+    fork._after_fork_in_parent()
+    fork._after_fork_in_child()
+
+    assert hooks.calls == ['before', 'parent', 'child']
+
+
+def test_structlog_locks():
+    structlog.PrintLogger(io.StringIO())
+    locks = list(structlog._loggers.WRITE_LOCKS.values())
+
+    fork._before_fork()
+    assert all(lock.locked() for lock in locks)
+
+    fork._after_fork_in_child()
+    assert not any(lock.locked() for lock in locks)
+
+    fork._before_fork()
+    fork._after_fork_in_parent()
+    assert not any(lock.locked() for lock in locks)
+
+
+def test_streams_flushed():
+    stdout = Mock()
+    stderr = Mock()
+    stderr.flush.side_effect = ValueError('closed')
+
+    with patch.object(sys, 'stdout', stdout), patch.object(sys, 'stderr', stderr):
+        fork._before_fork()
+        fork._after_fork_in_parent()
+
+    stdout.flush.assert_called_once_with()
+
+
+def test_sampling_lock():
+    processor = sampling.SamplingProcessor()
+    lock = processor._summary_lock
+    lock.acquire()
+
+    processor._after_fork_in_child()
+
+    assert processor._summary_lock is not lock
+    assert not processor._summary_lock.locked()
+
+
+def test_finalizer_registered_in_child():
+    with patch.object(sinks, '_finalizer_pid', None), patch.object(sinks.multiprocessing.util, 'Finalize') as finalize:
+        # Not in the main process, `atexit` closes the sinks there
+        sinks._register_finalizer()
+        assert not finalize.mock_calls
+
+        with patch.object(sinks.multiprocessing, 'parent_process', return_value=Mock()):
+            sinks._register_finalizer()
+            sinks._register_finalizer()
+
+    finalize.assert_called_once_with(None, sinks._close_sinks, exitpriority=0)
+
+
+# The process exits with `os._exit`, without running `atexit`
+def write_in_child(path: str):  # pragma: no cover
+    sink = sinks.BackgroundSink(open(path, 'ab'))
+    for i in range(100):
+        sink.info(f'child-{i}')
+
+
+@fork_only
+def test_multiprocessing_child(tmp_path):
+    path = str(tmp_path / 'child.log')
+
+    process = multiprocessing.get_context('fork').Process(target=write_in_child, args=(path,))
+    process.start()
+    process.join(10)
+
+    with open(path, 'rb') as stream:
+        assert stream.read().splitlines() == [f'child-{i}'.encode() for i in range(100)]
+
+
+class TestAggregatingSink:
+    def make_sink(self):
+        stream = io.BytesIO()
+        return stream, sinks.AggregatingSink(sinks.BackgroundSink(stream))
+
+    def test_write_in_creating_process(self):
+        stream, sink = self.make_sink()
+
+        sink.info('event')
+        assert sink.flush(5)
+        assert sink.close(5)
+
+        assert stream.getvalue() == b'event\n'
+
+    def test_write_from_other_process(self):
+        stream, sink = self.make_sink()
+
+        with patch.object(sinks.os, 'getpid', return_value=-1):
+            sink.info('first')
+            sink.info(b'second')
+
+        assert sink.close(5)
+        assert stream.getvalue() == b'first\nsecond\n'
+
+    def test_large_and_empty_events(self):
+        stream, sink = self.make_sink()
+
+        with patch.object(sinks.os, 'getpid', return_value=-1):
+            sink.info(b'x' * (sinks._max_datagram + 1))
+            sink.info(b'')
+
+        assert sink.close(5)
+        assert stream.getvalue() == b'x' * (sinks._max_datagram + 1) + b'\n\n'
+
+    def test_write_after_close(self):
+        stream, sink = self.make_sink()
+        sink.close(5)
+
+        with patch.object(sinks.os, 'getpid', return_value=-1):
+            sink.info('late')
+
+        assert stream.getvalue() == b'late\n'
+
+    def test_close_in_other_process(self):
+        stream, sink = self.make_sink()
+
+        with patch.object(sinks.os, 'getpid', return_value=-1):
+            assert sink.close(5)
+
+        assert sink._reader.is_alive()
+        sink.close(5)
+
+    def test_close_timeout(self):
+        release = threading.Event()
+        inner = Mock(spec=sinks.Sink)
+        inner.write.side_effect = lambda data: release.wait(5)
+        sink = sinks.AggregatingSink(inner)
+
+        with patch.object(sinks.os, 'getpid', return_value=-1):
+            sink.info('blocking')
+
+        sink.close(0.1)
+        assert sink._reader.is_alive()
+        assert sink._receiver.fileno() != -1
+
+        release.set()
+        sink.close(5)
+        assert sink._receiver.fileno() == -1
+
+    def test_after_fork_in_child(self):
+        stream, sink = self.make_sink()
+
+        # There's no reader in the child
+        sink._sender.send(sinks._stop)
+        sink._reader.join(5)
+
+        sink._after_fork_in_child()
+
+        assert sink._receiver.fileno() == -1
+        sink._sender.close()
+
+    def test_default_sink(self):
+        sink = sinks.AggregatingSink()
+
+        assert isinstance(sink.sink, sinks.BackgroundSink)
+        sink.close(5)
+
+    @fork_only
+    def test_fork(self):
+        stream, sink = self.make_sink()
+        sink.info('parent')
+        sink.flush(5)
+
+        children = []
+        for i in range(3):
+            pid = os.fork()
+            if pid == 0:  # pragma: no cover
+                try:
+                    for j in range(50):
+                        sink.info(f'child-{i}-{j}')
+                finally:
+                    os._exit(0)
+            children.append(pid)
+
+        for pid in children:
+            os.waitpid(pid, 0)
+
+        assert sink.close(5)
+
+        lines = stream.getvalue().splitlines()
+        assert lines[0] == b'parent'
+        assert sorted(lines[1:]) == sorted(f'child-{i}-{j}'.encode() for i in range(3) for j in range(50))
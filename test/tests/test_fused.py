@@ -0,0 +1,217 @@
+import logging
+import os
+from typing import Callable, List, Optional, Tuple
+from unittest.mock import patch
+
+import pytest
+import structlog
+from freezegun import freeze_time
+
+from outcome.logkit import context, counters, fused, init, intercept, profiling
+from outcome.logkit.lazy import Lazy
+from outcome.logkit.levels import LevelTable
+
+_features = {
+    'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'yes',
+    'WITH_FEAT_CO_OUTCOME_LOGKIT_JSON_ENCODER': 'json',
+}
+
+
+def get_processors(
+    use_fused: bool,
+    prod: bool = False,
+    backend: str = 'structlog',
+    callsite: str = 'auto',
+    level_table: Optional[LevelTable] = None,
+):
+    features = {
+        **_features,
+        'WITH_FEAT_CO_OUTCOME_LOGKIT_FUSED_PIPELINE': 'yes' if use_fused else 'no',
+        'WITH_FEAT_CO_OUTCOME_LOGKIT_CONTEXT_BACKEND': backend,
+        'WITH_FEAT_CO_OUTCOME_LOGKIT_CALLSITE': callsite,
+    }
+    with patch.dict(os.environ, features), patch.object(init.env, 'is_prod', return_value=prod):
+        return init.get_final_processors(logging.INFO, level_table=level_table)
+
+
+def make_loggers(**kwargs: object) -> Tuple[structlog.BoundLogger, structlog.BoundLogger]:
+    reference = structlog.wrap_logger(structlog.ReturnLogger(), processors=get_processors(False, **kwargs))  # type: ignore
+    fast = structlog.wrap_logger(structlog.ReturnLogger(), processors=get_processors(True, **kwargs))  # type: ignore
+    return reference.bind(name='fused', env='test'), fast.bind(name='fused', env='test')
+
+
+# Both loggers are called from the same line, so they see the same callsite
+def log_both(loggers: Tuple[structlog.BoundLogger, ...], method_name: str, *args: object, **kwargs: object) -> List[object]:
+    outputs = []
+    for bound_logger in loggers:
+        try:
+            outputs.append(getattr(bound_logger, method_name)(*args, **dict(kwargs)))
+        except structlog.DropEvent:
+            outputs.append(None)
+    return outputs
+
+
+@pytest.fixture(autouse=True)
+def restore_context():
+    yield
+    context.use_backend('structlog')
+    context.clear()
+
+
+def test_selection():
+    processors = get_processors(True)
+
+    assert len(processors) == 2
+    assert isinstance(processors[0], fused.FusedLevelProcessor)
+    assert isinstance(processors[1], fused.FusedStackdriverPipeline)
+
+    assert not any(isinstance(p, fused.FusedStackdriverPipeline) for p in get_processors(False))
+
+    with patch.dict(os.environ, _features):
+        assert len(init.get_final_processors(logging.INFO, [lambda *args: args[2]])) > 2
+
+        # The fused stages are profiled as they are
+        profiled = init.get_final_processors(logging.INFO, profile=True)
+        assert [type(profiling.unwrap(p)) for p in profiled] == [fused.FusedLevelProcessor, fused.FusedStackdriverPipeline]
+        assert all(isinstance(p, profiling.ProfiledProcessor) for p in profiled)
+
+        with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_SAMPLING': 'yes'}):
+            assert len(init.get_final_processors(logging.INFO)) > 2
+
+    with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'no'}):
+        assert len(init.get_final_processors(logging.INFO)) > 2
+
+
+events: List[Tuple[str, Tuple[object, ...], dict]] = [
+    ('info', ('hello',), {'user_id': 1}),
+    ('info', (None,), {}),
+    ('info', ('',), {}),
+    ('debug', ('dropped',), {}),
+    ('warn', ('alias',), {}),
+    ('critical', ('critical',), {}),
+    ('msg', ('msg',), {}),
+    ('info', ('levelno',), {'levelno': logging.ERROR}),
+    ('info', ('level_name',), {'level': 'WARNING'}),
+    ('info', ('unknown_level',), {'level': 'verbose'}),
+    ('error', ('dropped_levelno',), {'levelno': logging.DEBUG}),
+    ('info', ('levelno_and_name',), {'levelno': logging.WARNING, 'level': 'debug'}),
+    ('info', ('lazy',), {'snapshot': Lazy(lambda: {'a': 1})}),
+    ('info', ('timestamp',), {'timestamp': 12345}),
+    ('info', ('callsite',), {'pathname': '/path', 'lineno': 1, 'func_name': 'func'}),
+    ('info', ('stack',), {'stack_info': True}),
+    ('info', ('no_stack',), {'stack_info': False}),
+    ('info', ('exception_key',), {'exception': None}),
+    ('info', ('logger_name',), {'name': 'other'}),
+    ('error', ('exc_info',), {'exc_info': ValueError('error')}),
+    ('error', ('exc_info_false',), {'exc_info': False}),
+    ('exception', ('exception_without_exception',), {}),
+]
+
+
+@freeze_time('2020-10-12')
+@pytest.mark.parametrize('prod', [False, True])
+@pytest.mark.parametrize('method_name, args, kwargs', events)
+def test_same_output(prod: bool, method_name: str, args: Tuple[object, ...], kwargs: dict):
+    reference, fast = log_both(make_loggers(prod=prod), method_name, *args, **kwargs)
+    assert fast == reference
+
+
+@freeze_time('2020-10-12')
+def test_same_output_without_callsite():
+    loggers = make_loggers(callsite='no')
+
+    reference, fast = log_both(loggers, 'info', 'no_callsite')
+
+    assert fast == reference
+    assert 'sourceLocation' not in fast  # type: ignore
+
+
+@freeze_time('2020-10-12')
+@pytest.mark.parametrize('backend', ['structlog', 'contextvar'])
+def test_same_output_with_context(backend: str):
+    loggers = make_loggers(backend=backend)
+
+    context.add(request_id='request', user_id=2)
+    reference, fast = log_both(loggers, 'info', 'context', user_id=1)
+
+    assert fast == reference
+    assert 'request' in fast  # type: ignore
+
+
+@freeze_time('2020-10-12')
+def test_same_output_with_exceptions(capsys: pytest.CaptureFixture):
+    loggers = make_loggers()
+
+    for _ in range(3):  # noqa: WPS122
+        try:
+            raise ValueError('error')
+        except ValueError:
+            reference, fast = log_both(loggers, 'exception', 'failure')
+            assert fast == reference
+            assert 'exception_fingerprint' in fast  # type: ignore
+
+    # The pretty printer prints each traceback, once per chain
+    assert capsys.readouterr().out.count('ValueError: error') == 2
+
+    # Our bound loggers leave it to the processors to add `exc_info` for `exception`
+    try:
+        raise KeyError('error')
+    except KeyError:
+        reference, fast = log_both(loggers, '_proxy_to_logger', 'exception', 'proxied')
+
+    assert fast == reference
+    assert 'KeyError' in capsys.readouterr().out
+
+
+@freeze_time('2020-10-12')
+def test_same_output_with_level_table():
+    table = LevelTable(logging.INFO, {'fused.db': logging.DEBUG, 'fused.noisy': logging.ERROR})
+    loggers = make_loggers(level_table=table)
+
+    for name in ('fused.db', 'fused.noisy', 'fused'):
+        bound = tuple(logger.bind(name=name) for logger in loggers)
+        for method_name in ('debug', 'warning', 'error'):
+            reference, fast = log_both(bound, method_name, 'event')
+            assert fast == reference
+
+
+def test_counters():
+    counters.reset()
+    level_processor = get_processors(True)[0]
+
+    level_processor(None, 'info', {'event': 'event', 'name': 'counted'})
+    with pytest.raises(structlog.DropEvent):
+        level_processor(None, 'debug', {'event': 'event', 'name': 'counted'})
+
+    stats = counters.stats()
+    assert stats['events'] == {'info': 1}
+    assert stats['dropped'] == {'debug': 1}
+    assert stats['loggers'] == {'counted': 1}
+
+
+@freeze_time('2020-10-12')
+def test_same_output_through_bridge():
+    outputs: List[object] = []
+
+    def configure(use_fused: bool) -> Callable[[], None]:  # noqa: WPS430
+        structlog.configure(processors=get_processors(use_fused), logger_factory=structlog.ReturnLoggerFactory())
+
+        def handle():  # noqa: WPS430
+            logger = structlog.get_logger(name='bridge')
+            record = logging.LogRecord('bridge', logging.INFO, __name__, 0, ' hello %s ', ('world',), None)
+
+            handler = intercept.StructlogBridgeHandler(struct_logger=logger.bind())
+            with patch.object(intercept, 'dispatch', side_effect=lambda _, __, event: outputs.append(event)):
+                handler.handle(record)
+
+        return handle
+
+    try:  # noqa: WPS501
+        configure(False)()
+        configure(True)()
+    finally:
+        structlog.reset_defaults()
+
+    assert len(outputs) == 2
+    assert outputs[0] == outputs[1]
+    assert 'hello world' in outputs[0]  # type: ignore
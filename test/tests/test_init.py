@@ -1,3 +1,4 @@
+import io
 import logging
 import os
 import warnings
@@ -7,11 +8,16 @@ from unittest.mock import Mock, call, patch
 import pytest
 import structlog
 
-from outcome.logkit import init, stackdriver
+from outcome.logkit import binary, bound, encoders, fused, init, logger, sinks, stackdriver
 from outcome.logkit.types import EventDict
 
 mock_logger = Mock()
 
+_binary_features = {
+    'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'yes',
+    'WITH_FEAT_CO_OUTCOME_LOGKIT_OUTPUT_FORMAT': 'binary',
+}
+
 
 def mock_logger_factory():
     return mock_logger
@@ -46,6 +52,14 @@ def test_logger_name_processor():
     assert out['logger'] == 'logger_name'
 
 
+def test_logger_name_processor_keeps_record_name():
+    # An intercepted record, dispatched through the root logger
+    out = init.logger_name_processor(logger=None, name='info', event_dict={'name': None, 'logger': 'app.db'})
+    assert out == {'logger': 'app.db'}
+
+    assert init.logger_name_processor(logger=None, name='info', event_dict={'name': None}) == {'logger': None}
+
+
 def test_logger_no_name_processor():
     event_dict = {'no_name': 'logger_name'}
     out = init.logger_name_processor(logger=None, name='', event_dict=event_dict)
@@ -60,6 +74,17 @@ def test_configure_structured_logging():
     assert isinstance(renderer, structlog.dev.ConsoleRenderer)
 
 
+@pytest.mark.parametrize('with_sink', [False, True])
+def test_console_colors(with_sink: bool):
+    sink = sinks.BackgroundSink(io.BytesIO()) if with_sink else None
+
+    with patch.object(structlog.dev, 'ConsoleRenderer') as renderer:
+        init.configure_structured_logging(logging.INFO, sink=sink)
+
+    # Only printed output is coloured
+    renderer.assert_called_once_with(colors=not with_sink)
+
+
 @patch('outcome.logkit.init.env.is_prod', return_value=True)
 def test_configure_structured_logging_prod(mocked_is_prod: Mock):
     init.configure_structured_logging(logging.INFO)
@@ -75,9 +100,10 @@ def test_configure_structured_logging_prod(mocked_is_prod: Mock):
 def test_configure_structured_logging_gcp(mocked_is_google_cloud: Mock):
     init.configure_structured_logging(logging.INFO)
 
-    renderer = structlog.get_config()['processors'][-1]
+    pipeline = structlog.get_config()['processors'][-1]
 
-    assert isinstance(renderer, stackdriver.StackdriverRenderer)
+    assert isinstance(pipeline, fused.FusedStackdriverPipeline)
+    assert isinstance(pipeline.renderer, stackdriver.StackdriverRenderer)
 
 
 def test_configure_structured_logging_custom_processors():
@@ -185,3 +211,226 @@ class TestLogLevelProcessor:  # noqa: WPS214
         out = processor.normalize_level(method_name='name', event_dict=event_dict.copy())
 
         assert out == {'level': 'fatal', 'levelno': logging.FATAL}
+
+
+def test_configure_structured_logging_sink():
+    sink = sinks.BackgroundSink(io.BytesIO())
+
+    init.configure_structured_logging(logging.INFO, sink=sink)
+
+    assert structlog.get_config()['logger_factory'] is sink
+
+
+def test_configure_structured_logging_without_sink():
+    sink = sinks.BackgroundSink(io.BytesIO())
+    init.configure_structured_logging(logging.INFO, sink=sink)
+
+    # The previous sink isn't kept
+    init.configure_structured_logging(logging.INFO)
+    assert isinstance(structlog.get_config()['logger_factory'], structlog.PrintLoggerFactory)
+
+
+def test_configure_structured_logging_keeps_factory():
+    # The application configured its own factory before
+    structlog.configure(logger_factory=mock_logger_factory)
+
+    init.configure_structured_logging(logging.INFO)
+    assert structlog.get_config()['logger_factory'] is mock_logger_factory
+
+    # Unless it's replaced by a sink
+    sink = sinks.BackgroundSink(io.BytesIO())
+    init.configure_structured_logging(logging.INFO, sink=sink)
+    assert structlog.get_config()['logger_factory'] is sink
+
+
+def test_configure_structured_logging_file_sink(tmp_path):
+    path = tmp_path / 'app.log'
+
+    with patch.dict(os.environ, {'LOGKIT_LOG_FILE': str(path)}):
+        init.configure_structured_logging(logging.INFO)
+
+    sink = structlog.get_config()['logger_factory']
+
+    assert isinstance(sink, sinks.FileSink)
+    assert sink.path == str(path)
+    sink.close()
+
+
+@patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_FORK_AGGREGATION': 'true'})
+def test_configure_structured_logging_fork_aggregation():
+    init.configure_structured_logging(logging.INFO)
+    sink = structlog.get_config()['logger_factory']
+
+    assert isinstance(sink, sinks.AggregatingSink)
+    assert isinstance(sink.sink, sinks.BackgroundSink)
+
+    # An aggregating sink isn't wrapped again
+    init.configure_structured_logging(logging.INFO, sink=sink)
+    assert structlog.get_config()['logger_factory'] is sink
+
+    sink.close(5)
+
+
+def test_reconfigure_file_sink(tmp_path):
+    with patch.dict(os.environ, {'LOGKIT_LOG_FILE': str(tmp_path / 'app.log')}):
+        init.configure_structured_logging(logging.INFO)
+        sink = structlog.get_config()['logger_factory']
+
+        # The same file is written by the same sink
+        init.configure_structured_logging(logging.INFO)
+        assert structlog.get_config()['logger_factory'] is sink
+
+    with patch.dict(os.environ, {'LOGKIT_LOG_FILE': str(tmp_path / 'other.log')}):
+        init.configure_structured_logging(logging.INFO)
+
+    other = structlog.get_config()['logger_factory']
+    assert other is not sink
+    assert sink._closed
+    assert not other._closed
+
+    # A given sink replaces the one logkit created
+    given = sinks.BackgroundSink(io.BytesIO())
+    init.configure_structured_logging(logging.INFO, sink=given)
+    assert other._closed
+
+    init.configure_structured_logging(logging.INFO)
+    assert not given._closed
+
+
+@patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_FORK_AGGREGATION': 'true'})
+def test_reconfigure_fork_aggregation():
+    init.configure_structured_logging(logging.INFO)
+    sink = structlog.get_config()['logger_factory']
+
+    init.configure_structured_logging(logging.INFO)
+    assert structlog.get_config()['logger_factory'] is sink
+
+    # The given sink is wrapped, and the previous sinks are closed
+    given = sinks.BackgroundSink(io.BytesIO())
+    init.configure_structured_logging(logging.INFO, sink=given)
+
+    wrapper = structlog.get_config()['logger_factory']
+    assert wrapper.sink is given
+    assert not sink._reader.is_alive()
+    assert sink.sink._closed
+
+    # Only the wrapper is detached, the given sink stays open
+    with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_FORK_AGGREGATION': 'false'}):
+        init.configure_structured_logging(logging.INFO, sink=given)
+
+    assert not wrapper._reader.is_alive()
+    assert not given._closed
+
+
+@patch('outcome.logkit.init.env.is_prod', return_value=True)
+@patch.dict(os.environ, _binary_features)
+def test_reconfigure_prod(mocked_is_prod: Mock):
+    init.configure_structured_logging(logging.INFO)
+    sink = structlog.get_config()['logger_factory']
+
+    # The repeated configuration isn't installed, so its sink is closed
+    given = sinks.BackgroundSink(io.BytesIO())
+    with warnings.catch_warnings(record=True):
+        init.configure_structured_logging(logging.INFO, sink=given)
+
+    assert structlog.get_config()['logger_factory'] is sink
+    assert not sink._closed
+    assert not given._closed
+
+    with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_FORK_AGGREGATION': 'true'}):
+        with warnings.catch_warnings(record=True):
+            init.configure_structured_logging(logging.INFO, sink=given)
+
+    assert not sink._closed
+
+
+def test_get_sink_without_file():
+    assert init.get_sink() is None
+
+
+def test_configure_structured_logging_wrapper_class():
+    init.configure_structured_logging(logging.WARNING)
+
+    wrapper_class = structlog.get_config()['wrapper_class']
+
+    assert issubclass(wrapper_class, bound.LevelBoundLogger)
+    assert wrapper_class.min_level == logging.WARNING
+
+
+def test_configure_structured_logging_resets_loggers():
+    init.configure_structured_logging(logging.INFO)
+    cached = logger.get_logger('foo')
+
+    init.configure_structured_logging(logging.INFO)
+
+    assert logger.get_logger('foo') is not cached
+
+
+@patch.dict(
+    os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'yes', 'WITH_FEAT_CO_OUTCOME_LOGKIT_JSON_ENCODER': 'json'}
+)
+def test_json_encoder_feature():
+    renderer = init.get_final_processors(logging.INFO)[-1].renderer  # type: ignore
+
+    assert isinstance(renderer, stackdriver.StackdriverRenderer)
+    assert isinstance(renderer.encoder, encoders.JSONEncoder)
+
+
+@patch.dict(os.environ, _binary_features)
+def test_binary_output_feature():
+    assert isinstance(init.get_final_processors(logging.INFO)[-1].renderer, binary.BinaryRenderer)  # type: ignore
+    assert isinstance(init.get_final_processors(logging.INFO, [lambda *args: args[2]])[-1], binary.BinaryRenderer)
+
+    # The console output is never binary
+    with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': 'no'}):
+        assert not init.use_binary_output()
+
+
+@patch('outcome.logkit.init.env.is_prod', return_value=False)
+def test_pretty_printer_binary_output(mocked_is_prod: Mock, capsys: pytest.CaptureFixture):
+    # The binary frames are written to stdout, the traceback goes to stderr
+    with patch.dict(os.environ, _binary_features):
+        processors = [*init.get_final_processors(logging.INFO), *init.get_final_processors(logging.INFO, [lambda *args: args[2]])]
+
+    printers = [p for p in processors if isinstance(p, structlog.processors.ExceptionPrettyPrinter)]
+    printers.extend(p.pretty_printer for p in processors if isinstance(p, fused.FusedStackdriverPipeline))
+
+    assert len(printers) == 2
+    for printer in printers:
+        printer(None, 'error', {'exception': 'Traceback'})
+
+    output = capsys.readouterr()
+    assert not output.out
+    assert output.err.count('Traceback') == 2
+
+
+@patch.dict(os.environ, _binary_features)
+def test_configure_structured_logging_binary_output():
+    init.configure_structured_logging(logging.INFO)
+    sink = structlog.get_config()['logger_factory']
+
+    assert isinstance(sink, sinks.BackgroundSink)
+    sink.close()
+
+    # A given sink is kept
+    sink = sinks.BackgroundSink(io.BytesIO())
+    init.configure_structured_logging(logging.INFO, sink=sink)
+    assert structlog.get_config()['logger_factory'] is sink
+
+
+@patch.dict(os.environ, {'LOGKIT_LOG_LEVELS': 'urllib3=WARNING,app.db=DEBUG'})
+def test_get_level_rules():
+    assert init.get_level_rules() == {'urllib3': logging.WARNING, 'app.db': logging.DEBUG}
+
+
+def test_configure_structured_logging_level_rules():
+    table = init.LevelTable(logging.INFO, {'app.db': logging.DEBUG})
+    init.configure_structured_logging(logging.INFO, level_table=table)
+
+    config = structlog.get_config()
+    level_processor = config['processors'][2]
+
+    assert config['wrapper_class'].min_level == logging.DEBUG
+    assert level_processor.level_table is table
+    assert logger.get_logger('app.db').debug_enabled
+    assert not logger.get_logger('app').debug_enabled
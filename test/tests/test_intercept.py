@@ -1,12 +1,18 @@
+import io
 import logging
+import os
+import sys
+import threading
 from importlib import reload
 from typing import List, Sequence, cast
-from unittest.mock import Mock
+from unittest.mock import MagicMock, Mock, call, patch
 
 import pytest
 import structlog
+from freezegun import freeze_time
 
-from outcome.logkit import intercept, types
+from outcome.logkit import counters, init, intercept, logger, sinks, types
+from outcome.logkit.levels import LevelTable
 
 
 @pytest.fixture(autouse=True)
@@ -168,6 +174,103 @@ def test_buffer_handler():
 
     assert len(buffer.buffer) == 2
     assert buffer.buffer[0].getMessage() == 'hello'
+    assert buffer.dropped == 0
+
+
+def test_buffer_handler_overflow():
+    logger = logging.getLogger('test_buffer_handler_overflow')
+
+    buffer = intercept.BufferHandler(logging.DEBUG, capacity=2)
+
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.handlers = [buffer]
+
+    for i in range(5):
+        logger.info('message %d', i)
+
+    assert [record.getMessage() for record in buffer.buffer] == ['message 3', 'message 4']
+    assert buffer.dropped == 3
+
+
+def test_buffer_dropped_records():
+    with patch.object(intercept, 'get_logger') as get_logger:
+        with intercept.intercepted_logging(logging.INFO, buffer_capacity=2):
+            for i in range(5):
+                logging.getLogger('overflow').info('message %d', i)
+
+    get_logger.assert_any_call('outcome.logkit.intercept')
+    get_logger.return_value.warning.assert_called_once_with('log_records_dropped', dropped_count=3, buffer_capacity=2)
+
+
+def make_record(name: str, level: int, msg: str) -> logging.LogRecord:
+    return logging.LogRecord(name, level, __file__, 1, msg, (), None)
+
+
+class TestLockFreeHandler:
+    def test_no_lock(self):
+        handler = intercept.StructlogHandler()
+        assert handler.lock is None
+
+        # Nothing to reinitialize after a fork
+        handler._at_fork_reinit()
+        handler.acquire()
+        handler.release()
+
+    def test_handle(self):
+        handler = intercept.StructlogHandler()
+        handler.addFilter(lambda record: record.msg != 'filtered')
+
+        with patch.object(handler, 'emit') as emit:
+            assert handler.handle(make_record('handle', logging.INFO, 'kept'))
+            assert not handler.handle(make_record('handle', logging.INFO, 'filtered'))
+
+        assert emit.call_count == 1
+
+    def test_concurrent_emit(self):
+        handler = intercept.StructlogHandler()
+        barrier = threading.Barrier(2, timeout=5)
+
+        # With a lock around emit, the second thread would never reach the barrier
+        with patch.object(handler, 'emit', side_effect=lambda record: barrier.wait()):
+            threads = [
+                threading.Thread(target=handler.handle, args=(make_record('concurrent', logging.INFO, str(i)),)) for i in range(2)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        assert not barrier.broken
+
+
+class TestHandleRecords:
+    def test_batch(self):
+        handler = intercept.StructlogHandler(level=logging.INFO)
+        records = [make_record('batch', logging.INFO, 'kept'), make_record('batch', logging.DEBUG, 'dropped')]
+
+        with patch.object(handler, 'emit') as emit:
+            intercept.handle_records(records, handler)
+
+        emit.assert_called_once_with(records[0])
+
+    def test_batch_filters(self):
+        handler = intercept.StructlogHandler(level=logging.DEBUG)
+        handler.addFilter(lambda record: record.msg != 'filtered')
+        records = [make_record('batch', logging.INFO, 'kept'), make_record('batch', logging.INFO, 'filtered')]
+
+        with patch.object(handler, 'emit') as emit:
+            intercept.handle_records(records, handler)
+
+        emit.assert_called_once_with(records[0])
+
+    def test_other_handlers(self):
+        handler = Mock()
+        records = [make_record('other', logging.INFO, 'one'), make_record('other', logging.INFO, 'two')]
+
+        intercept.handle_records(records, handler)
+
+        assert handler.handle.call_count == 2
 
 
 mock_logger = Mock()
@@ -279,3 +382,235 @@ class TestHandlerList:
         hl.relax()
 
         hl.append(Mock())
+
+
+def test_structlog_handler_follows_configuration():
+    first_logger = Mock()
+    second_logger = Mock()
+
+    handler = intercept.StructlogHandler()
+    record = logging.LogRecord('name', logging.INFO, __name__, 0, 'message', (), None)
+
+    structlog.configure(processors=[], logger_factory=lambda *args: first_logger)
+    logger.reset_loggers()
+    handler.handle(record)
+
+    structlog.configure(processors=[], logger_factory=lambda *args: second_logger)
+    logger.reset_loggers()
+    handler.handle(record)
+
+    assert len(first_logger.mock_calls) == 1
+    assert len(second_logger.mock_calls) == 1
+
+
+class TestStructlogBridgeHandler:
+    @pytest.fixture(autouse=True)
+    def configure(self):
+        output: List[object] = []
+
+        class ListLogger:
+            def __getattr__(self, name: str):
+                return output.append
+
+        structlog.configure(processors=init.get_final_processors(logging.INFO), logger_factory=lambda *args: ListLogger())
+        logger.reset_loggers()
+
+        self.output = output
+        yield
+        structlog.reset_defaults()
+        logger.reset_loggers()
+
+    def make_record(self, level: int = logging.INFO, msg: object = ' hello %s ', exc_info: object = None):
+        record = logging.LogRecord('bridge', level, __name__, 0, msg, ('world',), exc_info)  # type: ignore
+        record.__dict__['bindings'] = {'user_id': 1}
+        return record
+
+    @freeze_time('2020-10-12')
+    def test_same_output(self):
+        intercept.StructlogHandler().handle(self.make_record())
+        intercept.StructlogBridgeHandler().handle(self.make_record())
+
+        assert len(self.output) == 2
+        assert self.output[0] == self.output[1]
+        assert 'hello world' in self.output[0]  # type: ignore
+
+    @freeze_time('2020-10-12')
+    def test_same_output_with_exception(self):
+        try:
+            raise ValueError('error')
+        except ValueError:
+            exc_info = sys.exc_info()
+
+        intercept.StructlogHandler().handle(self.make_record(logging.ERROR, exc_info=exc_info))
+
+        # Fresh processors, so the repeated traceback isn't suppressed
+        structlog.configure(processors=init.get_final_processors(logging.INFO))
+        logger.reset_loggers()
+
+        intercept.StructlogBridgeHandler().handle(self.make_record(logging.ERROR, exc_info=exc_info))
+
+        assert len(self.output) == 2
+        assert self.output[0] == self.output[1]
+
+    def test_message_not_formatted_when_dropped(self):
+        msg = MagicMock()
+
+        intercept.StructlogBridgeHandler().handle(self.make_record(logging.DEBUG, msg=msg))
+
+        assert not self.output
+        msg.__str__.assert_not_called()
+
+    def test_custom_level(self):
+        record = self.make_record(logging.INFO + 5)
+        record.levelname = 'notice'
+
+        struct_logger = Mock(spec=structlog.BoundLoggerBase)
+        struct_logger._logger = Mock()
+        struct_logger._processors = []
+        struct_logger._context = {}
+
+        intercept.StructlogBridgeHandler(struct_logger).handle(record)
+
+        struct_logger._logger.notice.assert_called_once()
+
+    def test_follows_configuration(self):
+        handler = intercept.StructlogBridgeHandler()
+        handler.handle(self.make_record())
+
+        second_output: List[object] = []
+        structlog.configure(
+            processors=[lambda logger, name, event_dict: second_output.append(event_dict) or event_dict],
+            logger_factory=structlog.ReturnLoggerFactory(),
+        )
+        logger.reset_loggers()
+
+        handler.handle(self.make_record())
+
+        assert len(self.output) == 1
+        assert len(second_output) == 1
+
+    def test_not_a_bound_logger(self):
+        struct_logger = Mock()
+
+        intercept.StructlogBridgeHandler(struct_logger).handle(self.make_record())
+
+        struct_logger.info.assert_called_once()
+
+    def test_batch(self):
+        handler = intercept.StructlogBridgeHandler()
+        counters.reset()
+
+        # The logger and its chain are resolved once for the batch
+        with patch.object(intercept, 'resolve_logger', wraps=intercept.resolve_logger) as resolve:
+            handler.handle_batch([self.make_record(), self.make_record(logging.DEBUG), self.make_record(logging.WARNING)])
+
+        assert resolve.call_count == 1
+        assert len(self.output) == 2
+        assert counters.stats()['intercepted'] == 3
+
+    def test_batch_not_a_bound_logger(self):
+        struct_logger = Mock()
+
+        intercept.StructlogBridgeHandler(struct_logger).handle_batch([self.make_record(), self.make_record()])
+
+        assert struct_logger.info.call_count == 2
+
+
+def test_dispatch():
+    target = Mock()
+
+    intercept.dispatch(target, 'info', 'message')
+    intercept.dispatch(target, 'info', (('arg',), {'key': 'value'}))
+    intercept.dispatch(target, 'info', {'key': 'value'})
+
+    assert target.info.mock_calls == [call('message'), call('arg', key='value'), call(key='value')]
+
+
+def test_setup_structlog_intercept_bridge():
+    root_handlers = logging.root.handlers
+
+    try:  # noqa: WPS501
+        assert isinstance(intercept.setup_structlog_intercept(logging.INFO), intercept.StructlogBridgeHandler)
+
+        with patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_INTERCEPT_BRIDGE': 'false'}):
+            handler = intercept.setup_structlog_intercept(logging.INFO)
+            assert not isinstance(handler, intercept.StructlogBridgeHandler)
+    finally:
+        logging.root.handlers = root_handlers
+
+
+class TestInterceptLevelRules:
+    @pytest.fixture(autouse=True)
+    def restore(self):
+        root_handlers = logging.root.handlers
+        root_level = logging.root.level
+        yield
+        intercept.InterceptLogger.level_table = None
+        logging.setLoggerClass(logging.Logger)
+        logging.root.handlers = root_handlers
+        logging.root.setLevel(root_level)
+
+    @pytest.mark.parametrize('stackdriver', ['yes', 'no'])
+    @pytest.mark.parametrize('bridge', ['true', 'false'])
+    def test_end_to_end(self, stackdriver: str, bridge: str):
+        stream = io.BytesIO()
+        sink = sinks.BackgroundSink(stream)
+        table = LevelTable(logging.INFO, {'rules.db': logging.DEBUG, 'rules.noisy': logging.ERROR})
+        features = {
+            'WITH_FEAT_CO_OUTCOME_LOGKIT_USE_STACKDRIVER': stackdriver,
+            'WITH_FEAT_CO_OUTCOME_LOGKIT_INTERCEPT_BRIDGE': bridge,
+        }
+
+        try:  # noqa: WPS501
+            with patch.dict(os.environ, features):
+                with intercept.intercepted_logging(logging.INFO, table):
+                    init.configure_structured_logging(logging.INFO, sink=sink, level_table=table)
+
+            # A rule can lower the level of a logger, as well as raise it
+            logging.getLogger('rules.db').debug('db query')
+            logging.getLogger('rules.noisy').warning('noisy warning')
+            logging.getLogger('rules.other').debug('other debug')
+            logging.getLogger('rules.other').info('other info')
+            sink.close()
+        finally:
+            structlog.reset_defaults()
+            logger.reset_loggers()
+
+        output = stream.getvalue()
+        assert b'db query' in output
+        assert b'other info' in output
+        assert b'noisy warning' not in output
+        assert b'other debug' not in output
+
+    def test_intercept_logger(self):
+        table = LevelTable(logging.INFO, {'rules.db': logging.DEBUG, 'rules.noisy': logging.ERROR})
+        intercept.reset_standard_library_logging(logging.INFO, table)
+
+        assert isinstance(logging.getLogger('rules.db.session'), intercept.InterceptLogger)
+
+        assert logging.getLogger('rules.db.session').isEnabledFor(logging.DEBUG)
+        assert not logging.getLogger('rules.noisy').isEnabledFor(logging.WARNING)
+        assert logging.getLogger('rules.noisy').isEnabledFor(logging.ERROR)
+        assert not logging.getLogger('rules.other').isEnabledFor(logging.DEBUG)
+        assert logging.getLogger('rules.other').isEnabledFor(logging.INFO)
+
+        disabled = logging.getLogger('rules.db.disabled')
+        disabled.disabled = True
+        assert not disabled.isEnabledFor(logging.ERROR)
+
+    def test_existing_loggers(self):
+        existing = logging.getLogger('rules.existing')
+        assert not isinstance(existing, intercept.InterceptLogger)
+
+        table = LevelTable(logging.INFO, {'rules.existing': logging.ERROR})
+        intercept.reset_standard_library_logging(logging.INFO, table)
+
+        assert existing.level == logging.ERROR
+
+    def test_handler_level(self):
+        table = LevelTable(logging.INFO, {'rules.db': logging.DEBUG})
+
+        with intercept.intercepted_logging(logging.INFO, table):
+            assert logging.root.handlers[0].level == logging.DEBUG
+
+        assert logging.root.handlers[0].level == logging.DEBUG
@@ -0,0 +1,47 @@
+import logging
+from unittest.mock import Mock
+
+import pytest
+import structlog
+
+from outcome.logkit import init
+from outcome.logkit.lazy import Lazy, resolve_lazy_values
+
+
+def test_resolve():
+    func = Mock(return_value='value')
+    value = Lazy(func, 1, key='key')
+
+    assert not func.mock_calls
+    assert value.resolve() == 'value'
+    func.assert_called_once_with(1, key='key')
+
+
+def test_repr():
+    assert repr(Lazy(dict)) == "Lazy(<class 'dict'>)"
+
+
+def test_resolve_lazy_values():
+    event_dict = {'event': 'event', 'snapshot': Lazy(lambda: {'a': 1}), 'callback': print}
+
+    assert resolve_lazy_values(None, 'info', event_dict) == {'event': 'event', 'snapshot': {'a': 1}, 'callback': print}
+
+
+@pytest.fixture
+def output():
+    structlog.reset_defaults()
+    capture = structlog.testing.LogCapture()
+    structlog.configure(processors=init.get_final_processors(logging.INFO, [capture]))
+    yield capture
+    structlog.reset_defaults()
+
+
+def test_not_resolved_for_dropped_events(output: structlog.testing.LogCapture):
+    func = Mock(return_value='value')
+
+    structlog.get_logger().debug('dropped', snapshot=Lazy(func))
+    assert not func.mock_calls
+
+    structlog.get_logger().info('kept', snapshot=Lazy(func))
+    func.assert_called_once_with()
+    assert output.entries[0]['snapshot'] == 'value'
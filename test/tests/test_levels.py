@@ -0,0 +1,95 @@
+import logging
+
+import pytest
+import structlog
+
+from outcome.logkit import levels
+
+
+@pytest.mark.parametrize(
+    'value,expected',
+    [(10, 10), ('20', 20), ('warning', logging.WARNING), (' ERROR ', logging.ERROR)],
+)
+def test_parse_level(value: object, expected: int):
+    assert levels.parse_level(value) == expected  # type: ignore
+
+
+def test_parse_level_unknown():
+    with pytest.raises(ValueError):
+        levels.parse_level('loud')
+
+
+def test_parse_level_rules():
+    rules = levels.parse_level_rules('urllib3=WARNING, app.db=10,google.*=error,')
+
+    assert rules == {'urllib3': logging.WARNING, 'app.db': logging.DEBUG, 'google.*': logging.ERROR}
+    assert levels.parse_level_rules('') == {}
+
+
+@pytest.mark.parametrize('rules', ['urllib3', '=INFO', 'urllib3=LOUD'])
+def test_parse_level_rules_invalid(rules: str):
+    with pytest.raises(ValueError):
+        levels.parse_level_rules(rules)
+
+
+def test_method_level():
+    assert levels.method_level('exception') == logging.FATAL
+    assert levels.method_level('msg') == logging.INFO
+
+
+class TestLevelTable:
+    @pytest.fixture
+    def table(self):
+        rules = {'urllib3': 'WARNING', 'app.db': logging.DEBUG, 'google.*': logging.ERROR, 'google.auth': logging.INFO}
+        return levels.LevelTable(logging.INFO, rules)
+
+    @pytest.mark.parametrize(
+        'name,expected',
+        [
+            (None, logging.INFO),
+            ('', logging.INFO),
+            ('app', logging.INFO),
+            ('urllib3', logging.WARNING),
+            ('urllib3.connectionpool', logging.WARNING),
+            ('urllib3_other', logging.INFO),
+            ('app.db', logging.DEBUG),
+            ('app.db.session', logging.DEBUG),
+            ('google', logging.INFO),
+            ('google.cloud', logging.ERROR),
+            ('google.cloud.storage', logging.ERROR),
+            ('google.auth', logging.INFO),
+            ('google.auth.transport', logging.INFO),
+        ],
+    )
+    def test_effective_level(self, table: levels.LevelTable, name: str, expected: int):
+        assert table.effective_level(name) == expected
+        # Cached
+        assert table.effective_level(name) == expected
+
+    def test_rule_level(self, table: levels.LevelTable):
+        assert table.rule_level('app') is None
+        assert table.rule_level('app.db') == logging.DEBUG
+
+    def test_min_level(self, table: levels.LevelTable):
+        assert table.min_level == logging.DEBUG
+        assert levels.LevelTable(logging.INFO).min_level == logging.INFO
+
+    def test_bool(self, table: levels.LevelTable):
+        assert table
+        assert not levels.LevelTable(logging.INFO)
+
+
+class TestLogLevelProcessorRules:
+    def test_filter(self):
+        table = levels.LevelTable(logging.INFO, {'app.db': logging.DEBUG})
+        processor = levels.LogLevelProcessor(logging.INFO, table)
+
+        event_dict = {'levelno': logging.DEBUG, 'level': 'debug', 'logger': 'app.db'}
+        assert processor.filter_on_level(event_dict) == {'level': 'debug', 'logger': 'app.db'}
+
+        with pytest.raises(structlog.DropEvent):
+            processor.filter_on_level({'levelno': logging.DEBUG, 'level': 'debug', 'logger': 'app'})
+
+    def test_empty_table(self):
+        processor = levels.LogLevelProcessor(logging.INFO, levels.LevelTable(logging.INFO))
+        assert processor.level_table is None
@@ -0,0 +1,131 @@
+from collections import deque
+
+import pytest
+
+from outcome.logkit.limits import _BoundedRepr  # noqa: WPS450
+from outcome.logkit.limits import SizeCapProcessor, SizeLimits, cap_event, cap_value, truncated_key
+
+limits = SizeLimits(max_depth=2, max_items=3, max_string=5)
+
+
+class Repr:
+    def __init__(self, text: str):
+        self.text = text
+
+    def __repr__(self) -> str:
+        return self.text
+
+
+class Structlog:
+    def __structlog__(self):
+        return {'items': list(range(10))}
+
+
+def test_unchanged_values_are_not_copied():
+    value = {'a': [1, 'short', None], 'c': (1.5, True)}
+    short = Repr('short')
+
+    assert cap_value(value, limits) is value
+    assert cap_value(short, limits) is short
+    assert cap_value([short], limits)[0] is short  # type: ignore
+
+
+def test_fallback_capped():
+    # The value is capped as the encoder would serialize it
+    assert cap_value(Repr('abcdefgh'), limits) == 'abcde...<truncated 3 chars>'
+    assert cap_value({'a': Repr('abcdefgh')}, limits) == {'a': 'abcde...<truncated 3 chars>'}
+    assert cap_value(Structlog(), limits) == {'items': [0, 1, 2, '<truncated 7 items>']}
+
+
+def test_bounded_repr():
+    calls = []
+
+    class Counted:  # noqa: WPS431
+        def __init__(self, n: int):
+            self.n = n
+
+        def __repr__(self) -> str:
+            calls.append(self.n)
+            return f'<{self.n}>'
+
+    # Only the items that are kept are turned into strings
+    assert cap_value(deque(Counted(n) for n in range(100)), limits) == 'deque...<truncated 22 chars>'
+    assert calls == [0, 1, 2]
+
+    short = {1}
+    assert cap_value(short, limits) is short
+
+
+@pytest.mark.parametrize(
+    'value, expected, truncated',
+    [
+        ({1, 2}, '{1, 2}', False),
+        (set(range(5)), '{0, 1, 2, ...}', True),
+        (frozenset(range(5)), 'frozenset({0, 1, 2, ...})', True),
+        (deque([set(), frozenset(), {}]), 'deque([set(), frozenset(), {}])', False),
+        (deque([{'a': 1, 'b': 2, 'c': 3, 'd': 4}]), "deque([{'a': 1, 'b': 2, 'c': 3, ...}])", True),
+        (deque([[[1]], {'a': {'b': 1}}]), "deque([[[...]], {'a': {...}}])", True),
+        (deque(['abcdefgh']), "deque(['abcde...<truncated 3 chars>'])", True),
+        (deque([Repr('abcdefgh'), 123456789]), 'deque([abcde...<truncated 3 chars>, 12345...<truncated 4 chars>])', True),
+        (Repr('abcdefgh'), 'abcdefgh', False),
+    ],
+)
+def test_bounded_repr_output(value: object, expected: str, truncated: bool):
+    bounded = _BoundedRepr(limits, 1)
+
+    assert bounded.repr(value) == expected
+    assert bounded.truncated is truncated
+
+
+@pytest.mark.parametrize(
+    'value, expected',
+    [
+        ('abcdefgh', 'abcde...<truncated 3 chars>'),
+        ([1, 2, 3, 4, 5], [1, 2, 3, '<truncated 2 items>']),
+        ((1, 'abcdefgh'), [1, 'abcde...<truncated 3 chars>']),
+        ({'a': 1, 'b': 2, 'c': 3, 'd': 4}, {'a': 1, 'b': 2, 'c': 3, '...': '<truncated 1 items>'}),
+        ({'a': 1, 'b': 'abcdefgh'}, {'a': 1, 'b': 'abcde...<truncated 3 chars>'}),
+        ({'a': {'b': {'c': 1}}}, {'a': {'b': '<truncated dict of 1 items>'}}),
+        ([[[1, 2]]], [['<truncated list of 2 items>']]),
+    ],
+)
+def test_cap_value(value: object, expected: object):
+    assert cap_value(value, limits) == expected
+
+
+def test_truncated_and_too_many_items():
+    assert cap_value(['abcdefgh', 2, 3, 4], limits) == ['abcde...<truncated 3 chars>', 2, 3, '<truncated 1 items>']
+    assert cap_value({'a': 'abcdefgh', 'b': 2, 'c': 3, 'd': 4}, limits) == {
+        'a': 'abcde...<truncated 3 chars>',
+        'b': 2,
+        'c': 3,
+        '...': '<truncated 1 items>',
+    }
+
+
+def test_cap_event():
+    event = cap_event({'event': 'short', 'payload': 'abcdefgh', 'items': list(range(10))}, limits)
+
+    assert event['event'] == 'short'
+    assert event['payload'] == 'abcde...<truncated 3 chars>'
+    assert event[truncated_key] == ['payload', 'items']
+
+    assert truncated_key not in cap_event({'event': 'short'}, limits)
+
+
+def test_cap_event_keeps_traceback_tail():
+    event = cap_event({'exception': 'Traceback\nValueError', 'stack': 'Stack\ncall()', 'payload': 'abcdefgh'}, limits)
+
+    assert event['exception'] == '<truncated 15 chars>...Error'
+    assert event['stack'] == '<truncated 7 chars>...all()'
+    assert event['payload'] == 'abcde...<truncated 3 chars>'
+    assert event[truncated_key] == ['exception', 'stack', 'payload']
+
+    assert cap_event({'exception': ['abcdefgh']}, limits)['exception'] == ['abcde...<truncated 3 chars>']
+
+
+def test_processor():
+    processor = SizeCapProcessor(limits)
+    assert processor(None, 'info', {'payload': 'abcdefgh'})[truncated_key] == ['payload']
+
+    assert SizeCapProcessor().limits.max_line_bytes == 250 * 1024
@@ -1,15 +1,30 @@
+import logging
 from importlib import reload
+from typing import List
 
 import pytest
 import structlog
 
-from outcome.logkit import get_logger
+from outcome.logkit import get_logger, logger
+from outcome.logkit.bound import make_level_bound_logger
+from outcome.logkit.levels import LevelTable
+
+
+class ListLogger:
+    def __init__(self, events: List[str]):
+        self.events = events
+
+    def msg(self, event: str):
+        self.events.append(event)
+
+    info = warning = msg
 
 
 @pytest.fixture(autouse=True)
 def reload_structlog():
     reload(structlog)
     structlog.reset_defaults()
+    logger.reset_loggers()
 
 
 def test_get_unconfigured():
@@ -20,3 +35,93 @@ def test_get_unconfigured():
 def test_get_configured():
     structlog.configure()
     get_logger('foo')
+
+
+def test_level_check():
+    structlog.configure(wrapper_class=make_level_bound_logger(logging.INFO))
+
+    logger = get_logger('foo')
+
+    assert logger.is_enabled_for(logging.INFO)
+    assert not logger.debug_enabled
+
+
+def test_registry():
+    structlog.configure()
+
+    assert get_logger('foo') is get_logger('foo')
+    assert get_logger('foo') is not get_logger('bar')
+
+
+def test_bindings_not_registered():
+    structlog.configure()
+
+    assert get_logger('foo', key='value') is not get_logger('foo', key='value')
+    assert get_logger('foo', key=[]) is not get_logger('foo', key=[])
+    assert list(logger._registry) == []  # noqa: WPS437
+
+
+def test_registry_reset():
+    structlog.configure()
+    cached = get_logger('foo')
+
+    logger.reset_loggers()
+
+    assert get_logger('foo') is not cached
+
+
+def test_assembled():
+    structlog.configure()
+
+    assembled = get_logger('foo').resolve()  # type: ignore
+
+    assert isinstance(assembled, structlog.BoundLoggerBase)
+    assert get_logger('foo').resolve() is assembled  # type: ignore
+    assert logger.resolve_logger(assembled) is assembled
+    assert structlog.get_context(get_logger('foo', key='value'))['key'] == 'value'
+    assert repr(get_logger('foo')) == "<RegisteredLogger 'foo'>"
+
+
+def test_follows_reconfiguration():
+    first: List[str] = []
+    second: List[str] = []
+
+    structlog.configure(
+        processors=[lambda _, __, event_dict: event_dict['event']], logger_factory=lambda *args: ListLogger(first)
+    )
+    module_logger = get_logger('foo')
+    bound_logger = get_logger('foo', key='value')
+    module_logger.info('first')
+
+    # Like `init()` does
+    structlog.configure(logger_factory=lambda *args: ListLogger(second))
+    logger.reset_loggers()
+
+    module_logger.info('second')
+    module_logger.bind(key='value').warning('third')
+    bound_logger.info('fourth')
+
+    assert first == ['first']
+    assert second == ['second', 'third', 'fourth']
+
+
+def test_reset_after_change_in_place():
+    events: List[str] = []
+    processors = [lambda _, __, event_dict: event_dict['event']]
+
+    structlog.configure(processors=processors, logger_factory=lambda *args: ListLogger(events))
+    module_logger = get_logger('foo')
+
+    processors.insert(0, lambda _, __, event_dict: {**event_dict, 'event': event_dict['event'].upper()})
+    logger.reset_loggers()
+    module_logger.info('event')
+
+    assert events == ['EVENT']
+
+
+def test_level_rules():
+    table = LevelTable(logging.INFO, {'app.db': logging.DEBUG})
+    structlog.configure(wrapper_class=make_level_bound_logger(table.min_level, table))
+
+    assert get_logger('app.db').debug_enabled
+    assert not get_logger('app').debug_enabled
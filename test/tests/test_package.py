@@ -0,0 +1,32 @@
+import subprocess
+import sys
+
+import pytest
+
+import outcome.logkit
+from outcome.logkit import aio, context, counters, features, init, logger
+
+
+def test_lazy_attributes():
+    assert outcome.logkit.init_logging is init.init
+    assert outcome.logkit.get_logger is logger.get_logger
+    assert outcome.logkit.get_async_logger is aio.get_async_logger
+    assert outcome.logkit.context is context
+    assert outcome.logkit.feature_set is features.feature_set
+    assert outcome.logkit.stats is counters.stats
+
+
+def test_unknown_attribute():
+    with pytest.raises(AttributeError):
+        outcome.logkit.unknown  # noqa: B018
+
+
+def test_dir():
+    assert set(outcome.logkit.__all__) <= set(dir(outcome.logkit))
+
+
+def test_import_is_lazy():
+    code = 'import sys, outcome.logkit; print(sorted(m for m in sys.modules if m.startswith(("outcome.logkit.", "structlog"))))'
+    modules = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True).stdout
+
+    assert modules.strip() == '[]'
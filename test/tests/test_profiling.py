@@ -0,0 +1,162 @@
+import io
+import logging
+from typing import List
+from unittest.mock import Mock, patch
+
+import pytest
+import structlog
+
+from outcome.logkit import init, intercept, logger, profiling
+from outcome.logkit.levels import LogLevelProcessor
+from outcome.logkit.types import EventDict
+
+
+@pytest.fixture(autouse=True)
+def reset_profiles():
+    profiling.reset()
+    yield
+    profiling.reset()
+
+
+def passthrough(logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+    return event_dict
+
+
+def drop(logger: object, method_name: str, event_dict: EventDict) -> EventDict:
+    raise structlog.DropEvent
+
+
+class TestHistogram:
+    def test_empty(self):
+        h = profiling.Histogram('empty')
+
+        assert h.mean_ns == 0
+        assert h.percentile_ns(50) == 0
+        assert h.estimated_total_ns == 0
+
+    def test_percentiles(self):
+        h = profiling.Histogram('percentiles')
+        for duration in [100] * 98 + [5000, 10**15]:
+            h.add(duration)
+        h.calls = 200
+
+        assert h.samples == 100
+        assert h.percentile_ns(50) == 128
+        assert h.percentile_ns(99) == 8192
+        assert h.percentile_ns(100) == 2**39
+        assert h.estimated_total_ns == h.mean_ns * 200
+
+    def test_clear(self):
+        h = profiling.Histogram('clear')
+        h.add(100)
+        h.clear()
+
+        assert h.samples == 0
+        assert not any(h.buckets)
+
+
+class TestProfiledProcessor:
+    def test_sampling(self):
+        processor = profiling.ProfiledProcessor(passthrough, sample_every=4)
+
+        for _ in range(10):  # noqa: WPS122
+            assert processor(None, 'info', {'event': 'event'}) == {'event': 'event'}
+
+        assert processor.histogram.calls == 10
+        assert processor.histogram.samples == 3
+        assert processor.histogram.name == f'{__name__}.passthrough'
+
+    def test_drop(self):
+        processor = profiling.ProfiledProcessor(drop)
+
+        with pytest.raises(structlog.DropEvent):
+            processor(None, 'info', {})
+
+        assert processor.histogram.samples == 1
+
+    def test_instance_name(self):
+        processor = profiling.ProfiledProcessor(LogLevelProcessor(logging.INFO))
+        assert processor.histogram.name == 'outcome.logkit.levels.LogLevelProcessor'
+
+    def test_unwrap(self):
+        assert profiling.unwrap(profiling.ProfiledProcessor(passthrough)) is passthrough
+        assert profiling.unwrap(passthrough) is passthrough
+
+
+def test_profile_processors():
+    with patch.object(profiling, '_dump_registered', False), patch.object(profiling.atexit, 'register') as register:
+        processors = profiling.profile_processors([passthrough, drop])
+        profiling.profile_processors(processors)
+
+    register.assert_called_once_with(profiling.dump)
+    assert [profiling.unwrap(p) for p in processors] == [passthrough, drop]
+
+
+def test_report():
+    fast = profiling.ProfiledProcessor(passthrough, sample_every=1)
+    slow = profiling.ProfiledProcessor(drop, sample_every=1)
+
+    fast(None, 'info', {})
+    slow.histogram.calls += 1
+    slow.histogram.add(10**6)
+
+    lines = profiling.report(top=1).splitlines()
+    assert len(lines) == 2
+    assert lines[0].startswith('processor')
+    assert lines[1].startswith(f'{__name__}.drop')
+
+
+def test_dump():
+    stream = io.StringIO()
+
+    profiling.dump(stream=stream)
+    assert stream.getvalue() == ''
+
+    profiling.ProfiledProcessor(passthrough)(None, 'info', {})
+    profiling.dump(stream=stream)
+    assert f'{__name__}.passthrough' in stream.getvalue()
+
+
+class TestFinalProcessors:
+    def test_not_profiled(self):
+        processors = init.get_final_processors(logging.INFO, [passthrough])
+        assert not any(isinstance(p, profiling.ProfiledProcessor) for p in processors)
+
+    def test_profiled(self):
+        processors = init.get_final_processors(logging.INFO, [passthrough], profile=True)
+
+        assert all(isinstance(p, profiling.ProfiledProcessor) for p in processors)
+        assert passthrough in [profiling.unwrap(p) for p in processors]
+
+    @pytest.mark.parametrize('value, expected', [('1', True), ('true', True), ('no', False), ('', False)])
+    def test_env(self, value: str, expected: bool):
+        with patch.dict(init.os.environ, {'LOGKIT_PROFILE': value}):
+            assert init.get_profile() is expected
+
+
+def test_bridge_handler():
+    output: List[object] = []
+    struct_logger = Mock()
+
+    structlog.configure(
+        processors=init.get_final_processors(logging.INFO, profile=True),
+        logger_factory=lambda *args: struct_logger,
+    )
+    logger.reset_loggers()
+    struct_logger.info.side_effect = output.append
+
+    try:  # noqa: WPS501
+        record = logging.LogRecord('bridge', logging.INFO, __name__, 0, 'hello %s', ('world',), None)
+        handler = intercept.StructlogBridgeHandler()
+        handler.handle(record)
+    finally:
+        structlog.reset_defaults()
+        logger.reset_loggers()
+
+    assert len(output) == 1
+    assert 'hello world' in output[0]  # type: ignore
+
+    # The message is formatted after the (profiled) level filter
+    _, filters, _ = handler._chain
+    assert isinstance(profiling.unwrap(filters[-1]), LogLevelProcessor)
+    assert profiling.histogram('outcome.logkit.levels.LogLevelProcessor').calls == 1
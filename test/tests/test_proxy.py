@@ -1,5 +1,8 @@
+import asyncio
 import logging
-from unittest.mock import Mock, patch
+from unittest.mock import ANY, Mock, patch
+
+import pytest
 
 from outcome.logkit.proxy import LoggingProxy
 
@@ -14,6 +17,26 @@ class Target:
     def method(self):
         return method_value
 
+    def failing(self):
+        raise ValueError('failing')
+
+    async def coroutine(self, value: str):
+        await asyncio.sleep(0)
+        return value
+
+    async def failing_coroutine(self):
+        await asyncio.sleep(0)
+        raise ValueError('failing')
+
+    async def generator(self, count: int):
+        for i in range(count):
+            await asyncio.sleep(0)
+            yield i
+
+    async def failing_generator(self):
+        yield 1
+        raise ValueError('failing')
+
 
 @patch('outcome.logkit.proxy.get_logger', autospec=True)
 class TestProxy:
@@ -48,6 +71,158 @@ class TestProxy:
             args=(),
             kwargs={},
             retval=method_value,
+            duration_ms=ANY,
             levelno=logging.FATAL,
             logger='my_test.method',
         )
+
+    def test_proxy_disabled(self, mocked_get_logger: Mock):
+        logger = Mock()
+        logger.is_enabled_for.return_value = False
+        mocked_get_logger.return_value = logger
+
+        proxied = LoggingProxy(Target(), level=logging.DEBUG, name='my_test')
+
+        assert proxied.attribute == attribute_value
+        assert proxied.method() == method_value
+
+        logger.is_enabled_for.assert_called_with(logging.DEBUG)
+        logger.log.assert_not_called()
+
+    def test_proxy_without_level_check(self, mocked_get_logger: Mock):
+        logger = Mock(spec=['log'])
+        mocked_get_logger.return_value = logger
+
+        proxied = LoggingProxy(Target(), level=logging.DEBUG, name='my_test')
+
+        assert proxied.attribute == attribute_value
+        logger.log.assert_called_once()
+
+    def test_duration(self, mocked_get_logger: Mock):
+        logger = Mock()
+        mocked_get_logger.return_value = logger
+
+        with patch('outcome.logkit.proxy.time.perf_counter_ns', side_effect=[1000000, 3500000]):
+            LoggingProxy(Target(), name='my_test').method()
+
+        assert logger.log.call_args.kwargs['duration_ms'] == 2.5
+
+    def test_child_cache(self, mocked_get_logger: Mock):
+        target = Target()
+        proxied = LoggingProxy(target, name='my_test')
+
+        child = proxied.method
+        assert proxied.method is child
+        assert mocked_get_logger.call_count == 2
+
+        # A new object under the same name gets a new proxy
+        target.method = lambda: 'other'  # type: ignore
+        other = proxied.method
+        assert other is not child
+        assert other() == 'other'
+        assert proxied.method is other
+
+    def test_child_cache_function(self, mocked_get_logger: Mock):
+        target = Target()
+        target.function = print  # type: ignore
+        proxied = LoggingProxy(target, name='my_test')
+
+        assert proxied.function is proxied.function
+
+    def test_proxy_exception(self, mocked_get_logger: Mock):
+        logger = Mock()
+        mocked_get_logger.return_value = logger
+
+        with pytest.raises(ValueError):
+            LoggingProxy(Target(), name='my_test').failing()
+
+        kwargs = logger.log.call_args.kwargs
+        assert kwargs['retval'] is None
+        assert isinstance(kwargs['error'], ValueError)
+
+
+@patch('outcome.logkit.proxy.get_logger', autospec=True)
+class TestAsyncProxy:
+    def test_coroutine(self, mocked_get_logger: Mock):
+        logger = Mock()
+        mocked_get_logger.return_value = logger
+        proxied = LoggingProxy(Target(), level=logging.FATAL, name='my_test')
+
+        coroutine = proxied.coroutine('value')
+        assert not logger.log.mock_calls
+
+        assert asyncio.run(coroutine) == 'value'
+        logger.log.assert_called_once_with(
+            'my_test.coroutine',
+            type='method',
+            args=('value',),
+            kwargs={},
+            retval='value',
+            duration_ms=ANY,
+            levelno=logging.FATAL,
+            logger='my_test.coroutine',
+        )
+
+    def test_failing_coroutine(self, mocked_get_logger: Mock):
+        logger = Mock()
+        mocked_get_logger.return_value = logger
+
+        with pytest.raises(ValueError):
+            asyncio.run(LoggingProxy(Target(), name='my_test').failing_coroutine())
+
+        kwargs = logger.log.call_args.kwargs
+        assert kwargs['retval'] is None
+        assert isinstance(kwargs['error'], ValueError)
+
+    def test_generator(self, mocked_get_logger: Mock):
+        logger = Mock()
+        mocked_get_logger.return_value = logger
+        proxied = LoggingProxy(Target(), name='my_test')
+
+        async def consume():  # noqa: WPS430
+            return [i async for i in proxied.generator(3)]
+
+        assert asyncio.run(consume()) == [0, 1, 2]
+        logger.log.assert_called_once_with(
+            'my_test.generator',
+            type='method',
+            args=(3,),
+            kwargs={},
+            retval=None,
+            duration_ms=ANY,
+            items=3,
+            levelno=logging.DEBUG,
+            logger='my_test.generator',
+        )
+
+    def test_generator_stopped_early(self, mocked_get_logger: Mock):
+        logger = Mock()
+        mocked_get_logger.return_value = logger
+        proxied = LoggingProxy(Target(), name='my_test')
+
+        async def consume():  # noqa: WPS430
+            generator = proxied.generator(3)
+            first = await generator.__anext__()
+            await generator.aclose()
+            return first
+
+        assert asyncio.run(consume()) == 0
+
+        kwargs = logger.log.call_args.kwargs
+        assert kwargs['items'] == 1
+        assert 'error' not in kwargs
+
+    def test_failing_generator(self, mocked_get_logger: Mock):
+        logger = Mock()
+        mocked_get_logger.return_value = logger
+        proxied = LoggingProxy(Target(), name='my_test')
+
+        async def consume():  # noqa: WPS430
+            return [i async for i in proxied.failing_generator()]
+
+        with pytest.raises(ValueError):
+            asyncio.run(consume())
+
+        kwargs = logger.log.call_args.kwargs
+        assert kwargs['items'] == 1
+        assert isinstance(kwargs['error'], ValueError)
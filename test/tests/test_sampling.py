@@ -0,0 +1,256 @@
+import logging
+import os
+from typing import List
+from unittest.mock import patch
+
+import pytest
+import structlog
+
+from outcome.logkit import init, logger, sampling
+from outcome.logkit.types import EventDict
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture(autouse=True)
+def cancel_timers():
+    yield
+
+    for processor in list(sampling._processors):  # noqa: WPS437
+        processor.cancel_timer()
+
+
+def event(name: str = 'event', level: str = 'info', logger_name: str = 'worker') -> EventDict:
+    return {'event': name, 'level': level, 'logger': logger_name}
+
+
+def run(processor: sampling.SamplingProcessor, event_dict: EventDict) -> bool:
+    try:
+        processor(None, 'info', event_dict)
+    except structlog.DropEvent:
+        return False
+    return True
+
+
+class TestTokenBucket:
+    def test_take(self):
+        bucket = sampling.TokenBucket(rate=1, burst=2, now=0)
+
+        assert bucket.take(0)
+        assert bucket.take(0)
+        assert not bucket.take(0)
+        assert not bucket.take(0.5)
+        assert bucket.take(1)
+
+    def test_burst_cap(self):
+        bucket = sampling.TokenBucket(rate=1, burst=2, now=0)
+
+        assert [bucket.take(100) for _ in range(3)] == [True, True, False]
+
+
+class TestSamplingProcessor:
+    def test_rate_limit(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=2, clock=clock)
+
+        assert [run(processor, event()) for _ in range(3)] == [True, True, False]
+
+        # Buckets are per (logger, event)
+        assert run(processor, event('other'))
+        assert run(processor, event(logger_name='other'))
+
+        clock.now = 1
+        assert run(processor, event())
+        assert processor.suppressed_count == 1
+
+    def test_errors_not_sampled(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, sample_rates={'error': 0}, clock=clock)
+
+        assert all(run(processor, event(level='error')) for _ in range(5))
+        assert all(run(processor, event(level='fatal')) for _ in range(5))
+
+    def test_sample_rates(self, clock: Clock):
+        values = iter([0.05, 0.5, 0.05])
+        processor = sampling.SamplingProcessor(
+            rate=None,
+            sample_rates={logging.DEBUG: 0.1},
+            clock=clock,
+            random=lambda: next(values),
+        )
+
+        assert [run(processor, event(level='debug')) for _ in range(3)] == [True, False, True]
+        assert run(processor, event())
+        assert processor.suppressed_count == 1
+
+    @pytest.mark.parametrize('sample_rates', [{35: 0.5}, {'debug': 2}, {'loud': 0.5}])
+    def test_invalid_sample_rates(self, sample_rates: dict):
+        with pytest.raises(ValueError):
+            sampling.SamplingProcessor(sample_rates=sample_rates)
+
+    def test_unhashable_event(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, clock=clock)
+
+        assert all(run(processor, event(['event'])) for _ in range(3))  # type: ignore
+
+    def test_max_keys(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, max_keys=2, clock=clock)
+
+        for name in ('a', 'b', 'c'):
+            assert run(processor, event(name))
+
+        assert len(processor._buckets) == 1
+        assert run(processor, event('a'))
+
+    def test_summary(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, summary_interval=10, clock=clock)
+        summaries: List[EventDict] = []
+
+        def capture(logger: object, method_name: str, event_dict: EventDict):
+            summaries.append(processor(logger, method_name, event_dict))
+            raise structlog.DropEvent
+
+        structlog.configure(processors=[capture])
+        logger.reset_loggers()
+
+        for _ in range(3):
+            run(processor, event())
+        run(processor, event('other', logger_name=None))
+        run(processor, event('other', logger_name=None))
+
+        # Not yet
+        clock.now = 5
+        run(processor, event())
+        assert not summaries
+
+        clock.now = 10
+        run(processor, event())
+
+        assert len(summaries) == 1
+        assert summaries[0]['event'] == sampling.summary_event
+        assert summaries[0]['name'] == sampling.summary_logger_name
+        assert summaries[0]['suppressed_count'] == 3
+        assert summaries[0]['suppressed_events'] == {'worker:event': 2, 'None:other': 1}
+        assert processor.suppressed_count == 0
+
+        # The summary's own events are never sampled, and nothing is reported until there are drops
+        clock.now = 30
+        assert run(processor, event())
+        assert len(summaries) == 1
+
+        structlog.reset_defaults()
+        logger.reset_loggers()
+
+    def test_summary_once(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, summary_interval=10, clock=clock)
+        processor._suppressed = {('worker', 'event'): 1}
+
+        with patch.object(sampling, 'get_logger') as get_logger:
+            processor._summary_lock.acquire()
+            processor.emit_summary(10)
+            processor._summary_lock.release()
+
+            processor.emit_summary(5)
+
+            assert not get_logger.mock_calls
+
+    def test_summary_timer(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, summary_interval=10, clock=clock)
+
+        run(processor, event())
+        run(processor, event())
+
+        timer = processor._timer  # noqa: WPS437
+        assert timer is not None
+        assert timer.interval == 10
+
+        # Another drop doesn't schedule a second timer
+        clock.now = 0.5
+        run(processor, event())
+        processor._schedule_summary(clock.now)  # noqa: WPS437
+        assert processor._timer is timer  # noqa: WPS437
+
+        with patch.object(sampling, 'get_logger') as get_logger:
+            # Structlog isn't configured, the counts are kept for later
+            processor._on_timer()  # noqa: WPS437
+            assert not get_logger.mock_calls
+            assert processor.suppressed_count == 2
+
+            structlog.configure()
+
+            # Not yet due, the timer is scheduled again
+            clock.now = 1
+            processor._on_timer()  # noqa: WPS437
+            assert not get_logger.mock_calls
+            assert processor._timer.interval == 9  # noqa: WPS437
+
+            clock.now = 10
+            processor._on_timer()  # noqa: WPS437
+
+        get_logger.return_value.warning.assert_called_once_with(
+            sampling.summary_event, suppressed_count=2, suppressed_events={'worker:event': 2}
+        )
+        assert processor._timer is None  # noqa: WPS437
+
+        structlog.reset_defaults()
+
+    def test_flush_at_exit(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, summary_interval=10, clock=clock)
+
+        run(processor, event())
+        run(processor, event())
+        structlog.configure()
+
+        with patch.object(sampling, 'get_logger') as get_logger:
+            with patch.object(sampling, '_processors', {processor}):
+                sampling._close_processors()  # noqa: WPS437
+
+            # Reported even though the interval hasn't elapsed
+            get_logger.return_value.warning.assert_called_once_with(
+                sampling.summary_event, suppressed_count=1, suppressed_events={'worker:event': 1}
+            )
+            assert processor._timer is None  # noqa: WPS437
+
+            # Nothing left to report
+            processor.flush()
+            assert len(get_logger.mock_calls) == 2
+
+        structlog.reset_defaults()
+
+    def test_fork(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, clock=clock)
+
+        run(processor, event())
+        run(processor, event())
+        timer = processor._timer  # noqa: WPS437
+        processor._after_fork_in_child()  # noqa: WPS437
+
+        assert processor._timer is None  # noqa: WPS437
+        timer.cancel()
+
+    def test_summary_logger_not_sampled(self, clock: Clock):
+        processor = sampling.SamplingProcessor(rate=1, burst=1, clock=clock)
+
+        assert all(run(processor, event(logger_name=sampling.summary_logger_name)) for _ in range(3))
+
+
+@patch.dict(os.environ, {'WITH_FEAT_CO_OUTCOME_LOGKIT_SAMPLING': 'true'})
+def test_sampling_feature():
+    processors = init.get_final_processors(logging.INFO)
+
+    assert isinstance(processors[3], sampling.SamplingProcessor)
+
+
+def test_sampling_feature_inactive():
+    processors = init.get_final_processors(logging.INFO)
+
+    assert not any(isinstance(p, sampling.SamplingProcessor) for p in processors)
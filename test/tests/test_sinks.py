@@ -0,0 +1,439 @@
+import io
+import threading
+from typing import List
+from unittest.mock import patch
+
+import pytest
+
+from outcome.logkit import fork, sinks
+
+
+class BlockingStream(io.BytesIO):
+    def __init__(self) -> None:
+        super().__init__()
+        self.release = threading.Event()
+        self.entered = threading.Event()
+
+    def write(self, data: bytes) -> int:  # type: ignore
+        self.entered.set()
+        self.release.wait(5)
+        return super().write(data)
+
+
+class FailingStream(io.BytesIO):
+    def write(self, data: bytes) -> int:  # type: ignore
+        raise OSError('Broken pipe')
+
+
+def test_to_bytes():
+    assert sinks.to_bytes('é') == 'é'.encode('utf-8')
+    assert sinks.to_bytes(bytearray(b'abc')) == b'abc'
+
+
+def test_sink_defaults():
+    class ListSink(sinks.Sink):
+        def __init__(self) -> None:
+            self.messages: List[sinks.Message] = []
+
+        def write(self, message: sinks.Message) -> None:
+            self.messages.append(message)
+
+    sink = ListSink()
+    sink.info('event')
+
+    assert sink.messages == ['event']
+    assert sink.flush()
+    assert sink.close()
+
+
+def test_sink_is_abstract():
+    with pytest.raises(TypeError):
+        sinks.Sink()  # type: ignore
+
+
+def test_sink_is_its_own_factory():
+    sink = sinks.BackgroundSink(io.BytesIO())
+    assert sink('any', 'args') is sink
+
+
+class TestBackgroundSink:
+    def test_write(self):
+        stream = io.BytesIO()
+        sink = sinks.BackgroundSink(stream)
+
+        sink.info('first')
+        sink.error(b'second')
+
+        assert sink.flush(5)
+        assert stream.getvalue() == b'first\nsecond\n'
+
+        sink.close(5)
+
+    def test_flush_without_writer(self):
+        sink = sinks.BackgroundSink(io.BytesIO())
+        assert sink.flush()
+        assert sink.close()
+
+    def test_flush_deadline(self):
+        stream = BlockingStream()
+        sink = sinks.BackgroundSink(stream)
+
+        sink.msg('event')
+        stream.entered.wait(5)
+
+        assert not sink.flush(0.01)
+        assert not sink.close(0.01)
+
+        stream.release.set()
+        assert sink.flush(5)
+
+    def test_flush_waits(self):
+        stream = BlockingStream()
+        sink = sinks.BackgroundSink(stream)
+
+        sink.msg('event')
+        stream.entered.wait(5)
+
+        threading.Timer(0.05, stream.release.set).start()
+
+        assert sink.flush()
+        assert stream.getvalue() == b'event\n'
+
+    def test_write_after_close(self):
+        stream = io.BytesIO()
+        sink = sinks.BackgroundSink(stream)
+
+        sink.close()
+        sink.msg('late')
+
+        assert stream.getvalue() == b'late\n'
+
+    def test_drop_newest(self):
+        stream = BlockingStream()
+        sink = sinks.BackgroundSink(stream, capacity=1, policy=sinks.OverflowPolicy.drop_newest)
+
+        sink.msg('in_flight')
+        stream.entered.wait(5)
+
+        sink.msg('queued')
+        sink.msg('dropped')
+
+        stream.release.set()
+        sink.close(5)
+
+        assert sink.dropped == 1
+        assert stream.getvalue() == b'in_flight\nqueued\n'
+
+    def test_drop_oldest(self):
+        stream = BlockingStream()
+        sink = sinks.BackgroundSink(stream, capacity=1, policy=sinks.OverflowPolicy.drop_oldest)
+
+        sink.msg('in_flight')
+        stream.entered.wait(5)
+
+        sink.msg('dropped')
+        sink.msg('queued')
+
+        stream.release.set()
+        sink.close(5)
+
+        assert sink.dropped == 1
+        assert stream.getvalue() == b'in_flight\nqueued\n'
+
+    def test_block(self):
+        stream = BlockingStream()
+        sink = sinks.BackgroundSink(stream, capacity=1, policy=sinks.OverflowPolicy.block)
+
+        sink.msg('in_flight')
+        stream.entered.wait(5)
+        sink.msg('queued')
+
+        producer = threading.Thread(target=sink.msg, args=('blocked',))
+        producer.start()
+        producer.join(0.05)
+
+        assert producer.is_alive()
+
+        stream.release.set()
+        producer.join(5)
+        sink.close(5)
+
+        assert sink.dropped == 0
+        assert stream.getvalue() == b'in_flight\nqueued\nblocked\n'
+
+    def test_block_released_on_close(self):
+        stream = BlockingStream()
+        sink = sinks.BackgroundSink(stream, capacity=1, policy=sinks.OverflowPolicy.block)
+
+        sink.msg('in_flight')
+        stream.entered.wait(5)
+        sink.msg('queued')
+
+        producer = threading.Thread(target=sink.msg, args=('blocked',))
+        producer.start()
+        producer.join(0.05)
+
+        closer = threading.Thread(target=sink.close, args=(5,))
+        closer.start()
+
+        stream.release.set()
+        producer.join(5)
+        closer.join(5)
+
+        assert sorted(stream.getvalue().splitlines()) == [b'blocked', b'in_flight', b'queued']
+
+    def test_batching(self):
+        stream = BlockingStream()
+        sink = sinks.BackgroundSink(stream, batch_size=2)
+
+        sink.msg('a')
+        stream.entered.wait(5)
+
+        with patch.object(sink, 'write_batch', wraps=sink.write_batch) as write_batch:
+            for message in ('b', 'c', 'd'):
+                sink.msg(message)
+
+            stream.release.set()
+            sink.close(5)
+
+        assert [c.args[0] for c in write_batch.mock_calls] == [[b'b', b'c'], [b'd']]
+
+    def test_failing_stream(self):
+        sink = sinks.BackgroundSink(FailingStream())
+
+        sink.msg('lost')
+
+        assert sink.close(5)
+        assert sink.dropped == 1
+
+    def test_fork_hooks(self):
+        stream = io.BytesIO()
+        sink = sinks.BackgroundSink(stream)
+        sink.msg('before_fork')
+
+        fork._before_fork()
+        assert stream.getvalue() == b'before_fork\n'
+        assert sink._lock.locked()
+
+        fork._after_fork_in_parent()
+        assert not sink._lock.locked()
+
+        sink._queue.append(b'parent_event')
+        fork._after_fork_in_child()
+
+        assert not sink._queue
+        assert sink._writer is None
+
+        sink.msg('in_child')
+        sink.close(5)
+
+        assert stream.getvalue() == b'before_fork\nin_child\n'
+
+    def test_close_all(self):
+        stream = io.BytesIO()
+        sink = sinks.BackgroundSink(stream)
+        sink.msg('event')
+
+        sinks._close_sinks()
+
+        assert stream.getvalue() == b'event\n'
+
+
+@pytest.mark.parametrize(
+    'method', ['log', 'debug', 'info', 'warn', 'warning', 'err', 'error', 'critical', 'exception', 'failure', 'fatal']
+)
+def test_level_methods(method: str):
+    stream = io.BytesIO()
+    sink = sinks.BackgroundSink(stream)
+
+    getattr(sink, method)('event')
+    sink.close(5)
+
+    assert stream.getvalue() == b'event\n'
+
+
+class TestFileSink:
+    def make_sink(self, tmp_path, **kwargs) -> sinks.FileSink:
+        sink = sinks.FileSink(str(tmp_path / 'app.log'), **kwargs)
+        return sink
+
+    def test_write(self, tmp_path):
+        sink = self.make_sink(tmp_path, max_bytes=1024)
+
+        sink.info('first')
+        sink.info(b'second')
+        assert sink.flush(5)
+
+        # The active segment is preallocated
+        assert (tmp_path / 'app.log').stat().st_size == 1024
+
+        assert sink.close(5)
+        assert (tmp_path / 'app.log').read_bytes() == b'first\nsecond\n'
+
+    def test_write_after_close(self, tmp_path):
+        sink = self.make_sink(tmp_path, max_bytes=1024)
+        sink.close()
+
+        sink.info('late')
+
+        assert (tmp_path / 'app.log').read_bytes() == b'late\n'
+
+    def test_append_to_existing(self, tmp_path):
+        # A segment left preallocated by a crash
+        (tmp_path / 'app.log').write_bytes(b'before\n' + b'\0' * 100)
+
+        sink = self.make_sink(tmp_path, max_bytes=1024)
+        sink.info('after')
+        sink.close(5)
+
+        assert (tmp_path / 'app.log').read_bytes() == b'before\nafter\n'
+
+    def test_content_end(self, tmp_path):
+        path = tmp_path / 'segment'
+        path.write_bytes(b'data' + b'\0' * (sinks._scan_chunk * 2))
+
+        with open(path, 'rb') as segment:
+            size = path.stat().st_size
+            assert sinks.content_end(segment.fileno(), size) == 4
+
+        path.write_bytes(b'\0' * 10)
+        with open(path, 'rb') as segment:
+            assert sinks.content_end(segment.fileno(), 10) == 0
+
+    def test_rotate_on_size(self, tmp_path):
+        sink = self.make_sink(tmp_path, max_bytes=10, backup_count=2, fsync=sinks.FsyncPolicy.batch)
+
+        for message in ('aaaa', 'bbbb', 'cccc', 'dddd', 'eeee'):
+            sink.write_batch([message.encode()])
+
+        assert sink._cleaner is not None
+        sink._cleaner.join(5)
+        sink.close()
+
+        segments = sink.segments()
+        assert len(segments) == 2
+        assert [open(segment, 'rb').read() for segment in segments] == [b'aaaa\nbbbb\n', b'cccc\ndddd\n']
+        assert (tmp_path / 'app.log').read_bytes() == b'eeee\n'
+
+    def test_oversized_batch(self, tmp_path):
+        sink = self.make_sink(tmp_path, max_bytes=4)
+
+        sink.write_batch([b'too large'])
+        sink.close()
+
+        assert not sink.segments()
+        assert (tmp_path / 'app.log').read_bytes() == b'too large\n'
+
+    def test_rotate_mid_batch(self, tmp_path):
+        sink = self.make_sink(tmp_path, max_bytes=20000, backup_count=10, fsync=sinks.FsyncPolicy.never)
+        events = [f'event {n:04}'.encode() * 10 for n in range(700)]
+
+        sink.write_batch(events)
+        assert sink._cleaner is not None
+        sink._cleaner.join(5)
+        sink.close()
+
+        files = [*sink.segments(), str(tmp_path / 'app.log')]
+        contents = [open(segment, 'rb').read() for segment in files]
+
+        assert len(files) == 4
+        assert all(len(content) <= 20000 for content in contents)
+        assert b''.join(contents) == b''.join(event + b'\n' for event in events)
+
+    def test_oversized_event_in_batch(self, tmp_path):
+        sink = self.make_sink(tmp_path, max_bytes=4)
+
+        sink.write_batch([b'a', b'too large', b'b'])
+        sink.close()
+
+        segments = sink.segments()
+        assert [open(segment, 'rb').read() for segment in segments] == [b'a\n', b'too large\n']
+        assert (tmp_path / 'app.log').read_bytes() == b'b\n'
+
+    def test_rotate_on_interval(self, tmp_path):
+        sink = self.make_sink(tmp_path, interval=60, fsync=sinks.FsyncPolicy.never)
+
+        with patch.object(sinks.time, 'monotonic', return_value=0):
+            sink.write_batch([b'first'])
+            sink.write_batch([b'second'])
+
+        with patch.object(sinks.time, 'monotonic', return_value=60):
+            sink.write_batch([b'third'])
+
+        sink.close()
+
+        segments = sink.segments()
+        assert len(segments) == 1
+        assert open(segments[0], 'rb').read() == b'first\nsecond\n'
+        assert (tmp_path / 'app.log').read_bytes() == b'third\n'
+
+    def test_rotated_path_collision(self, tmp_path):
+        sink = self.make_sink(tmp_path)
+
+        with patch.object(sinks.time, 'strftime', return_value='20200101-000000'):
+            (tmp_path / 'app.log.20200101-000000.0').write_bytes(b'')
+            assert sink._rotated_path() == str(tmp_path / 'app.log.20200101-000000.1')
+
+    def test_segments(self, tmp_path):
+        for name in ('app.log.20200101-000000.10', 'app.log.20200101-000000.9', 'app.log.old', 'other.log.20200101-000000.0'):
+            (tmp_path / name).write_bytes(b'')
+
+        sink = self.make_sink(tmp_path, backup_count=1)
+
+        assert sink.segments() == [str(tmp_path / 'app.log.20200101-000000.9'), str(tmp_path / 'app.log.20200101-000000.10')]
+
+        sink.cleanup()
+        assert sink.segments() == [str(tmp_path / 'app.log.20200101-000000.10')]
+
+    def test_fsync_interval(self, tmp_path):
+        sink = self.make_sink(tmp_path, fsync_interval=1)
+
+        with patch.object(sinks, '_fdatasync') as fdatasync:
+            with patch.object(sinks.time, 'monotonic', return_value=0):
+                sink.write_batch([b'first'])
+                sink.write_batch([b'second'])
+
+            assert not fdatasync.mock_calls
+
+            with patch.object(sinks.time, 'monotonic', return_value=1):
+                sink.write_batch([b'third'])
+                sink.write_batch([b'fourth'])
+
+            assert len(fdatasync.mock_calls) == 1
+
+        sink.close()
+
+    def test_preallocation_unavailable(self, tmp_path):
+        sink = self.make_sink(tmp_path)
+
+        with patch.object(sinks.os, 'posix_fallocate', side_effect=OSError('not supported')):
+            sink.write_batch([b'first'])
+
+        assert not sink.preallocate
+        assert (tmp_path / 'app.log').read_bytes() == b'first\n'
+        sink.close()
+
+    def test_preallocation_missing(self, tmp_path, monkeypatch: pytest.MonkeyPatch):
+        sink = self.make_sink(tmp_path)
+
+        monkeypatch.delattr(sinks.os, 'posix_fallocate')
+        sink.write_batch([b'first'])
+
+        assert not sink.preallocate
+        sink.close()
+
+    def test_fork_in_child(self, tmp_path):
+        sink = self.make_sink(tmp_path)
+        sink.write_batch([b'parent'])
+
+        with patch.object(sinks.os, 'getpid', return_value=1234):
+            sink._after_fork_in_child()
+
+        sink.write_batch([b'child'])
+        sink.close()
+
+        assert sink.path == str(tmp_path / 'app.log.1234')
+        assert (tmp_path / 'app.log.1234').read_bytes() == b'child\n'
+
+        sink._after_fork_in_child()
+        assert sink._fd is None
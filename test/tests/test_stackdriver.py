@@ -7,7 +7,10 @@ import pytest
 import structlog
 from freezegun import freeze_time
 
-from outcome.logkit.stackdriver import StackdriverRenderer
+from outcome.logkit import encoders
+from outcome.logkit.limits import SizeLimits, truncated_key
+from outcome.logkit.stackdriver import StackdriverRenderer, line_size
+from outcome.logkit.types import EventDict
 
 mock_logger = Mock()
 
@@ -89,3 +92,117 @@ def test_invalid_time():
     parsed = json.loads(structured_message)
 
     assert parsed['timestamp'] == '2020/10/12'
+
+
+def reference_render(event_dict: EventDict) -> str:
+    # The renderer as it was, copying the event dict and encoding with json.dumps
+    formatted_dict = dict(event_dict)
+    formatted_dict['severity'] = formatted_dict.pop('level')
+    formatted_dict['message'] = formatted_dict.pop('event')
+    ts = datetime.fromtimestamp(formatted_dict.pop('timestamp')).isoformat('T')
+    formatted_dict['timestamp'] = f'{ts}Z'
+    return json.dumps(formatted_dict, default=encoders.fallback)
+
+
+def make_event() -> EventDict:
+    return {'event': 'é', 'level': 'info', 'logger': 'name', 'key': [1, 2.5, None], 'timestamp': 1602460800.0}
+
+
+def test_byte_identical():
+    renderer = StackdriverRenderer(encoder=encoders.JSONEncoder())
+
+    assert renderer(None, 'info', make_event()) == reference_render(make_event())
+
+
+def test_dumps_kw():
+    # Like the JSONRenderer's, the arguments are those of `json.dumps`
+    renderer = StackdriverRenderer(sort_keys=True, indent=1)
+
+    assert renderer(None, 'info', make_event()) == json.dumps(
+        json.loads(reference_render(make_event())),
+        sort_keys=True,
+        indent=1,
+    )
+
+
+@pytest.mark.parametrize('returns_bytes', [False, True])
+def test_serializer(returns_bytes: bool):
+    def serializer(obj: object, **dumps_kw: object):  # noqa: WPS430
+        serialized = json.dumps(obj, separators=(',', ':'), **dumps_kw)  # type: ignore
+        return serialized.encode('utf-8') if returns_bytes else serialized
+
+    renderer = StackdriverRenderer(serializer)
+    expected = json.dumps(json.loads(reference_render(make_event())), separators=(',', ':'))
+
+    assert renderer(None, 'info', make_event()) == expected
+    assert renderer(structlog.BytesLogger(), 'info', make_event()) == expected.encode('utf-8')
+
+
+def test_bytes_logger():
+    renderer = StackdriverRenderer(encoder=encoders.JSONEncoder())
+
+    output = renderer(structlog.BytesLogger(), 'info', make_event())
+
+    assert output == reference_render(make_event()).encode('utf-8')
+
+
+def test_in_place():
+    event_dict = make_event()
+
+    assert StackdriverRenderer.format_for_stackdriver(event_dict) is event_dict
+    assert list(event_dict.keys()) == ['logger', 'key', 'severity', 'message', 'timestamp']
+
+
+def test_source_location():
+    event_dict = {'event': 'event', 'pathname': 'app.py', 'lineno': 12, 'func_name': 'main'}
+    formatted = StackdriverRenderer.format_for_stackdriver(event_dict)
+
+    assert formatted['logging.googleapis.com/sourceLocation'] == {'file': 'app.py', 'line': 12, 'function': 'main'}
+    assert not {'pathname', 'lineno', 'func_name'} & formatted.keys()
+
+
+class TestLineSize:
+    def render(self, event_dict: EventDict, max_line_bytes: int = 1000, logger: object = None) -> dict:
+        limits = SizeLimits(max_line_bytes=max_line_bytes)
+        rendered = StackdriverRenderer(encoder=encoders.JSONEncoder(), limits=limits)(logger, 'info', event_dict)
+
+        assert line_size(rendered) <= max_line_bytes
+        return json.loads(rendered)
+
+    def test_fits(self):
+        parsed = self.render({'event': 'fits', 'level': 'info', 'payload': 'x' * 100})
+
+        assert parsed['payload'] == 'x' * 100
+        assert truncated_key not in parsed
+
+    def test_largest_fields_dropped(self):
+        event = {'event': 'large', 'level': 'info', 'small': 'x' * 100, 'medium': ['y' * 300] * 2, 'large': 'z' * 900}
+        parsed = self.render(event)
+
+        assert parsed['small'] == 'x' * 100
+        assert parsed['large'] == '<truncated 913 bytes>'
+        assert parsed['medium'] == ['y' * 300] * 2
+        assert parsed[truncated_key] == ['large']
+        assert parsed['message'] == 'large'
+
+    def test_capped_field_dropped(self):
+        parsed = self.render({'event': 'capped', 'level': 'info', 'payload': 'x' * (20 * 1024)})
+
+        assert parsed['payload'].startswith('<truncated')
+        assert parsed[truncated_key] == ['payload']
+
+    def test_bytes(self):
+        parsed = self.render({'event': 'bytes', 'payload': 'é' * 1000}, logger=structlog.BytesLogger())
+
+        assert parsed['payload'].startswith('<truncated')
+
+    def test_message_too_large(self):
+        parsed = self.render({'event': '😀' * 5000, 'level': 'error', 'other': 1}, max_line_bytes=2000)
+
+        assert parsed['severity'] == 'error'
+        assert parsed['message'] == '😀' * (2000 // 24)
+        assert parsed[truncated_key] == ['message', 'other']
+
+    def test_orjson_size(self):
+        assert line_size('é') == 2
+        assert line_size(b'abc') == 3